@@ -1,49 +1,80 @@
 import os
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
-app = Flask(__name__)
-
-app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
-
-app.config.update(
-    SESSION_COOKIE_SAMESITE="None",
-    SESSION_COOKIE_SECURE=True,
-)
-
-CORS(
-    app,
-    supports_credentials=True,
-    resources={r"/api/*": {"origins": [
-        "https://medconnect-frontend-lhur.onrender.com"
-    ]}}
-)
-
-from app.routes.reports import reports_bp
-from app.routes.appointments import appointments_bp
-from app.routes.doctors import doctors_bp
-from app.routes.doctor import doctor_bp
-from app.routes.auth import auth_bp
-from app.routes.db_health import db_health_bp
-from app.routes.quote_requests import quote_requests_bp
-from app.routes.contact import contact_bp
-from app.routes.lab_packages import lab_packages_bp
-from app.routes.uploads import uploads_bp
-from availability import availability_bp
-
-app.register_blueprint(appointments_bp)
-app.register_blueprint(doctors_bp)
-app.register_blueprint(doctor_bp)
-app.register_blueprint(auth_bp)
-app.register_blueprint(db_health_bp)
-app.register_blueprint(reports_bp)
-app.register_blueprint(availability_bp)
-app.register_blueprint(quote_requests_bp)
-app.register_blueprint(contact_bp)
-app.register_blueprint(lab_packages_bp)
-app.register_blueprint(uploads_bp)
-
-
-@app.get("/api/health")
-def health():
-    return {"success": True, "data": {"status": "ok"}}, 200
+CORS_ORIGINS = [
+    "https://medconnect-frontend-lhur.onrender.com"
+]
+
+# Proxies in front of the app that append to X-Forwarded-For (1 on Render).
+# Left at 0, request.remote_addr is the peer address and the header is ignored.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+BLUEPRINTS = [
+    ("app.routes.appointments", "appointments_bp"),
+    ("app.routes.doctors", "doctors_bp"),
+    ("app.routes.doctor", "doctor_bp"),
+    ("app.routes.auth", "auth_bp"),
+    ("app.routes.db_health", "db_health_bp"),
+    ("app.routes.reports", "reports_bp"),
+    ("availability", "availability_bp"),
+    ("app.routes.quote_requests", "quote_requests_bp"),
+    ("app.routes.contact", "contact_bp"),
+    ("app.routes.lab_packages", "lab_packages_bp"),
+    ("app.routes.uploads", "uploads_bp"),
+    ("app.routes.diagnostics", "diagnostics_bp"),
+]
+
+
+def create_app():
+    from importlib import import_module
+
+    app = Flask(__name__)
+
+    app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
+
+    app.config.update(
+        SESSION_COOKIE_SAMESITE="None",
+        SESSION_COOKIE_SECURE=True,
+    )
+
+    if TRUSTED_PROXY_HOPS > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+    CORS(
+        app,
+        supports_credentials=True,
+        resources={r"/api/*": {"origins": CORS_ORIGINS}}
+    )
+
+    from app import instrumentation, metrics, profiler, sessions
+    sessions.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    profiler.init_app(app)
+
+    # Route modules are imported here rather than at package import, so
+    # `import app.db` (migrations, scripts) does not pull in every view.
+    for module_name, attr in BLUEPRINTS:
+        app.register_blueprint(getattr(import_module(module_name), attr))
+
+    @app.get("/api/health")
+    def health():
+        return {"success": True, "data": {"status": "ok"}}, 200
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # Keeps `from app import app` / `gunicorn app:app` working; the instance
+    # is only built the first time something asks for it.
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, g, request
+from werkzeug.exceptions import HTTPException
+
+from app import CORS_ORIGINS, create_app, instrumentation, metrics, sessions
+from app.db import close_async_pool, open_async_pool
+from app.routes.async_api import async_api_bp
+from app.routes.auth import _ensure_seed_users
+
+# uvicorn app.asgi:app
+#
+# The async blueprint serves the endpoints that spend most of their time
+# waiting on Postgres or Twilio; every other route falls through to the
+# unchanged Flask app, which asgiref runs on a thread pool.
+flask_app = create_app()
+
+quart_app = Quart(__name__)
+quart_app.secret_key = flask_app.secret_key
+quart_app.config.update(
+    SESSION_COOKIE_SAMESITE=flask_app.config["SESSION_COOKIE_SAMESITE"],
+    SESSION_COOKIE_SECURE=flask_app.config["SESSION_COOKIE_SECURE"],
+)
+if sessions.enabled():
+    quart_app.session_interface = sessions.quart_interface()
+quart_app.register_blueprint(async_api_bp)
+
+
+@quart_app.before_serving
+async def _startup():
+    await open_async_pool()
+    # The sync /api/me seeds on every call; here it runs once per worker.
+    await asyncio.to_thread(_ensure_seed_users)
+
+
+@quart_app.after_serving
+async def _shutdown():
+    await close_async_pool()
+
+
+_timing_header, _request_log = instrumentation.configure()
+
+
+@quart_app.before_request
+async def _start_request_stats():
+    g._request_stats, g._request_stats_token = instrumentation.begin()
+
+
+@quart_app.after_request
+async def _finish_request_stats(response):
+    stats = g.pop("_request_stats", None)
+    if stats is not None:
+        if _timing_header:
+            response.headers["Server-Timing"] = instrumentation.server_timing(stats)
+        if _request_log:
+            instrumentation.log_request(stats, request.method, request.path, request.endpoint, response.status_code)
+        metrics.observe_request(
+            request.blueprint, request.endpoint, request.method, response.status_code,
+            stats.wall_seconds(), stats.db_seconds,
+        )
+        instrumentation.end(g.pop("_request_stats_token"))
+    return response
+
+
+@quart_app.after_request
+async def _cors(response):
+    origin = request.headers.get("Origin")
+    if origin and origin in CORS_ORIGINS:
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+        response.vary.add("Origin")
+    return response
+
+
+_wsgi_app = WsgiToAsgi(flask_app)
+_async_routes = quart_app.url_map.bind("localhost")
+
+
+def _is_async_route(scope) -> bool:
+    method = scope.get("method", "GET")
+    if method == "OPTIONS":
+        # Preflights stay with flask-cors so both paths answer them identically.
+        return False
+    try:
+        _async_routes.match(scope.get("path") or "/", method=method)
+    except HTTPException:
+        return False
+    return True
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await quart_app(scope, receive, send)
+    elif scope["type"] == "http" and _is_async_route(scope):
+        await quart_app(scope, receive, send)
+    else:
+        await _wsgi_app(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("app.asgi:app", host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,15 @@
+import datetime
+import os
+
+# Appointment dates and times are stored as local wall-clock text. Set
+# APP_TIMEZONE (e.g. Indian/Mauritius) when the server runs in another zone.
+APP_TIMEZONE = (os.getenv("APP_TIMEZONE") or "").strip()
+
+
+def local_now() -> datetime.datetime:
+    """Naive local wall-clock time, comparable with appointment dates and times."""
+    if APP_TIMEZONE:
+        from zoneinfo import ZoneInfo
+
+        return datetime.datetime.now(ZoneInfo(APP_TIMEZONE)).replace(tzinfo=None)
+    return datetime.datetime.now()
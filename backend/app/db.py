@@ -1,8 +1,80 @@
+import hashlib
 import os
+import re
+import threading
+import time
+from contextlib import nullcontext
 import psycopg
 from psycopg.rows import dict_row
 from pathlib import Path
 
+from app import instrumentation, slow_queries
+
+try:
+    from psycopg_pool import AsyncConnectionPool, ConnectionPool
+except ImportError:  # pragma: no cover - pooling is optional
+    AsyncConnectionPool = None
+    ConnectionPool = None
+
+
+# Appointment rows carry the doctor name and specialty copied at booking
+# time; listings take the current ones from doctor_public_profiles and fall
+# back to the copies for doctors that no longer exist.
+APPOINTMENT_COLUMNS = """
+    a.id, a.doctor_id, COALESCE(p.full_name, a.doctor) AS doctor,
+    COALESCE(p.specialty, a.specialty) AS specialty, a.date, a.time,
+    a.name, a.email, a.phone, a.status
+"""
+APPOINTMENTS_FROM = "appointments a LEFT JOIN doctor_public_profiles p ON p.doctor_id = a.doctor_id"
+# Sets the status of the appointments in an id array and returns them with
+# APPOINTMENT_COLUMNS, like the listings.
+UPDATE_APPOINTMENT_STATUS_SQL = f"""
+    WITH a AS (
+        UPDATE appointments SET status = %s WHERE id = ANY(%s) RETURNING *
+    )
+    SELECT {APPOINTMENT_COLUMNS}
+    FROM a LEFT JOIN doctor_public_profiles p ON p.doctor_id = a.doctor_id
+"""
+
+# Hot statements, executed as named server-side prepared statements so
+# Postgres parses and plans them once per pooled connection.
+QUERIES = {
+    "appointment_by_id": f"SELECT {APPOINTMENT_COLUMNS} FROM {APPOINTMENTS_FROM} WHERE a.id = %s",
+    "appointment_by_id_for_doctor": (
+        f"SELECT {APPOINTMENT_COLUMNS} FROM {APPOINTMENTS_FROM} WHERE a.id = %s AND a.doctor_id = %s LIMIT 1"
+    ),
+    "booked_slots": "SELECT time, status FROM appointments WHERE doctor_id = %s AND date = %s",
+    "slot_taken": """
+        SELECT 1
+        FROM appointments
+        WHERE doctor_id = %s AND date = %s AND time = %s
+          AND LOWER(COALESCE(status, '')) <> 'cancelled'
+        LIMIT 1
+    """,
+    "user_by_email": "SELECT * FROM users WHERE LOWER(email) = %s LIMIT 1",
+    "user_by_id": "SELECT * FROM users WHERE id = %s LIMIT 1",
+    "doctor_by_id": "SELECT * FROM doctors WHERE id = %s LIMIT 1",
+    "doctor_brief_by_id": "SELECT id, full_name, specialty, is_active FROM doctors WHERE id = %s LIMIT 1",
+    "doctor_card_by_id": "SELECT full_name, specialty, avatar_url FROM doctors WHERE id = %s LIMIT 1",
+    "doctor_public_profile": """
+        SELECT payload
+        FROM doctor_public_profiles
+        WHERE doctor_id = %s AND is_active = TRUE
+        LIMIT 1
+    """,
+    "session_by_key": """
+        SELECT s.user_id, s.data, u.role, u.email, u.patient_id, u.doctor_id
+        FROM user_sessions s
+        LEFT JOIN users u ON u.id = s.user_id
+        WHERE s.id = %s AND s.expires_at > NOW()
+    """,
+}
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_async_pool = None
+
 
 def _db_url():
     url = os.getenv("DATABASE_URL") or os.getenv("database_url")
@@ -11,43 +83,330 @@ def _db_url():
     return url.strip()
 
 
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def _prepare_enabled() -> bool:
+    # Disable behind PgBouncer in transaction pooling mode, where a prepared
+    # statement may not exist on the next server connection.
+    return _env_bool("DB_PREPARE_ENABLED", "true")
+
+
+class TimedCursor(psycopg.Cursor):
+    # Feeds per-request query count, rows and DB time to app.instrumentation,
+    # and statements over SLOW_QUERY_MS to app.slow_queries.
+    # In pipeline mode execute() returns before the server replies, so only
+    # the send is timed there.
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            instrumentation.record_query(elapsed, self.rowcount)
+            slow_queries.record(self.connection, query, params, elapsed, self.rowcount)
+
+    def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            instrumentation.record_query(elapsed, self.rowcount)
+            slow_queries.record(self.connection, query, None, elapsed, self.rowcount)
+
+
+class AsyncTimedCursor(psycopg.AsyncCursor):
+    async def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            instrumentation.record_query(elapsed, self.rowcount)
+            slow_queries.record(self.connection, query, params, elapsed, self.rowcount)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            instrumentation.record_query(elapsed, self.rowcount)
+            slow_queries.record(self.connection, query, None, elapsed, self.rowcount)
+
+
+def _connect_kwargs(cursor_factory=TimedCursor) -> dict:
+    kwargs = {"row_factory": dict_row, "cursor_factory": cursor_factory}
+    if not _prepare_enabled():
+        kwargs["prepare_threshold"] = None
+    return kwargs
+
+
+def _get_pool():
+    global _pool, _pool_pid
+    if ConnectionPool is None or not _env_bool("DB_POOL_ENABLED", "true"):
+        return None
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        # A pool inherited across fork() shares sockets with the parent;
+        # every gunicorn worker builds its own.
+        if _pool is None or _pool_pid != pid:
+            _pool = ConnectionPool(
+                _db_url(),
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                kwargs=_connect_kwargs(),
+                open=True,
+            )
+            _pool_pid = pid
+    return _pool
+
+
+def current_pool():
+    # The pool this worker already opened, without creating one.
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    return None
+
+
 def get_connection():
-    return psycopg.connect(_db_url(), row_factory=dict_row)
+    instrumentation.record_connection()
+    pool = _get_pool()
+    if pool is not None:
+        return pool.connection()
+    return psycopg.connect(_db_url(), **_connect_kwargs())
 
 
-def apply_migrations():
-    migrations_dir = Path(__file__).resolve().parents[1] / "migrations"
-    if not migrations_dir.exists():
-        raise RuntimeError(f"Migrations directory not found: {migrations_dir}")
+def execute_named(cur, name: str, params=None):
+    return cur.execute(QUERIES[name], params, prepare=_prepare_enabled())
 
+
+def fetch_one_named(name: str, params=None):
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS schema_migrations (
-                    version TEXT PRIMARY KEY,
-                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                );
-            """)
+            execute_named(cur, name, params)
+            return cur.fetchone()
+
+
+async def open_async_pool():
+    global _async_pool
+    if AsyncConnectionPool is None:
+        raise RuntimeError("psycopg_pool is required for the async server")
+    if _async_pool is None:
+        _async_pool = AsyncConnectionPool(
+            _db_url(),
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", "20")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            kwargs=_connect_kwargs(AsyncTimedCursor),
+            open=False,
+        )
+        await _async_pool.open()
+    return _async_pool
+
+
+async def close_async_pool():
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+
+def get_async_connection():
+    instrumentation.record_connection()
+    if _async_pool is None:
+        raise RuntimeError("Async connection pool is not open")
+    return _async_pool.connection()
+
 
-            cur.execute("SELECT version FROM schema_migrations;")
-            applied = {row.get("version") for row in cur.fetchall() or []}
+async def execute_named_async(cur, name: str, params=None):
+    return await cur.execute(QUERIES[name], params, prepare=_prepare_enabled())
+
+
+async def fetch_one_named_async(name: str, params=None):
+    async with get_async_connection() as conn:
+        async with conn.cursor() as cur:
+            await execute_named_async(cur, name, params)
+            return await cur.fetchone()
+
+
+def pipeline(conn):
+    # Batch several statements into one network round trip; falls back to
+    # plain sequential execution on libpq builds without pipeline support.
+    if psycopg.Pipeline.is_supported():
+        return conn.pipeline()
+    return nullcontext()
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+
+# Arbitrary app-wide key for pg_advisory_lock; only one migrator runs at a time.
+MIGRATION_LOCK_ID = 7_316_420_001
+
+# First line of a migration that must run outside a transaction, e.g.
+# CREATE INDEX CONCURRENTLY. Its statements run one by one in autocommit.
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+_DOLLAR_TAG = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$")
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+def _split_statements(sql_text: str) -> list:
+    # Splits on top-level semicolons only: quoted strings, quoted
+    # identifiers, dollar-quoted bodies and comments are kept intact.
+    statements = []
+    buf = []
+    i = 0
+    n = len(sql_text)
+    while i < n:
+        ch = sql_text[i]
+        nxt = sql_text[i + 1] if i + 1 < n else ""
+        if ch == "-" and nxt == "-":
+            end = sql_text.find("\n", i)
+            end = n if end == -1 else end
+            buf.append(sql_text[i:end])
+            i = end
+            continue
+        if ch == "/" and nxt == "*":
+            end = sql_text.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            buf.append(sql_text[i:end])
+            i = end
+            continue
+        if ch in ("'", '"'):
+            j = i + 1
+            while j < n:
+                if sql_text[j] == ch:
+                    if j + 1 < n and sql_text[j + 1] == ch:
+                        j += 2
+                        continue
+                    break
+                if ch == "'" and sql_text[j] == "\\" and i > 0 and sql_text[i - 1] in "eE":
+                    j += 2
+                    continue
+                j += 1
+            buf.append(sql_text[i:j + 1])
+            i = j + 1
+            continue
+        if ch == "$":
+            match = _DOLLAR_TAG.match(sql_text, i)
+            if match:
+                tag = match.group(0)
+                end = sql_text.find(tag, match.end())
+                end = n if end == -1 else end + len(tag)
+                buf.append(sql_text[i:end])
+                i = end
+                continue
+        if ch == ";":
+            statements.append("".join(buf))
+            buf = []
+            i += 1
+            continue
+        buf.append(ch)
+        i += 1
+    statements.append("".join(buf))
+    return [s.strip() for s in statements if _has_code(s)]
+
+
+def _has_code(statement: str) -> bool:
+    for line in statement.splitlines():
+        line = line.strip()
+        if line and not line.startswith("--"):
+            return True
+    return False
+
+
+def _ensure_migrations_table(conn):
+    with conn.transaction():
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+        conn.execute("ALTER TABLE schema_migrations ADD COLUMN IF NOT EXISTS checksum TEXT")
+        conn.execute("ALTER TABLE schema_migrations ADD COLUMN IF NOT EXISTS duration_ms INTEGER")
+
+
+def _apply_file(conn, version: str, sql_text: str, checksum: str):
+    started = time.perf_counter()
+    record = "INSERT INTO schema_migrations (version, checksum, duration_ms) VALUES (%s, %s, %s)"
+    if sql_text.lstrip().lower().startswith(NO_TRANSACTION_MARKER):
+        # Not atomic: make each statement idempotent (IF NOT EXISTS) so a
+        # failed run can simply be retried.
+        for statement in _split_statements(sql_text):
+            conn.execute(statement)
+        conn.execute(record, (version, checksum, int((time.perf_counter() - started) * 1000)))
+        return
+    with conn.transaction():
+        # Sent whole: the server parses it, so semicolons inside strings
+        # and function bodies are fine.
+        conn.execute(sql_text)
+        conn.execute(record, (version, checksum, int((time.perf_counter() - started) * 1000)))
+
+
+def _acquire_migration_lock(conn, poll_seconds: float = 1.0):
+    # Poll instead of blocking in pg_advisory_lock(): a session waiting inside
+    # that call holds an open transaction, which CREATE INDEX CONCURRENTLY in
+    # the lock holder would wait on, deadlocking the two.
+    while True:
+        row = conn.execute("SELECT pg_try_advisory_lock(%s) AS locked", (MIGRATION_LOCK_ID,)).fetchone()
+        if row["locked"]:
+            return
+        time.sleep(poll_seconds)
+
+
+def apply_migrations(migrations_dir: Path = None) -> list:
+    migrations_dir = Path(migrations_dir or MIGRATIONS_DIR)
+    if not migrations_dir.exists():
+        raise RuntimeError(f"Migrations directory not found: {migrations_dir}")
+
+    applied_now = []
+    # A dedicated autocommit connection: the advisory lock is session-scoped
+    # and CONCURRENTLY statements cannot run inside a transaction block.
+    with psycopg.connect(_db_url(), autocommit=True, row_factory=dict_row) as conn:
+        _acquire_migration_lock(conn)
+        try:
+            _ensure_migrations_table(conn)
+            rows = conn.execute("SELECT version, checksum FROM schema_migrations").fetchall()
+            applied = {row["version"]: row["checksum"] for row in rows}
 
             for path in sorted(migrations_dir.glob("*.sql")):
                 version = path.name
+                sql_text = path.read_text(encoding="utf-8")
+                checksum = hashlib.sha256(sql_text.encode("utf-8")).hexdigest()
+
                 if version in applied:
+                    recorded = applied[version]
+                    if recorded is None:
+                        # Applied by the old runner; adopt the current file.
+                        conn.execute(
+                            "UPDATE schema_migrations SET checksum = %s WHERE version = %s",
+                            (checksum, version),
+                        )
+                    elif recorded != checksum:
+                        raise MigrationError(
+                            f"{version} was changed after it was applied; add a new migration instead"
+                        )
                     continue
 
-                sql_text = path.read_text(encoding="utf-8")
-                statements = [s.strip() for s in sql_text.split(";") if s.strip()]
-                for statement in statements:
-                    cur.execute(statement)
-
-                cur.execute(
-                    "INSERT INTO schema_migrations (version) VALUES (%s);",
-                    (version,),
-                )
-        conn.commit()
+                try:
+                    _apply_file(conn, version, sql_text, checksum)
+                except psycopg.Error as e:
+                    raise MigrationError(f"{version} failed: {e}") from e
+                applied_now.append(version)
+        finally:
+            conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+    return applied_now
 
 
 def init_db():
-    apply_migrations()
+    return apply_migrations()
@@ -0,0 +1,294 @@
+import bisect
+import datetime
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from app import metrics
+from app.config import local_now
+from app.db import get_connection
+
+# Per-worker search index over doctor_public_profiles (migration 012). A
+# worker checks its version (migration 017) at most every DIRECTORY_INDEX_TTL
+# seconds and rebuilds when it changed; doctor writes made by this worker
+# invalidate it immediately.
+INDEX_TTL_SECONDS = float(os.getenv("DIRECTORY_INDEX_TTL", "30"))
+NEXT_AVAILABLE_TTL_SECONDS = float(os.getenv("DIRECTORY_NEXT_AVAILABLE_TTL", "60"))
+HORIZON_DAYS = 14
+SLOT_MINUTES = 60  # same grid as frontend/js/appointment.js
+FUZZY_MIN_SIMILARITY = 0.4
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+SORTS = ("name", "relevance", "next_available")
+
+DAY_ORDER = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+_WORD = re.compile(r"[^\W_]+")
+
+_lock = threading.Lock()
+_state = {"index": None, "version": None, "checked_at": 0.0, "next_available": None, "next_available_at": 0.0}
+
+
+def _fold(text) -> str:
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text) -> list:
+    return _WORD.findall(_fold(text))
+
+
+def _trigrams(token: str) -> set:
+    # Padded like pg_trgm, so short words and word starts still overlap.
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    # Optimal string alignment: Levenshtein plus adjacent transpositions,
+    # the commonest typo in typed names.
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _max_typos(term: str) -> int:
+    return 0 if len(term) < 4 else 1 if len(term) < 8 else 2
+
+
+class DirectoryIndex:
+    def __init__(self, payloads: list):
+        self.doctors = {p["id"]: p for p in payloads}
+        self.postings = {}
+        for p in payloads:
+            for token in set(tokenize(p.get("full_name")) + tokenize(p.get("specialty"))):
+                self.postings.setdefault(token, set()).add(p["id"])
+        self.tokens = sorted(self.postings)
+        self.trigram_tokens = {}
+        for token in self.tokens:
+            for gram in _trigrams(token):
+                self.trigram_tokens.setdefault(gram, set()).add(token)
+
+    def _match_term(self, term: str) -> dict:
+        scores = {}
+        # Prefix matches; an exact word scores higher than a longer one.
+        i = bisect.bisect_left(self.tokens, term)
+        while i < len(self.tokens) and self.tokens[i].startswith(term):
+            token = self.tokens[i]
+            score = 2.0 if token == term else 1.5
+            for doctor_id in self.postings[token]:
+                scores[doctor_id] = max(scores.get(doctor_id, 0.0), score)
+            i += 1
+        if len(term) < 3:
+            return scores
+        # Typos: words sharing a trigram with the term are candidates; keep
+        # those that are similar enough or within a small edit distance.
+        grams = _trigrams(term)
+        candidates = set()
+        for gram in grams:
+            candidates |= self.trigram_tokens.get(gram, set())
+        max_typos = _max_typos(term)
+        for token in candidates:
+            other = _trigrams(token)
+            similarity = len(grams & other) / len(grams | other)
+            if similarity < FUZZY_MIN_SIMILARITY:
+                if abs(len(token) - len(term)) > max_typos or _edit_distance(term, token) > max_typos:
+                    continue
+                similarity = FUZZY_MIN_SIMILARITY
+            for doctor_id in self.postings[token]:
+                scores[doctor_id] = max(scores.get(doctor_id, 0.0), similarity)
+        return scores
+
+    def match(self, query: str) -> dict:
+        terms = tokenize(query)
+        if not terms:
+            return {doctor_id: 0.0 for doctor_id in self.doctors}
+        result = None
+        for term in terms:
+            scores = self._match_term(term)
+            if result is None:
+                result = scores
+            else:
+                result = {k: v + scores[k] for k, v in result.items() if k in scores}
+            if not result:
+                break
+        return result or {}
+
+
+def _index_version():
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT version FROM doctor_directory_version")
+            row = cur.fetchone()
+    return row.get("version") if row else None
+
+
+def _load_index() -> DirectoryIndex:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT payload FROM doctor_public_profiles WHERE is_active = TRUE ORDER BY doctor_id ASC")
+            rows = cur.fetchall() or []
+    return DirectoryIndex([r["payload"] for r in rows])
+
+
+def current_index() -> DirectoryIndex:
+    now = time.monotonic()
+    with _lock:
+        index = _state["index"]
+        if index is not None and now - _state["checked_at"] < INDEX_TTL_SECONDS:
+            metrics.record_cache("doctor_directory", True)
+            return index
+
+    version = _index_version()
+    with _lock:
+        if _state["index"] is not None and _state["version"] == version:
+            _state["checked_at"] = now
+            metrics.record_cache("doctor_directory", True)
+            return _state["index"]
+    metrics.record_cache("doctor_directory", False)
+
+    index = _load_index()
+    with _lock:
+        _state.update(index=index, version=version, checked_at=now, next_available=None)
+    return index
+
+
+def invalidate():
+    with _lock:
+        _state["checked_at"] = 0.0
+        _state["next_available_at"] = 0.0
+
+
+def _minutes(value):
+    try:
+        hours, minutes = str(value or "").split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return None
+
+
+def _first_free_slot(doctor: dict, booked: set, now: datetime.datetime):
+    days = set(doctor.get("availability_days") or [])
+    start = _minutes(doctor.get("availability_start"))
+    end = _minutes(doctor.get("availability_end"))
+    if not days or start is None or end is None:
+        return None
+    today = now.date()
+    now_minutes = now.hour * 60 + now.minute
+    for offset in range(HORIZON_DAYS):
+        day = today + datetime.timedelta(days=offset)
+        if DAY_ORDER[day.weekday()] not in days:
+            continue
+        date_str = day.isoformat()
+        for slot in range(start, end - SLOT_MINUTES + 1, SLOT_MINUTES):
+            if offset == 0 and slot <= now_minutes:
+                continue
+            time_str = f"{slot // 60:02d}:{slot % 60:02d}"
+            if (doctor["id"], date_str, time_str) not in booked:
+                return f"{date_str}T{time_str}"
+    return None
+
+
+def _next_available(index: DirectoryIndex) -> dict:
+    with _lock:
+        cached = _state["next_available"]
+        if cached is not None and time.monotonic() - _state["next_available_at"] < NEXT_AVAILABLE_TTL_SECONDS:
+            return cached
+
+    now = local_now()
+    last_day = now.date() + datetime.timedelta(days=HORIZON_DAYS - 1)
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT doctor_id, date, time
+                FROM appointments
+                WHERE doctor_id = ANY(%s) AND date >= %s AND date <= %s
+                  AND LOWER(COALESCE(status, '')) <> 'cancelled'
+                """,
+                (list(index.doctors), now.date().isoformat(), last_day.isoformat()),
+            )
+            rows = cur.fetchall() or []
+    booked = {(r["doctor_id"], r["date"], str(r["time"]).strip()[:5]) for r in rows}
+    result = {doctor_id: _first_free_slot(d, booked, now) for doctor_id, d in index.doctors.items()}
+
+    with _lock:
+        if _state["index"] is index:
+            _state["next_available"] = result
+            _state["next_available_at"] = time.monotonic()
+    return result
+
+
+def search(query: str = "", specialty: str = "", day: str = "", sort: str = "", page: int = 1,
+           limit: int = DEFAULT_PAGE_SIZE, include_next_available: bool = False) -> dict:
+    index = current_index()
+    scores = index.match(query)
+    specialty_key = (specialty or "").strip().lower()
+
+    def has_specialty(doctor):
+        return not specialty_key or (doctor.get("specialty") or "").strip().lower() == specialty_key
+
+    def has_day(doctor):
+        return not day or day in (doctor.get("availability_days") or [])
+
+    # Each facet is counted with every other filter applied but not its
+    # own, so the counts show what picking that value would return.
+    specialties = {}
+    days = {d: 0 for d in DAY_ORDER}
+    matched = []
+    for doctor_id in scores:
+        doctor = index.doctors[doctor_id]
+        in_specialty = has_specialty(doctor)
+        in_day = has_day(doctor)
+        if in_day:
+            label = (doctor.get("specialty") or "").strip()
+            facet = specialties.setdefault(label.lower(), {"value": label.lower(), "label": label, "count": 0})
+            facet["count"] += 1
+        if in_specialty:
+            for d in doctor.get("availability_days") or []:
+                if d in days:
+                    days[d] += 1
+        if in_specialty and in_day:
+            matched.append(doctor)
+
+    sort = sort or ("relevance" if tokenize(query) else "name")
+    # Scanning appointments is the costly part of a search, so it only runs
+    # when the results are sorted by it or the caller asks for the field.
+    with_next_available = include_next_available or sort == "next_available"
+    next_available = _next_available(index) if with_next_available else {}
+
+    def by_name(doctor):
+        return ((doctor.get("full_name") or "").lower(), doctor["id"])
+
+    if sort == "relevance":
+        matched.sort(key=lambda d: (-scores[d["id"]],) + by_name(d))
+    elif sort == "next_available":
+        # Doctors with no free slot inside the horizon go last.
+        matched.sort(key=lambda d: (next_available.get(d["id"]) or "\uffff",) + by_name(d))
+    else:
+        matched.sort(key=by_name)
+
+    offset = (page - 1) * limit
+    page_items = matched[offset:offset + limit]
+    return {
+        "count": len(matched),
+        "page": page,
+        "limit": limit,
+        "has_more": offset + limit < len(matched),
+        "sort": sort,
+        "items": [
+            {**d, "next_available": next_available.get(d["id"])} if with_next_available else d for d in page_items
+        ],
+        "facets": {
+            "specialty": sorted(specialties.values(), key=lambda f: f["label"].lower()),
+            "day": [{"value": d, "count": days[d]} for d in DAY_ORDER],
+        },
+    }
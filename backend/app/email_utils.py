@@ -2,6 +2,8 @@ import os
 import smtplib
 from email.message import EmailMessage
 
+from app.instrumentation import timed
+
 try:
     from flask import current_app
 except Exception:  # pragma: no cover - used only when flask context is absent
@@ -29,19 +31,20 @@ def send_email(to_address: str, subject: str, body: str) -> bool:
     msg.set_content(body or "")
 
     try:
-        if use_ssl:
-            server = smtplib.SMTP_SSL(host, port, timeout=10)
-        else:
-            server = smtplib.SMTP(host, port, timeout=10)
-
-        with server:
-            server.ehlo()
-            if use_tls and not use_ssl:
-                server.starttls()
+        with timed("email"):
+            if use_ssl:
+                server = smtplib.SMTP_SSL(host, port, timeout=10)
+            else:
+                server = smtplib.SMTP(host, port, timeout=10)
+
+            with server:
                 server.ehlo()
-            if username and password:
-                server.login(username, password)
-            server.send_message(msg)
+                if use_tls and not use_ssl:
+                    server.starttls()
+                    server.ehlo()
+                if username and password:
+                    server.login(username, password)
+                server.send_message(msg)
         return True
     except Exception as exc:
         _log_exception("Email send failed", exc)
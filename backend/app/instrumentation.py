@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app import metrics
+
+# Per-request counters. A ContextVar rather than flask.g so the psycopg
+# cursor hook and the SMS/email helpers can record without an app context,
+# and so each asyncio task in the ASGI app gets its own copy.
+_current = ContextVar("request_stats", default=None)
+
+logger = logging.getLogger("medconnect.request")
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+class RequestStats:
+    __slots__ = ("started", "db_seconds", "queries", "rows", "connections", "external")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.connections = 0
+        self.external = {}
+
+    def wall_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def begin():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end(token):
+    _current.reset(token)
+
+
+def record_query(seconds: float, rows: int = 0):
+    stats = _current.get()
+    if stats is not None:
+        stats.db_seconds += seconds
+        stats.queries += 1
+        if rows and rows > 0:
+            stats.rows += rows
+
+
+def record_connection():
+    stats = _current.get()
+    if stats is not None:
+        stats.connections += 1
+
+
+@contextmanager
+def timed(kind: str):
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        seconds = time.perf_counter() - started
+        metrics.observe_external(kind, seconds, ok)
+        stats = _current.get()
+        if stats is not None:
+            stats.external[kind] = stats.external.get(kind, 0.0) + seconds
+
+
+def server_timing(stats: RequestStats) -> str:
+    parts = [
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+    ]
+    for kind, seconds in sorted(stats.external.items()):
+        parts.append(f"{kind};dur={seconds * 1000:.1f}")
+    parts.append(f"total;dur={stats.wall_seconds() * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def log_request(stats: RequestStats, method: str, path: str, endpoint: str, status: int):
+    entry = {
+        "method": method,
+        "path": path,
+        "endpoint": endpoint,
+        "status": status,
+        "wall_ms": round(stats.wall_seconds() * 1000, 2),
+        "db_ms": round(stats.db_seconds * 1000, 2),
+        "queries": stats.queries,
+        "rows": stats.rows,
+        "connections": stats.connections,
+    }
+    for kind, seconds in stats.external.items():
+        entry[f"{kind}_ms"] = round(seconds * 1000, 2)
+
+    query_warn = int(os.getenv("REQUEST_QUERY_WARN", "25"))
+    # Many queries or several pool checkouts in one request usually means an
+    # N+1 loop or a handler that should share one connection.
+    if stats.queries > query_warn or stats.connections > 2:
+        logger.warning(json.dumps(entry, default=str))
+    else:
+        logger.info(json.dumps(entry, default=str))
+
+
+def _configure_logger():
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def configure():
+    header_enabled = _env_bool("SERVER_TIMING_ENABLED", "true")
+    log_enabled = _env_bool("REQUEST_LOG_ENABLED", "true")
+    if log_enabled:
+        _configure_logger()
+    return header_enabled, log_enabled
+
+
+def init_app(app):
+    from flask import g, request
+
+    from app.db import current_pool
+
+    header_enabled, log_enabled = configure()
+
+    @app.before_request
+    def _start_request_stats():
+        g._request_stats, g._request_stats_token = begin()
+
+    @app.after_request
+    def _finish_request_stats(response):
+        stats = g.pop("_request_stats", None)
+        token = g.pop("_request_stats_token", None)
+        if stats is None:
+            return response
+        if header_enabled:
+            response.headers["Server-Timing"] = server_timing(stats)
+        if log_enabled:
+            log_request(stats, request.method, request.path, request.endpoint, response.status_code)
+        metrics.observe_request(
+            request.blueprint, request.endpoint, request.method, response.status_code,
+            stats.wall_seconds(), stats.db_seconds,
+        )
+        metrics.observe_pool(current_pool())
+        if token is not None:
+            end(token)
+        return response
@@ -0,0 +1,173 @@
+import hmac
+import logging
+import os
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+except ImportError:  # pragma: no cover - metrics are optional
+    Counter = None
+
+# With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) prometheus_client
+# keeps every value in per-process mmap'd files, and a scrape of any worker
+# aggregates all of them.
+ENABLED = Counter is not None
+
+logger = logging.getLogger("medconnect.metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+if ENABLED:
+    REQUEST_LATENCY = Histogram(
+        "medconnect_http_request_duration_seconds",
+        "Request wall time",
+        ["blueprint", "endpoint", "method"],
+        buckets=LATENCY_BUCKETS,
+    )
+    REQUESTS = Counter(
+        "medconnect_http_requests_total",
+        "Requests by response status",
+        ["blueprint", "endpoint", "method", "status"],
+    )
+    REQUEST_DB_SECONDS = Histogram(
+        "medconnect_http_request_db_seconds",
+        "Time spent in database calls per request",
+        ["blueprint", "endpoint"],
+        buckets=LATENCY_BUCKETS,
+    )
+    POOL_SIZE = Gauge("medconnect_db_pool_size", "Open pooled connections", multiprocess_mode="livesum")
+    POOL_AVAILABLE = Gauge("medconnect_db_pool_available", "Idle pooled connections", multiprocess_mode="livesum")
+    POOL_WAITING = Gauge(
+        "medconnect_db_pool_requests_waiting", "Requests queued for a connection", multiprocess_mode="livesum"
+    )
+    POOL_WAIT_SECONDS = Counter("medconnect_db_pool_wait_seconds_total", "Time spent waiting for a connection")
+    POOL_CHECKOUTS = Counter("medconnect_db_pool_checkouts_total", "Connections handed out by the pool")
+    POOL_TIMEOUTS = Counter("medconnect_db_pool_timeouts_total", "Pool checkouts that failed or timed out")
+    EXTERNAL_LATENCY = Histogram(
+        "medconnect_external_call_duration_seconds",
+        "Outbound provider call time",
+        ["kind"],
+        buckets=LATENCY_BUCKETS,
+    )
+    EXTERNAL_FAILURES = Counter("medconnect_external_call_failures_total", "Failed outbound provider calls", ["kind"])
+    STORAGE_BYTES = Counter("medconnect_storage_bytes_total", "Bytes moved by upload storage", ["op"])
+    STORAGE_OPS = Counter("medconnect_storage_operations_total", "Upload storage operations", ["op", "outcome"])
+    CACHE_REQUESTS = Counter("medconnect_cache_requests_total", "In-process cache lookups", ["cache", "result"])
+    RATE_LIMITED = Counter("medconnect_rate_limited_total", "Requests rejected by a rate limit", ["limit"])
+    NOTIFY_QUEUE_DEPTH = Gauge(
+        "medconnect_notify_queue_depth", "Queued SMS not sent yet", multiprocess_mode="mostrecent"
+    )
+    PASSWORD_HASH_SECONDS = Histogram(
+        "medconnect_password_hash_seconds",
+        "Password hashing time, including the wait for a hashing thread",
+        ["op"],
+        buckets=LATENCY_BUCKETS,
+    )
+
+
+def observe_request(blueprint, endpoint, method: str, status: int, seconds: float, db_seconds: float):
+    if not ENABLED:
+        return
+    blueprint = blueprint or ""
+    endpoint = endpoint or "unmatched"
+    REQUEST_LATENCY.labels(blueprint, endpoint, method).observe(seconds)
+    REQUESTS.labels(blueprint, endpoint, method, str(status)).inc()
+    REQUEST_DB_SECONDS.labels(blueprint, endpoint).observe(db_seconds)
+
+
+def observe_external(kind: str, seconds: float, ok: bool):
+    if not ENABLED:
+        return
+    EXTERNAL_LATENCY.labels(kind).observe(seconds)
+    if not ok:
+        EXTERNAL_FAILURES.labels(kind).inc()
+
+
+def observe_storage(op: str, nbytes: int, ok: bool):
+    if not ENABLED:
+        return
+    STORAGE_OPS.labels(op, "ok" if ok else "error").inc()
+    if nbytes:
+        STORAGE_BYTES.labels(op).inc(nbytes)
+
+
+def record_cache(cache: str, hit: bool):
+    if ENABLED:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_rate_limited(limit: str):
+    if ENABLED:
+        RATE_LIMITED.labels(limit).inc()
+
+
+def observe_password_hash(op: str, seconds: float):
+    if ENABLED:
+        PASSWORD_HASH_SECONDS.labels(op).observe(seconds)
+
+
+def observe_notify_queue(depth: int):
+    if ENABLED:
+        NOTIFY_QUEUE_DEPTH.set(depth)
+
+
+def observe_pool(pool):
+    if not ENABLED or pool is None:
+        return
+    # pop_stats() returns counters accumulated since the previous call, so
+    # each worker adds only its own deltas to the shared counters.
+    stats = pool.pop_stats()
+    POOL_SIZE.set(stats.get("pool_size", 0))
+    POOL_AVAILABLE.set(stats.get("pool_available", 0))
+    POOL_WAITING.set(stats.get("requests_waiting", 0))
+    if stats.get("requests_wait_ms"):
+        POOL_WAIT_SECONDS.inc(stats["requests_wait_ms"] / 1000.0)
+    if stats.get("requests_num"):
+        POOL_CHECKOUTS.inc(stats["requests_num"])
+    if stats.get("requests_errors"):
+        POOL_TIMEOUTS.inc(stats["requests_errors"])
+
+
+def render():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        from prometheus_client import REGISTRY as registry
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def init_app(app):
+    from flask import Response, request
+
+    from app import notifications
+    from app.db import current_pool
+    from app.routes.utils import error_response
+
+    @app.get("/metrics")
+    def metrics():
+        if not ENABLED:
+            return error_response(503, "metrics_unavailable", "prometheus_client is not installed")
+        # Route names, pool and queue sizes are internal: scrapes need the
+        # token unless METRICS_PUBLIC opts out, e.g. on a private listener.
+        token = os.getenv("METRICS_TOKEN") or ""
+        if token:
+            supplied = (request.headers.get("Authorization") or "").removeprefix("Bearer ").strip()
+            if not hmac.compare_digest(supplied, token):
+                return error_response(401, "unauthorized", "Unauthorized")
+        elif (os.getenv("METRICS_PUBLIC") or "").strip().lower() not in ("1", "true", "yes"):
+            return error_response(403, "forbidden", "Set METRICS_TOKEN to enable /metrics")
+        observe_pool(current_pool())
+        try:
+            observe_notify_queue(notifications.queued_count())
+        except Exception:
+            logger.exception("Could not count queued SMS")
+        body, content_type = render()
+        return Response(body, status=200, content_type=content_type)
@@ -0,0 +1,18 @@
+import sys
+from app.db import apply_migrations
+
+
+def main():
+    try:
+        applied = apply_migrations()
+    except Exception as e:
+        print(f"Migration failed: {e}", file=sys.stderr)
+        return 1
+    for version in applied:
+        print(f"Applied {version}")
+    print(f"Migrations up to date ({len(applied)} applied)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db import get_connection
+
+# Outgoing patient SMS are rows in doctor_notify_logs with error='queued',
+# inserted in the same transaction as the change that causes them, so a
+# request never reports an SMS that a crash can lose. The sender
+# (python -m app.reminders) claims queued rows, sends them at the provider's
+# rate and records the result on the same row. A claim is a lease: rows a
+# dead sender claimed are sent again after CLAIM_SECONDS, unless their
+# send_before has passed (a reminder for an appointment that has started),
+# in which case they are marked 'expired'.
+CHANNEL = "notify_queue"
+CLAIM_SECONDS = int(os.getenv("NOTIFY_CLAIM_SECONDS", "600"))
+SEND_BATCH = 200
+
+logger = logging.getLogger("medconnect.notifications")
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def queue_sms(cur, jobs: list) -> int:
+    """
+    Queue SMS jobs ({"phone", "text", "appointment_id", "doctor_id",
+    "template_key", optional "send_within" seconds}) on the caller's cursor;
+    they are sent once its transaction commits. A reminder that is already
+    queued or sent for the appointment is skipped. Returns how many were queued.
+    """
+    if not jobs:
+        return 0
+    cur.executemany(
+        """
+        INSERT INTO doctor_notify_logs
+            (appointment_id, doctor_id, template_key, sent, error, phone, body, send_before)
+        VALUES (%s, %s, %s, FALSE, 'queued', %s, %s, NOW() + make_interval(secs => %s))
+        ON CONFLICT (appointment_id, template_key) WHERE template_key LIKE 'reminder\\_%%' DO NOTHING
+        """,
+        [
+            (
+                job["appointment_id"],
+                job["doctor_id"],
+                job.get("template_key") or "sms",
+                str(job.get("phone") or "").strip(),
+                job["text"],
+                job.get("send_within"),
+            )
+            for job in jobs
+        ],
+    )
+    queued = cur.rowcount
+    # Wakes a waiting sender at commit; it also polls, so this is only latency.
+    cur.execute("SELECT pg_notify(%s, '')", (CHANNEL,))
+    return queued
+
+
+def queued_count() -> int:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) AS n FROM doctor_notify_logs WHERE error = 'queued' AND body IS NOT NULL")
+            return cur.fetchone()["n"]
+
+
+def claim_queued(limit: int) -> list:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE doctor_notify_logs SET error = 'expired'
+                WHERE error = 'queued' AND send_before <= NOW()
+                """
+            )
+            if cur.rowcount:
+                logger.warning("%d queued SMS expired before they could be sent", cur.rowcount)
+            cur.execute(
+                """
+                UPDATE doctor_notify_logs SET claimed_at = NOW()
+                WHERE id IN (
+                    SELECT id FROM doctor_notify_logs
+                    WHERE error = 'queued' AND body IS NOT NULL
+                      AND (claimed_at IS NULL OR claimed_at < NOW() - make_interval(secs => %s))
+                    ORDER BY id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, phone, body
+                """,
+                (CLAIM_SECONDS, limit),
+            )
+            rows = cur.fetchall() or []
+        conn.commit()
+    return sorted(rows, key=lambda r: r["id"])
+
+
+def _record(results: list):
+    if not results:
+        return
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.executemany("UPDATE doctor_notify_logs SET sent = %s, error = %s WHERE id = %s", results)
+        conn.commit()
+
+
+def send_queued(limiter: RateLimiter, workers: int) -> dict:
+    """Sends queued SMS until none are left, `limiter` paced."""
+    from sms import send_sms
+
+    def send(row):
+        if not row.get("phone"):
+            return False, "Missing patient phone", row["id"]
+        limiter.wait()
+        try:
+            result = send_sms(row["phone"], row["body"])
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        ok = bool(result.get("ok"))
+        return ok, None if ok else result.get("error") or "send failed", row["id"]
+
+    # A batch must be sent well inside the lease, or another pass resends it.
+    batch = SEND_BATCH
+    if limiter.interval:
+        batch = max(1, min(SEND_BATCH, int(CLAIM_SECONDS / limiter.interval / 2)))
+
+    totals = {"sent": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sms") as pool:
+        while True:
+            rows = claim_queued(batch)
+            if not rows:
+                break
+            results = list(pool.map(send, rows))
+            _record(results)
+            sent = sum(1 for ok, _, _ in results if ok)
+            totals["sent"] += sent
+            totals["failed"] += len(results) - sent
+    if totals["failed"]:
+        logger.warning("%d queued SMS failed", totals["failed"])
+    return totals
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from app import metrics
+from app.db import get_connection
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # pragma: no cover - argon2 is optional
+    PasswordHasher = None
+
+# Method for new hashes:
+#   scrypt:N:r:p              werkzeug (default scrypt:32768:8:1)
+#   pbkdf2:sha256:iterations  werkzeug
+#   argon2:time:memory_kib:parallelism  needs argon2-cffi
+# Existing hashes keep verifying with whatever method made them and are
+# rehashed with this one on the next successful login.
+HASH_METHOD = (os.getenv("PASSWORD_HASH_METHOD") or "scrypt:32768:8:1").strip()
+# Hashing is CPU-bound and releases the GIL, so at most this many run at
+# once per worker and request threads waiting on I/O keep a core.
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+logger = logging.getLogger("medconnect.passwords")
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ThreadPoolExecutor(max_workers=max(1, HASH_WORKERS), thread_name_prefix="password")
+                _pool_pid = pid
+    return _pool
+
+
+def _run(op: str, fn, *args):
+    start = time.perf_counter()
+    try:
+        return _executor().submit(fn, *args).result()
+    finally:
+        metrics.observe_password_hash(op, time.perf_counter() - start)
+
+
+def _argon2_hasher():
+    if PasswordHasher is None:
+        raise RuntimeError("PASSWORD_HASH_METHOD=argon2 needs the argon2-cffi package")
+    params = [int(p) for p in HASH_METHOD.split(":")[1:]]
+    names = ("time_cost", "memory_cost", "parallelism")
+    return PasswordHasher(**dict(zip(names, params)))
+
+
+def _uses_argon2() -> bool:
+    return HASH_METHOD.split(":", 1)[0] == "argon2"
+
+
+def _hash(password: str) -> str:
+    if _uses_argon2():
+        return _argon2_hasher().hash(password)
+    return generate_password_hash(password, method=HASH_METHOD)
+
+
+def _verify(stored_hash: str, password: str) -> bool:
+    if stored_hash.startswith("$argon2"):
+        if PasswordHasher is None:
+            logger.warning("Cannot verify an argon2 hash without the argon2-cffi package")
+            return False
+        try:
+            return PasswordHasher().verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(stored_hash, password)
+
+
+def hash_password(password: str) -> str:
+    return _run("hash", _hash, password)
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    if not stored_hash:
+        return False
+    return _run("verify", _verify, stored_hash, password)
+
+
+def _werkzeug_prefix(method: str) -> str:
+    # The "method$" part werkzeug writes for this setting, with the defaults
+    # it fills in ("scrypt" is "scrypt:32768:8:1"), worked out without hashing.
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = args or (2**15, 8, 1)
+        return f"scrypt:{int(n)}:{int(r)}:{int(p)}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+WERKZEUG_PREFIX = _werkzeug_prefix(HASH_METHOD)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    if _uses_argon2():
+        return not stored_hash.startswith("$argon2") or _argon2_hasher().check_needs_rehash(stored_hash)
+    if stored_hash.startswith("$argon2"):
+        return True
+    return stored_hash.split("$", 1)[0] != WERKZEUG_PREFIX
+
+
+def _rehash(user_id: int, old_hash: str, password: str):
+    start = time.perf_counter()
+    try:
+        new_hash = _hash(password)
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                # Skip it if the password changed meanwhile.
+                cur.execute(
+                    "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+                    (new_hash, user_id, old_hash),
+                )
+            conn.commit()
+    except Exception:
+        logger.exception("Could not rehash the password of user %s", user_id)
+    finally:
+        metrics.observe_password_hash("rehash", time.perf_counter() - start)
+
+
+def upgrade_in_background(user_id: int, old_hash: str, password: str):
+    """Rehash with HASH_METHOD after the response, on the hashing pool."""
+    _executor().submit(_rehash, user_id, old_hash, password)
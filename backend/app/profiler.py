@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# The request that samples blocks its worker thread for the whole window,
+# so keep this well under gunicorn's --timeout (30 s by default).
+MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "10"))
+MIN_INTERVAL = 0.001
+MAX_DEPTH = 128
+
+# Leaf frames of threads parked waiting for work (pool workers, gunicorn's
+# select loop); dropped from whole-process samples unless asked for.
+IDLE_LEAVES = (
+    "threading:Condition.wait",
+    "threading:Event.wait",
+    "selectors:",
+    "socket:socket.accept",
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _stack(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class Sampler:
+    """
+    Samples Python stacks of live threads from a background thread via
+    sys._current_frames(). Output is collapsed-stack text ("a;b;c 12" per
+    line), which flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: int = None, include_idle: bool = True,
+                 exclude_thread_id: int = None):
+        self.interval = max(MIN_INTERVAL, interval)
+        self.thread_id = thread_id
+        self.exclude_thread_id = exclude_thread_id
+        self.include_idle = include_idle
+        self.samples = 0
+        self._counts = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self._counts[_stack(frame)] += 1
+            else:
+                for ident, frame in frames.items():
+                    if ident in (own, self.exclude_thread_id):
+                        continue
+                    if not self.include_idle and _frame_label(frame).startswith(IDLE_LEAVES):
+                        continue
+                    self._counts[_stack(frame)] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self._counts.most_common()) + "\n"
+
+
+def sample_process(seconds: float, interval: float, include_idle: bool = False) -> Sampler:
+    # The calling thread only sleeps here; leave it out of the profile.
+    sampler = Sampler(interval=interval, include_idle=include_idle, exclude_thread_id=threading.get_ident()).start()
+    time.sleep(min(max(seconds, 0.0), MAX_SECONDS))
+    return sampler.stop()
+
+
+def init_app(app):
+    from flask import Response, g, request, session
+
+    @app.before_request
+    def _start_request_profile():
+        if request.args.get("__profile") != "1":
+            return
+        if (session.get("role") or "").strip().lower() != "admin":
+            return
+        g._profiler = Sampler(interval=0.001, thread_id=threading.get_ident()).start()
+
+    @app.after_request
+    def _finish_request_profile(response):
+        sampler = g.pop("_profiler", None)
+        if sampler is None:
+            return response
+        if response.is_streamed and not response.direct_passthrough:
+            # Run generator bodies (CSV/ZIP exports) inside the sampling window.
+            response.get_data()
+        sampler.stop()
+        # The profile replaces the body; the handler's own status is kept in
+        # a header so the caller can still tell what happened.
+        profiled = Response(sampler.collapsed(), status=200, mimetype="text/plain")
+        profiled.headers["X-Profiled-Status"] = str(response.status_code)
+        profiled.headers["X-Profile-Samples"] = str(sampler.samples)
+        return profiled
@@ -0,0 +1,256 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app import metrics
+from app.db import get_connection
+
+# Token buckets keyed by limit, key kind and value, e.g. "login:email:a@b.c".
+# Every check is decided from this worker's memory. With
+# RATE_LIMIT_BACKEND=postgres a background thread also merges each
+# worker's consumption into rate_limit_buckets every RATE_LIMIT_SYNC_SECONDS
+# and pulls the shared balance back. Limits then hold across workers and
+# instances, loosely: a worker can admit up to one full bucket for a key
+# before its first sync of that key.
+
+# (capacity, seconds to refill it from empty)
+LIMITS = {
+    "login": {"ip": (20, 60), "email": (5, 300)},
+    "register": {"ip": (5, 3600)},
+    "forgot_password": {"ip": (5, 900), "email": (3, 3600)},
+    "contact": {"ip": (5, 600)},
+    "quote_request": {"ip": (5, 600)},
+}
+# Buckets that check() only requires a token in; record_failure() spends
+# it. Successful logins then never use up a user's email bucket.
+FAILURE_ONLY = {"login": {"email"}}
+
+MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+SYNC_SECONDS = float(os.getenv("RATE_LIMIT_SYNC_SECONDS", "1"))
+PURGE_SECONDS = 600
+
+logger = logging.getLogger("medconnect.rate_limit")
+
+
+def enabled() -> bool:
+    return os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def backend() -> str:
+    return (os.getenv("RATE_LIMIT_BACKEND") or "memory").strip().lower()
+
+
+class MemoryStore:
+    def __init__(self, max_keys: int = MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> [tokens, updated_at, capacity, refill_per_second]
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: str, capacity: float, rate: float, now: float):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [capacity, now, capacity, rate]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
+
+    def take(self, specs: list, required: list = (), now: float = None):
+        """
+        Takes one token from every (key, capacity, refill_per_second) bucket
+        in `specs`, or from none of them; `required` buckets must hold a
+        token but are not charged. Returns (allowed, retry_after_seconds).
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            buckets = [self._bucket(key, capacity, rate, now) for key, capacity, rate in specs]
+            held = [self._bucket(key, capacity, rate, now) for key, capacity, rate in required]
+            short = [(1.0 - b[0]) / b[3] for b in buckets + held if b[0] < 1.0]
+            if short:
+                return False, max(1, math.ceil(max(short)))
+            for b in buckets:
+                b[0] -= 1.0
+            self._taken(specs)
+            return True, 0
+
+    def charge(self, specs: list, now: float = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for key, capacity, rate in specs:
+                bucket = self._bucket(key, capacity, rate, now)
+                bucket[0] = max(0.0, bucket[0] - 1.0)
+            self._taken(specs)
+
+    def _taken(self, specs: list):
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class PostgresStore(MemoryStore):
+    def __init__(self, max_keys: int = MAX_KEYS):
+        super().__init__(max_keys)
+        # key -> tokens used since the last sync
+        self._pending = {}
+        self._thread = None
+        self._pid = None
+        self._last_purge = 0.0
+
+    def _taken(self, specs: list):
+        for key, _, _ in specs:
+            self._pending[key] = self._pending.get(key, 0) + 1
+
+    def take(self, specs: list, required: list = (), now: float = None):
+        self._ensure_thread()
+        return super().take(specs, required, now)
+
+    def charge(self, specs: list, now: float = None):
+        self._ensure_thread()
+        super().charge(specs, now)
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name="rate-limit-sync", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(SYNC_SECONDS)
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("rate limit sync failed")
+
+    def sync(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            rows = []
+            for key, used in pending.items():
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    rows.append((key, used, bucket[2], bucket[3]))
+        if not rows:
+            return
+
+        keys, used, capacities, rates = (list(col) for col in zip(*rows))
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                # Refill the shared bucket for the time since its last write,
+                # then subtract what this worker used.
+                cur.execute(
+                    """
+                    INSERT INTO rate_limit_buckets AS b (key, tokens, capacity, refill_per_second, updated_at)
+                    SELECT k, cap - u, cap, r, NOW()
+                    FROM unnest(%s::text[], %s::float8[], %s::float8[], %s::float8[]) AS t(k, u, cap, r)
+                    ON CONFLICT (key) DO UPDATE SET
+                        tokens = GREATEST(
+                            -EXCLUDED.capacity,
+                            LEAST(
+                                EXCLUDED.capacity,
+                                b.tokens + EXTRACT(EPOCH FROM (NOW() - b.updated_at)) * EXCLUDED.refill_per_second
+                            ) - (EXCLUDED.capacity - EXCLUDED.tokens)
+                        ),
+                        capacity = EXCLUDED.capacity,
+                        refill_per_second = EXCLUDED.refill_per_second,
+                        updated_at = NOW()
+                    RETURNING key, tokens
+                    """,
+                    (keys, used, capacities, rates),
+                )
+                shared = {r["key"]: r["tokens"] for r in cur.fetchall() or []}
+                if time.monotonic() - self._last_purge > PURGE_SECONDS:
+                    self._last_purge = time.monotonic()
+                    cur.execute("DELETE FROM rate_limit_buckets WHERE updated_at < NOW() - INTERVAL '1 day'")
+            conn.commit()
+
+        now = time.monotonic()
+        with self._lock:
+            for key, tokens in shared.items():
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                bucket[0] = min(bucket[2], bucket[0] + (now - bucket[1]) * bucket[3])
+                bucket[1] = now
+                # Tokens taken here while the sync was in flight are not in
+                # the shared balance yet.
+                bucket[0] = min(bucket[0], tokens - self._pending.get(key, 0))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> MemoryStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PostgresStore() if backend() == "postgres" else MemoryStore()
+    return _store
+
+
+def client_ip() -> str:
+    from flask import request
+
+    # X-Forwarded-For is only trusted through ProxyFix (TRUSTED_PROXY_HOPS in
+    # create_app); otherwise any client could pick its own bucket.
+    return request.remote_addr or "unknown"
+
+
+def _specs(name: str, values: dict) -> list:
+    specs = []
+    for kind, (capacity, period) in LIMITS[name].items():
+        value = values.get(kind)
+        if value:
+            specs.append((kind, (f"{name}:{kind}:{value}", float(capacity), capacity / period)))
+    return specs
+
+
+def check(name: str, **values):
+    """
+    Returns None when the request may proceed, otherwise a 429 response.
+    `values` maps key kinds from LIMITS[name] to their value for this
+    request; `ip` defaults to the client address.
+    """
+    if not enabled():
+        return None
+    from app.routes.utils import error_response
+
+    values.setdefault("ip", client_ip())
+    failure_only = FAILURE_ONLY.get(name, set())
+    specs = _specs(name, values)
+    allowed, retry_after = get_store().take(
+        [spec for kind, spec in specs if kind not in failure_only],
+        [spec for kind, spec in specs if kind in failure_only],
+    )
+    if allowed:
+        return None
+
+    metrics.record_rate_limited(name)
+    body, status = error_response(429, "rate_limited", "Too many requests. Please try again later.")
+    return body, status, {"Retry-After": str(retry_after)}
+
+
+def record_failure(name: str, **values):
+    """Spends a token from the FAILURE_ONLY buckets of `name`."""
+    if not enabled():
+        return
+    failure_only = FAILURE_ONLY.get(name, set())
+    specs = [spec for kind, spec in _specs(name, values) if kind in failure_only]
+    if specs:
+        get_store().charge(specs)
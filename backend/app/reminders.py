@@ -0,0 +1,205 @@
+"""
+Appointment reminder scheduler.
+
+Every --interval seconds, finds booked or confirmed appointments that start
+inside each reminder window (24 h and 2 h ahead by default) and have not
+been reminded for that window yet. It claims them in doctor_notify_logs and
+sends the SMS from a small thread pool, rate-limited to the provider's
+throughput.
+
+    python -m app.reminders              # run forever
+    python -m app.reminders --once       # one scan, e.g. from cron
+    python -m app.reminders --once --dry-run   # list what is due; claims and sends nothing
+
+Each pass also sends the SMS that requests queued in doctor_notify_logs
+(see app.notifications), and a request that queues some wakes the
+scheduler through LISTEN/NOTIFY instead of waiting for the next tick.
+
+Several copies may run at once. Only the holder of an advisory lock scans
+and sends, so the --rate limit holds across all of them, and the unique
+index on doctor_notify_logs makes each claim happen once even if two scans
+overlap. A reminder is claimed by queueing its SMS (app.notifications): if
+the process dies before sending it, the claim's lease runs out and the next
+scan sends it, unless the appointment has started by then.
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import time
+
+import psycopg
+from psycopg.rows import dict_row
+
+from app import notifications
+from app.config import local_now
+from app.db import APPOINTMENT_COLUMNS, _db_url, get_connection
+from app.notifications import RateLimiter
+
+REMINDER_LOCK_ID = 7_316_420_002
+SEND_BATCH = 200
+DRY_RUN_LIMIT = 10000
+
+# (template_key, from hours ahead, to hours ahead). A reminder goes out once
+# the appointment is inside its window. The 24 h reminder stops at 12 h, so
+# a booking made less than 12 h ahead only gets the 2 h reminder instead of
+# two SMS close together.
+WINDOWS = [("reminder_2h", 0, 2), ("reminder_24h", 12, 24)]
+
+logger = logging.getLogger("medconnect.reminders")
+
+
+def reminder_text(appt: dict) -> str:
+    doctor_name = appt.get("doctor") or "your doctor"
+    return f"MedConnect: Reminder of your appointment with {doctor_name} on {appt.get('date')} at {appt.get('time')}."
+
+
+def _bounds(start: datetime.datetime, end: datetime.datetime):
+    return start.strftime("%Y-%m-%d"), start.strftime("%H:%M"), end.strftime("%Y-%m-%d"), end.strftime("%H:%M")
+
+
+_DUE_SQL = """
+    SELECT a.id, a.doctor_id
+    FROM appointments a
+    WHERE (a.date, a.time) > (%s, %s) AND (a.date, a.time) <= (%s, %s)
+      AND LOWER(COALESCE(a.status, '')) IN ('booked', 'confirmed')
+      AND NOT EXISTS (
+          SELECT 1 FROM doctor_notify_logs l
+          WHERE l.appointment_id = a.id AND l.template_key = %s
+            AND l.template_key LIKE 'reminder\\_%%'
+      )
+    ORDER BY a.date, a.time, a.id
+    LIMIT %s
+"""
+
+
+_DUE_ROWS_SQL = f"""
+    WITH due AS ({_DUE_SQL})
+    SELECT {APPOINTMENT_COLUMNS}
+    FROM due
+    JOIN appointments a ON a.id = due.id
+    LEFT JOIN doctor_public_profiles p ON p.doctor_id = a.doctor_id
+    ORDER BY a.date, a.time, a.id
+"""
+
+
+def preview_due(template_key: str, start: datetime.datetime, end: datetime.datetime, limit: int) -> list:
+    """Appointments claim_due would pick, without claiming them."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_DUE_ROWS_SQL, (*_bounds(start, end), template_key, limit))
+            return cur.fetchall() or []
+
+
+def claim_due(template_key: str, now: datetime.datetime, start: datetime.datetime, end: datetime.datetime,
+              limit: int) -> int:
+    """
+    Queues the `template_key` reminder for up to `limit` appointments
+    starting in (start, end] that have none yet; each SMS expires when its
+    appointment starts. Returns how many were queued.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_DUE_ROWS_SQL, (*_bounds(start, end), template_key, limit))
+            jobs = []
+            for row in cur.fetchall() or []:
+                starts_at = datetime.datetime.strptime(f"{row['date']} {row['time']}", "%Y-%m-%d %H:%M")
+                jobs.append({
+                    "phone": row.get("phone"),
+                    "text": reminder_text(row),
+                    "appointment_id": row["id"],
+                    "doctor_id": row["doctor_id"],
+                    "template_key": template_key,
+                    "send_within": (starts_at - now).total_seconds(),
+                })
+            queued = notifications.queue_sms(cur, jobs)
+        conn.commit()
+    return queued
+
+
+def run_once(limiter: RateLimiter, workers: int, dry_run: bool = False, now: datetime.datetime = None) -> dict:
+    now = now or local_now()
+    summary = {"locked": False, "windows": {}}
+    # A dedicated session holds the lock for the whole scan; another node
+    # that fails to get it just skips this tick.
+    with psycopg.connect(_db_url(), autocommit=True, row_factory=dict_row) as lock_conn:
+        got = lock_conn.execute("SELECT pg_try_advisory_lock(%s) AS locked", (REMINDER_LOCK_ID,)).fetchone()
+        if not got["locked"]:
+            return summary
+        summary["locked"] = True
+        try:
+            for template_key, from_hours, to_hours in WINDOWS:
+                start = now + datetime.timedelta(hours=from_hours)
+                end = now + datetime.timedelta(hours=to_hours)
+                if dry_run:
+                    rows = preview_due(template_key, start, end, DRY_RUN_LIMIT)
+                    for row in rows:
+                        logger.info("%s due: appointment %s on %s at %s", template_key, row["id"], row["date"], row["time"])
+                    summary["windows"][template_key] = {"due": len(rows)}
+                    continue
+                claimed = 0
+                while True:
+                    queued = claim_due(template_key, now, start, end, SEND_BATCH)
+                    claimed += queued
+                    if queued < SEND_BATCH:
+                        break
+                summary["windows"][template_key] = {"claimed": claimed}
+            if dry_run:
+                summary["sms"] = {"queued": notifications.queued_count()}
+            else:
+                summary["sms"] = notifications.send_queued(limiter, workers)
+        finally:
+            lock_conn.execute("SELECT pg_advisory_unlock(%s)", (REMINDER_LOCK_ID,))
+    return summary
+
+
+def _wait(listener, seconds: float):
+    """
+    Sleeps up to `seconds`, or until a request queues SMS. Returns the
+    listening connection to pass to the next call.
+    """
+    try:
+        if listener is None or listener.closed:
+            listener = psycopg.connect(_db_url(), autocommit=True)
+            listener.execute(f"LISTEN {notifications.CHANNEL}")
+        for _ in listener.notifies(timeout=seconds, stop_after=1):
+            pass
+        return listener
+    except psycopg.Error:
+        logger.exception("LISTEN %s failed; polling instead", notifications.CHANNEL)
+        time.sleep(seconds)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("REMINDER_INTERVAL", "60")))
+    parser.add_argument("--rate", type=float, default=float(os.getenv("REMINDER_SMS_PER_SECOND", "1")),
+                        help="SMS per second across all workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("REMINDER_WORKERS", "4")))
+    parser.add_argument("--dry-run", action="store_true", help="log the reminders that are due without claiming or sending them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    limiter = RateLimiter(args.rate)
+    listener = None
+    while True:
+        try:
+            summary = run_once(limiter, args.workers, dry_run=args.dry_run)
+            if summary["locked"]:
+                logger.info("scan %s sms %s", summary["windows"], summary["sms"])
+            else:
+                logger.info("another scheduler holds the lock; skipped")
+        except Exception:
+            logger.exception("reminder scan failed")
+            if args.once:
+                return 1
+        if args.once:
+            return 0
+        listener = _wait(listener, args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
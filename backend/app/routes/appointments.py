@@ -2,12 +2,30 @@ import csv
 import io
 from flask import Blueprint, jsonify, request, session, Response
 
-from app.db import get_connection
+from app import notifications
+from app.db import (
+    APPOINTMENT_COLUMNS,
+    APPOINTMENTS_FROM,
+    UPDATE_APPOINTMENT_STATUS_SQL,
+    execute_named,
+    fetch_one_named,
+    get_connection,
+)
 from app.routes.utils import success_response, error_response
 from sms import send_sms
 
 appointments_bp = Blueprint("appointments", __name__)
 
+MAX_BATCH_SIZE = 200
+
+# Moves the batch endpoint allows; cancelled and completed are final.
+STATUS_TRANSITIONS = {
+    "booked": {"confirmed", "cancelled", "completed"},
+    "confirmed": {"completed", "cancelled"},
+    "cancelled": set(),
+    "completed": set(),
+}
+
 
 def _require_admin():
     role = (session.get("role") or "").strip().lower()
@@ -19,25 +37,110 @@ def _require_admin():
 
 
 def fetch_doctor(doctor_id: int):
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, full_name, specialty, is_active
-                FROM doctors
-                WHERE id = %s
-                LIMIT 1
-                """,
-                (doctor_id,),
-            )
-            return cur.fetchone()
+    return fetch_one_named("doctor_brief_by_id", (doctor_id,))
 
 
 def fetch_one(appt_id: int):
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM appointments WHERE id = %s", (appt_id,))
-            return cur.fetchone()
+    return fetch_one_named("appointment_by_id", (appt_id,))
+
+
+# Shared with the async twins in app.routes.async_api. Validation helpers
+# return (status, code, message) errors for each side to render.
+BOOKING_FIELDS = ["specialty", "doctor", "date", "time", "name", "phone", "email", "doctor_id"]
+
+INSERT_APPOINTMENT_SQL = """
+    INSERT INTO appointments
+        (doctor_id, doctor, specialty, date, time, name, email, phone, status)
+    VALUES
+        (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    RETURNING *;
+"""
+
+
+def _parse_slots_args(args):
+    doctor_id = args.get("doctor_id")
+    date = args.get("date")
+    if not doctor_id or not date:
+        return None, None, (400, "validation_error", "doctor_id and date are required")
+    try:
+        return int(doctor_id), date, None
+    except ValueError:
+        return None, None, (400, "validation_error", "doctor_id must be an integer")
+
+
+def _booked_times(rows) -> list:
+    booked = set()
+    for row in rows or []:
+        status = str(row.get("status") or "").strip().lower()
+        if status == "cancelled":
+            continue
+        t = str(row.get("time") or "").strip()
+        if t:
+            booked.add(t)
+    return sorted(booked)
+
+
+def _parse_booking(payload: dict, sess_email: str):
+    """Returns (doctor_id, error) for a patient's booking payload."""
+    missing = [k for k in BOOKING_FIELDS if not payload.get(k)]
+    if missing:
+        return None, (400, "validation_error", "Missing required fields")
+
+    sess_email = (sess_email or "").strip().lower()
+    req_email = str(payload.get("email") or "").strip().lower()
+    if sess_email and req_email and sess_email != req_email:
+        return None, (403, "forbidden", "Forbidden")
+
+    try:
+        return int(payload["doctor_id"]), None
+    except (TypeError, ValueError):
+        return None, (400, "validation_error", "doctor_id must be an integer")
+
+
+def _check_booking_doctor(payload: dict, doctor_id: int, doctor):
+    if not doctor or not doctor.get("is_active"):
+        return (400, "validation_error", f"Invalid doctor_id: {doctor_id}")
+    doctor_name = str(payload.get("doctor", "")).strip().lower()
+    full_name = str(doctor.get("full_name", "")).strip().lower()
+    if doctor_name and full_name and doctor_name != full_name:
+        return (400, "validation_error", "doctor_id does not match selected doctor name")
+    return None
+
+
+def _booking_params(payload: dict, doctor_id: int) -> tuple:
+    return (
+        doctor_id,
+        payload["doctor"],
+        payload["specialty"],
+        payload["date"],
+        payload["time"],
+        payload["name"],
+        payload["email"],
+        payload["phone"],
+        "booked",
+    )
+
+
+def _confirmation_sms_text(appt: dict) -> str:
+    return (
+        f"MedConnect: Appointment confirmed with {appt['doctor']} "
+        f"on {appt['date']} at {appt['time']}."
+    )
+
+
+def _sms_summary(sms_result: dict) -> dict:
+    return {
+        "sent": bool(sms_result.get("ok")),
+        "sid": sms_result.get("sid"),
+        "error": sms_result.get("error") if not sms_result.get("ok") else None,
+    }
+
+
+def _status_sms_text(appt: dict, status: str) -> str:
+    return (
+        f"MedConnect: Your appointment with {appt.get('doctor') or 'your doctor'} "
+        f"on {appt.get('date','')} at {appt.get('time','')} is now {status}."
+    )
 
 
 @appointments_bp.get("/api/admin/appointments/export")
@@ -55,32 +158,29 @@ def admin_export_appointments():
     params = []
 
     if status:
-        where.append("LOWER(COALESCE(status, '')) = %s")
+        where.append("LOWER(COALESCE(a.status, '')) = %s")
         params.append(status)
 
     if doctor_id:
         try:
             did = int(doctor_id)
-            where.append("doctor_id = %s")
+            where.append("a.doctor_id = %s")
             params.append(did)
         except ValueError:
             return error_response(400, "validation_error", "doctor_id must be an integer")
 
     if from_date:
-        where.append("date >= %s")
+        where.append("a.date >= %s")
         params.append(from_date)
 
     if to_date:
-        where.append("date <= %s")
+        where.append("a.date <= %s")
         params.append(to_date)
 
-    sql = """
-        SELECT id, date, time, name, email, phone, doctor, specialty, status, doctor_id
-        FROM appointments
-    """
+    sql = f"SELECT {APPOINTMENT_COLUMNS} FROM {APPOINTMENTS_FROM}"
     if where:
         sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY date DESC, time DESC, id DESC"
+    sql += " ORDER BY a.date DESC, a.time DESC, a.id DESC"
 
     with get_connection() as conn:
         with conn.cursor() as cur:
@@ -128,43 +228,16 @@ def get_booked_slots():
     if not role:
         return error_response(401, "unauthorized", "Unauthorized")
 
-    doctor_id = request.args.get("doctor_id")
-    date = request.args.get("date")
-
-    if not doctor_id or not date:
-        return error_response(400, "validation_error", "doctor_id and date are required")
-
-    try:
-        did = int(doctor_id)
-    except ValueError:
-        return error_response(400, "validation_error", "doctor_id must be an integer")
+    did, date, error = _parse_slots_args(request.args)
+    if error:
+        return error_response(*error)
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT time, status
-                FROM appointments
-                WHERE doctor_id = %s AND date = %s
-                """,
-                (did, date),
-            )
+            execute_named(cur, "booked_slots", (did, date))
             rows = cur.fetchall()
 
-    booked = []
-    for row in rows or []:
-        status = str(row.get("status") or "").strip().lower()
-        if status == "cancelled":
-            continue
-        t = str(row.get("time") or "").strip()
-        if t:
-            booked.append(t)
-
-    return success_response({
-        "doctor_id": did,
-        "date": date,
-        "booked": sorted(list(set(booked))),
-    })
+    return success_response({"doctor_id": did, "date": date, "booked": _booked_times(rows)})
 
 
 @appointments_bp.route("/api/appointments", methods=["GET"])
@@ -193,17 +266,17 @@ def list_appointments():
             did = int(doctor_id)
         except ValueError:
             return error_response(400, "validation_error", "doctor_id must be an integer")
-        where.append("doctor_id = %s")
+        where.append("a.doctor_id = %s")
         params.append(did)
 
     if email:
-        where.append("LOWER(email) = %s")
+        where.append("LOWER(a.email) = %s")
         params.append(str(email).strip().lower())
 
-    sql = "SELECT * FROM appointments"
+    sql = f"SELECT {APPOINTMENT_COLUMNS} FROM {APPOINTMENTS_FROM}"
     if where:
         sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY id DESC"
+    sql += " ORDER BY a.id DESC"
 
     with get_connection() as conn:
         with conn.cursor() as cur:
@@ -222,87 +295,30 @@ def create_appointment():
         return error_response(403, "forbidden", "Forbidden")
 
     payload = request.get_json(silent=True) or {}
+    doctor_id, error = _parse_booking(payload, session.get("email"))
+    if error:
+        return error_response(*error)
 
-    required = ["specialty", "doctor", "date", "time", "name", "phone", "email", "doctor_id"]
-    missing = [k for k in required if not payload.get(k)]
-    if missing:
-        return error_response(400, "validation_error", "Missing required fields")
-
-    sess_email = (session.get("email") or "").strip().lower()
-    req_email = str(payload.get("email") or "").strip().lower()
-    if sess_email and req_email and sess_email != req_email:
-        return error_response(403, "forbidden", "Forbidden")
-
-    try:
-        doctor_id = int(payload["doctor_id"])
-    except (TypeError, ValueError):
-        return error_response(400, "validation_error", "doctor_id must be an integer")
-
-    doctor = fetch_doctor(doctor_id)
-    if not doctor or not doctor.get("is_active"):
-        return error_response(400, "validation_error", f"Invalid doctor_id: {doctor_id}")
-
-    doctor_name = str(payload.get("doctor", "")).strip().lower()
-    full_name = str(doctor.get("full_name", "")).strip().lower()
-    if doctor_name and full_name and doctor_name != full_name:
-        return error_response(400, "validation_error", "doctor_id does not match selected doctor name")
+    error = _check_booking_doctor(payload, doctor_id, fetch_doctor(doctor_id))
+    if error:
+        return error_response(*error)
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT 1
-                FROM appointments
-                WHERE doctor_id = %s AND date = %s AND time = %s
-                  AND LOWER(COALESCE(status, '')) <> 'cancelled'
-                LIMIT 1;
-                """,
-                (doctor_id, payload["date"], payload["time"]),
-            )
+            execute_named(cur, "slot_taken", (doctor_id, payload["date"], payload["time"]))
             if cur.fetchone():
                 return error_response(409, "conflict", "Selected slot is no longer available")
 
-            cur.execute(
-                """
-                INSERT INTO appointments
-                    (doctor_id, doctor, specialty, date, time, name, email, phone, status)
-                VALUES
-                    (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING *;
-                """,
-                (
-                    doctor_id,
-                    payload["doctor"],
-                    payload["specialty"],
-                    payload["date"],
-                    payload["time"],
-                    payload["name"],
-                    payload["email"],
-                    payload["phone"],
-                    "booked",
-                ),
-            )
+            cur.execute(INSERT_APPOINTMENT_SQL, _booking_params(payload, doctor_id))
             appt = cur.fetchone()
         conn.commit()
 
-    sms_result = {"ok": False, "error": "not_sent"}
     try:
-        sms_text = (
-            f"MedConnect: Appointment confirmed with {appt['doctor']} "
-            f"on {appt['date']} at {appt['time']}."
-        )
-        sms_result = send_sms(appt["phone"], sms_text)
+        sms_result = send_sms(appt["phone"], _confirmation_sms_text(appt))
     except Exception as e:
         sms_result = {"ok": False, "error": str(e)}
 
-    return success_response({
-        "appointment": appt,
-        "sms": {
-            "sent": bool(sms_result.get("ok")),
-            "sid": sms_result.get("sid"),
-            "error": sms_result.get("error") if not sms_result.get("ok") else None,
-        },
-    }, 201)
+    return success_response({"appointment": appt, "sms": _sms_summary(sms_result)}, 201)
 
 
 @appointments_bp.route("/api/appointments/<int:appt_id>", methods=["PATCH"])
@@ -338,29 +354,114 @@ def update_appointment(appt_id: int):
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE appointments SET status = %s WHERE id = %s RETURNING *;",
-                (new_status, appt_id),
-            )
+            cur.execute(UPDATE_APPOINTMENT_STATUS_SQL, (new_status, [appt_id]))
             updated = cur.fetchone()
         conn.commit()
 
     sms_result = {"ok": False, "error": "not_sent"}
     try:
         if new_status != old_status:
-            sms_text = (
-                f"MedConnect: Your appointment with {updated.get('doctor','your doctor')} "
-                f"on {updated.get('date','')} at {updated.get('time','')} is now {new_status}."
-            )
-            sms_result = send_sms(updated.get("phone", ""), sms_text)
+            sms_result = send_sms(updated.get("phone", ""), _status_sms_text(updated, new_status))
     except Exception as e:
         sms_result = {"ok": False, "error": str(e)}
 
+    return success_response({"appointment": updated, "sms": _sms_summary(sms_result)})
+
+
+@appointments_bp.post("/api/appointments/status/batch")
+def batch_update_status():
+    role = (session.get("role") or "").strip().lower()
+    if not role:
+        return error_response(401, "unauthorized", "Unauthorized")
+    if role not in ("doctor", "admin"):
+        return error_response(403, "forbidden", "Forbidden")
+
+    doctor_id = None
+    if role == "doctor":
+        try:
+            doctor_id = int(session.get("doctor_id"))
+        except (TypeError, ValueError):
+            return error_response(403, "forbidden", "Forbidden")
+
+    payload = request.get_json(silent=True) or {}
+    new_status = str(payload.get("status") or "").strip().lower()
+    if new_status not in STATUS_TRANSITIONS:
+        return error_response(400, "validation_error", "Invalid status")
+
+    raw_ids = payload.get("ids")
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return error_response(400, "validation_error", "ids must be a non-empty array")
+    if len(raw_ids) > MAX_BATCH_SIZE:
+        return error_response(400, "validation_error", f"At most {MAX_BATCH_SIZE} ids per request")
+    try:
+        ids = list(dict.fromkeys(int(i) for i in raw_ids))
+    except (TypeError, ValueError):
+        return error_response(400, "validation_error", "ids must be integers")
+
+    notify = payload.get("notify", True) is not False
+
+    results = {}
+    to_update = []
+    updated_rows = []
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            # Lock the rows first so the transition check and the update
+            # see the same statuses.
+            cur.execute(
+                """
+                SELECT id, doctor_id, status
+                FROM appointments
+                WHERE id = ANY(%s) AND (%s::integer IS NULL OR doctor_id = %s)
+                ORDER BY id
+                FOR UPDATE
+                """,
+                (ids, doctor_id, doctor_id),
+            )
+            current = {r["id"]: r for r in cur.fetchall() or []}
+
+            for appt_id in ids:
+                row = current.get(appt_id)
+                if row is None:
+                    # Other doctors' appointments are reported as missing too.
+                    results[appt_id] = {"id": appt_id, "ok": False, "error": "not_found"}
+                    continue
+                old_status = str(row.get("status") or "").strip().lower()
+                if old_status == new_status:
+                    results[appt_id] = {"id": appt_id, "ok": True, "status": new_status, "changed": False}
+                elif new_status in STATUS_TRANSITIONS.get(old_status, set()):
+                    to_update.append(appt_id)
+                    results[appt_id] = {"id": appt_id, "ok": True, "status": new_status, "changed": True,
+                                        "previous_status": old_status}
+                else:
+                    results[appt_id] = {"id": appt_id, "ok": False, "error": "invalid_transition",
+                                        "status": old_status}
+
+            if to_update:
+                cur.execute(UPDATE_APPOINTMENT_STATUS_SQL, (new_status, to_update))
+                updated_rows = cur.fetchall() or []
+
+            queued = 0
+            if notify and updated_rows:
+                queued = notifications.queue_sms(cur, [
+                    {
+                        "phone": row.get("phone", ""),
+                        "text": _status_sms_text(row, new_status),
+                        "appointment_id": row["id"],
+                        "doctor_id": row.get("doctor_id"),
+                        "template_key": f"status_{new_status}",
+                    }
+                    for row in updated_rows
+                ])
+        conn.commit()
+
+    for row in updated_rows:
+        results[row["id"]]["appointment"] = row
+
+    items = [results[i] for i in ids]
     return success_response({
-        "appointment": updated,
-        "sms": {
-            "sent": bool(sms_result.get("ok")),
-            "sid": sms_result.get("sid"),
-            "error": sms_result.get("error") if not sms_result.get("ok") else None,
-        },
+        "status": new_status,
+        "updated": len(updated_rows),
+        "failed": sum(1 for r in items if not r["ok"]),
+        "items": items,
+        "notifications": {"queued": queued},
     })
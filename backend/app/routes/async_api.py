@@ -0,0 +1,116 @@
+from quart import Blueprint, jsonify, request, session
+
+from app.db import execute_named_async, fetch_one_named_async, get_async_connection
+from app.routes.appointments import (
+    INSERT_APPOINTMENT_SQL,
+    _booked_times,
+    _booking_params,
+    _check_booking_doctor,
+    _confirmation_sms_text,
+    _parse_booking,
+    _parse_slots_args,
+    _sms_summary,
+)
+from app.routes.auth import _apply_doctor_card, _card_doctor_id, _public_user
+from app.routes.doctors import _active_doctor_items, _doctor_list_query
+from sms import send_sms_async
+
+# Async twins of the highest fan-out endpoints. Served only by app.asgi; the
+# sync Flask views stay the reference implementation, and validation, SQL
+# and response shapes come from their helpers so the two cannot drift.
+async_api_bp = Blueprint("async_api", __name__)
+
+
+def _success(data=None, status=200):
+    return jsonify({"success": True, "data": data}), status
+
+
+def _error(status, code, message):
+    return jsonify({"success": False, "error": {"code": code, "message": message}}), status
+
+
+@async_api_bp.get("/api/me")
+async def me():
+    user_id = session.get("user_id")
+    if not user_id:
+        return _error(401, "unauthorized", "Unauthorized")
+
+    user = await fetch_one_named_async("user_by_id", (user_id,))
+    if not user:
+        session.clear()
+        return _error(401, "unauthorized", "Unauthorized")
+
+    user_payload = _public_user(user)
+    card_id = _card_doctor_id(user_payload)
+    if card_id:
+        _apply_doctor_card(user_payload, await fetch_one_named_async("doctor_card_by_id", (card_id,)))
+
+    return _success({"user": user_payload})
+
+
+@async_api_bp.get("/api/appointments/slots")
+async def get_booked_slots():
+    role = (session.get("role") or "").strip().lower()
+    if not role:
+        return _error(401, "unauthorized", "Unauthorized")
+
+    did, date, error = _parse_slots_args(request.args)
+    if error:
+        return _error(*error)
+
+    async with get_async_connection() as conn:
+        async with conn.cursor() as cur:
+            await execute_named_async(cur, "booked_slots", (did, date))
+            rows = await cur.fetchall()
+
+    return _success({"doctor_id": did, "date": date, "booked": _booked_times(rows)})
+
+
+@async_api_bp.get("/api/doctors")
+async def list_doctors():
+    kind, sql, params, error = _doctor_list_query(request.args)
+    if error:
+        return _error(*error)
+    if kind == "empty":
+        return _success({"count": 0, "items": []})
+
+    async with get_async_connection() as conn:
+        cur = await conn.execute(sql, params)
+        rows = await cur.fetchall()
+
+    if kind == "active":
+        return jsonify(_active_doctor_items(rows)), 200
+    items = [r["payload"] for r in (rows or [])]
+    return _success({"count": len(items), "items": items})
+
+
+@async_api_bp.post("/api/appointments")
+async def create_appointment():
+    role = (session.get("role") or "").strip().lower()
+    if not role:
+        return _error(401, "unauthorized", "Unauthorized")
+    if role != "patient":
+        return _error(403, "forbidden", "Forbidden")
+
+    payload = await request.get_json(silent=True) or {}
+    doctor_id, error = _parse_booking(payload, session.get("email"))
+    if error:
+        return _error(*error)
+
+    async with get_async_connection() as conn:
+        async with conn.cursor() as cur:
+            await execute_named_async(cur, "doctor_brief_by_id", (doctor_id,))
+            error = _check_booking_doctor(payload, doctor_id, await cur.fetchone())
+            if error:
+                return _error(*error)
+
+            await execute_named_async(cur, "slot_taken", (doctor_id, payload["date"], payload["time"]))
+            if await cur.fetchone():
+                return _error(409, "conflict", "Selected slot is no longer available")
+
+            await cur.execute(INSERT_APPOINTMENT_SQL, _booking_params(payload, doctor_id))
+            appt = await cur.fetchone()
+        await conn.commit()
+
+    sms_result = await send_sms_async(appt["phone"], _confirmation_sms_text(appt))
+    return _success({"appointment": appt, "sms": _sms_summary(sms_result)}, 201)
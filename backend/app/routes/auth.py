@@ -1,7 +1,7 @@
 from flask import Blueprint, request, session, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 
-from app.db import get_connection
+from app import passwords, rate_limit, sessions
+from app.db import get_connection, fetch_one_named
 from app.routes.utils import success_response, error_response
 
 auth_bp = Blueprint("auth", __name__)
@@ -23,6 +23,23 @@ def _public_user(u: dict):
     }
 
 
+def _card_doctor_id(user_payload: dict):
+    # /api/me shows a doctor's card name, specialty and avatar; shared with
+    # app.routes.async_api.
+    if (user_payload.get("role") or "").strip().lower() == "doctor":
+        return user_payload.get("doctor_id")
+    return None
+
+
+def _apply_doctor_card(user_payload: dict, doctor_row) -> dict:
+    if doctor_row:
+        user_payload["specialty"] = doctor_row.get("specialty")
+        user_payload["avatar_url"] = doctor_row.get("avatar_url")
+        if doctor_row.get("full_name"):
+            user_payload["name"] = doctor_row.get("full_name")
+    return user_payload
+
+
 def _set_session(user: dict):
     session.clear()
     session["user_id"] = user.get("id")
@@ -32,14 +49,26 @@ def _set_session(user: dict):
     session["doctor_id"] = user.get("doctor_id")
 
 
+def _require_admin():
+    role = (session.get("role") or "").strip().lower()
+    if not role:
+        return error_response(401, "unauthorized", "Unauthorized")
+    if role != "admin":
+        return error_response(403, "forbidden", "Forbidden")
+    return None
+
+
+def _require_session_store():
+    if not sessions.enabled():
+        return error_response(409, "conflict", "Sessions are cookie-based; set SESSION_BACKEND to revoke them")
+    return None
+
+
 def _find_user_by_email(email: str):
     email = _norm_email(email)
     if not email:
         return None
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM users WHERE LOWER(email) = %s LIMIT 1", (email,))
-            return cur.fetchone()
+    return fetch_one_named("user_by_email", (email,))
 
 
 def _ensure_seed_users():
@@ -87,7 +116,7 @@ def _ensure_seed_users():
                     """,
                     (
                         _norm_email(s["email"]),
-                        generate_password_hash(s["password"]),
+                        passwords.hash_password(s["password"]),
                         s["name"],
                         s["phone"],
                         s["role"],
@@ -100,6 +129,10 @@ def _ensure_seed_users():
 
 @auth_bp.post("/api/auth/register")
 def register():
+    limited = rate_limit.check("register")
+    if limited:
+        return limited
+
     _ensure_seed_users()
 
     data = request.get_json(silent=True) or {}
@@ -125,7 +158,7 @@ def register():
     if _find_user_by_email(email):
         return error_response(409, "conflict", "Email already registered")
 
-    pwd_hash = generate_password_hash(password)
+    pwd_hash = passwords.hash_password(password)
 
     with get_connection() as conn:
         with conn.cursor() as cur:
@@ -153,22 +186,30 @@ def register():
 
 @auth_bp.post("/api/auth/login")
 def login():
-    _ensure_seed_users()
-
     data = request.get_json(silent=True) or {}
     email = _norm_email(data.get("email"))
     password = (data.get("password") or "").strip()
 
+    limited = rate_limit.check("login", email=email)
+    if limited:
+        return limited
+
     if not email or not password:
         return error_response(400, "validation_error", "Email and password required")
 
+    _ensure_seed_users()
+
     user = _find_user_by_email(email)
     if not user:
+        rate_limit.record_failure("login", email=email)
         return error_response(401, "unauthorized", "Invalid credentials")
 
     stored_hash = user.get("password_hash") or ""
-    if not check_password_hash(stored_hash, password):
+    if not passwords.verify_password(stored_hash, password):
+        rate_limit.record_failure("login", email=email)
         return error_response(401, "unauthorized", "Invalid credentials")
+    if passwords.needs_rehash(stored_hash):
+        passwords.upgrade_in_background(user["id"], stored_hash, password)
 
     _set_session(user)
     return success_response({"user": _public_user(user)})
@@ -188,29 +229,16 @@ def me():
     if not user_id:
         return error_response(401, "unauthorized", "Unauthorized")
 
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM users WHERE id = %s LIMIT 1", (user_id,))
-            user = cur.fetchone()
+    user = fetch_one_named("user_by_id", (user_id,))
 
     if not user:
         session.clear()
         return error_response(401, "unauthorized", "Unauthorized")
 
     user_payload = _public_user(user)
-    if (user_payload.get("role") or "").strip().lower() == "doctor" and user_payload.get("doctor_id"):
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT full_name, specialty, avatar_url FROM doctors WHERE id = %s LIMIT 1",
-                    (user_payload.get("doctor_id"),),
-                )
-                doctor_row = cur.fetchone()
-        if doctor_row:
-            user_payload["specialty"] = doctor_row.get("specialty")
-            user_payload["avatar_url"] = doctor_row.get("avatar_url")
-            if doctor_row.get("full_name"):
-                user_payload["name"] = doctor_row.get("full_name")
+    card_id = _card_doctor_id(user_payload)
+    if card_id:
+        _apply_doctor_card(user_payload, fetch_one_named("doctor_card_by_id", (card_id,)))
 
     return success_response({"user": user_payload})
 
@@ -225,6 +253,10 @@ def forgot_password():
     if not email:
         return error_response(400, "validation_error", "Email is required")
 
+    limited = rate_limit.check("forgot_password", email=email)
+    if limited:
+        return limited
+
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
@@ -237,3 +269,30 @@ def forgot_password():
         conn.commit()
 
     return success_response({"message": "Password reset request received"})
+
+
+@auth_bp.get("/api/admin/users/<int:user_id>/sessions")
+def admin_list_sessions(user_id: int):
+    guard = _require_admin() or _require_session_store()
+    if guard:
+        return guard
+    return success_response({"items": sessions.get_store().list_user(user_id)})
+
+
+@auth_bp.delete("/api/admin/users/<int:user_id>/sessions")
+def admin_revoke_sessions(user_id: int):
+    guard = _require_admin() or _require_session_store()
+    if guard:
+        return guard
+    return success_response({"revoked": sessions.get_store().revoke(user_id)})
+
+
+@auth_bp.delete("/api/admin/users/<int:user_id>/sessions/<session_id>")
+def admin_revoke_session(user_id: int, session_id: str):
+    guard = _require_admin() or _require_session_store()
+    if guard:
+        return guard
+    revoked = sessions.get_store().revoke(user_id, session_id)
+    if not revoked:
+        return error_response(404, "not_found", "Session not found")
+    return success_response({"revoked": revoked})
@@ -3,6 +3,7 @@ import os
 import re
 from flask import Blueprint, request, jsonify
 
+from app import rate_limit
 from app.db import get_connection
 from app.routes.utils import success_response
 from app.email_utils import send_email
@@ -34,6 +35,10 @@ def _is_valid_email(email: str) -> bool:
 
 @contact_bp.post("/api/contact")
 def create_contact_message():
+    limited = rate_limit.check("contact")
+    if limited:
+        return limited
+
     payload = request.get_json(silent=True) or {}
 
     enquiry_type = (payload.get("type") or "").strip()
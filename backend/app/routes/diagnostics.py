@@ -0,0 +1,72 @@
+import os
+from flask import Blueprint, Response, request, session
+
+from app import profiler, slow_queries
+from app.routes.utils import success_response, error_response
+
+diagnostics_bp = Blueprint("diagnostics", __name__)
+
+
+def _require_admin():
+    role = (session.get("role") or "").strip().lower()
+    if not role:
+        return error_response(401, "unauthorized", "Unauthorized")
+    if role != "admin":
+        return error_response(403, "forbidden", "Forbidden")
+    return None
+
+
+@diagnostics_bp.get("/api/admin/slow-queries")
+def admin_slow_queries():
+    auth_error = _require_admin()
+    if auth_error:
+        return auth_error
+
+    try:
+        limit = int(request.args.get("limit", "50"))
+    except ValueError:
+        return error_response(400, "validation_error", "limit must be an integer")
+    limit = max(1, min(limit, 500))
+
+    threshold = slow_queries.threshold_seconds()
+    # Each worker keeps its own buffer; the response says which one answered.
+    return success_response({
+        "enabled": threshold is not None,
+        "threshold_ms": threshold * 1000 if threshold is not None else None,
+        "worker_pid": os.getpid(),
+        "items": slow_queries.snapshot(limit),
+    })
+
+
+@diagnostics_bp.delete("/api/admin/slow-queries")
+def admin_clear_slow_queries():
+    auth_error = _require_admin()
+    if auth_error:
+        return auth_error
+    slow_queries.clear()
+    return success_response({"cleared": True})
+
+
+@diagnostics_bp.get("/api/admin/profile")
+def admin_profile():
+    auth_error = _require_admin()
+    if auth_error:
+        return auth_error
+
+    try:
+        seconds = float(request.args.get("seconds", "5"))
+        interval_ms = float(request.args.get("interval_ms", "5"))
+    except ValueError:
+        return error_response(400, "validation_error", "seconds and interval_ms must be numbers")
+    if seconds <= 0 or seconds > profiler.MAX_SECONDS:
+        return error_response(400, "validation_error", f"seconds must be between 0 and {profiler.MAX_SECONDS:g}")
+
+    # Samples every thread of this worker except the one serving this
+    # request. Under sync gunicorn workers that leaves nothing else running,
+    # so use --threads (gthread) or the ASGI server to profile live traffic.
+    include_idle = request.args.get("idle") == "1"
+    sampler = profiler.sample_process(seconds, interval_ms / 1000.0, include_idle)
+    response = Response(sampler.collapsed(), status=200, mimetype="text/plain")
+    response.headers["X-Profile-Samples"] = str(sampler.samples)
+    response.headers["X-Profile-Worker"] = str(os.getpid())
+    return response
@@ -1,11 +1,21 @@
 import datetime
+import io
 import json
 import time
 import uuid
 from pathlib import Path
 from flask import Blueprint, jsonify, request, session
 
-from app.db import get_connection
+from app import directory
+from app.db import (
+    APPOINTMENT_COLUMNS,
+    APPOINTMENTS_FROM,
+    UPDATE_APPOINTMENT_STATUS_SQL,
+    fetch_one_named,
+    get_connection,
+    pipeline,
+)
+from app.storage import get_storage
 from sms import send_sms
 
 
@@ -18,7 +28,7 @@ ALLOWED_AVATAR_MIME = {
     "image/webp": "webp",
 }
 MAX_AVATAR_SIZE = 2 * 1024 * 1024
-AVATARS_DIR = Path(__file__).resolve().parents[2] / "uploads" / "avatars"
+AVATARS_PREFIX = "avatars"
 
 
 def _error(status: int, code: str, message: str):
@@ -44,10 +54,6 @@ def _doctor_scope_id():
         return None
 
 
-def _ensure_avatars_dir():
-    AVATARS_DIR.mkdir(parents=True, exist_ok=True)
-
-
 def _avatar_ext_from_mime(mime: str):
     return ALLOWED_AVATAR_MIME.get((mime or "").strip().lower())
 
@@ -66,12 +72,10 @@ def _delete_avatar_file(avatar_url: str):
     filename = Path(avatar_url).name
     if not filename:
         return
-    path = AVATARS_DIR / filename
-    if path.exists() and path.is_file():
-        try:
-            path.unlink()
-        except Exception:
-            pass
+    try:
+        get_storage().delete(f"{AVATARS_PREFIX}/{filename}")
+    except Exception:
+        pass
 
 
 def _serialize_appt(row: dict):
@@ -147,21 +151,21 @@ def list_doctor_appointments():
     today_iso = today.isoformat()
     week_end = (today + datetime.timedelta(days=6)).isoformat()
 
-    sql = "SELECT * FROM appointments WHERE doctor_id = %s"
+    sql = f"SELECT {APPOINTMENT_COLUMNS} FROM {APPOINTMENTS_FROM} WHERE a.doctor_id = %s"
     params = [doctor_id]
 
     if range_key == "today":
-        sql += " AND date = %s"
+        sql += " AND a.date = %s"
         params.append(today_iso)
     elif range_key == "week":
-        sql += " AND date >= %s AND date <= %s"
+        sql += " AND a.date >= %s AND a.date <= %s"
         params.extend([today_iso, week_end])
     elif range_key == "all":
         pass
     else:
         return _error(400, "validation_error", "range must be today, week, or all")
 
-    sql += " ORDER BY date ASC, time ASC"
+    sql += " ORDER BY a.date ASC, a.time ASC"
 
     with get_connection() as conn:
         with conn.cursor() as cur:
@@ -186,17 +190,13 @@ def doctor_summary():
     week_end = (datetime.date.today() + datetime.timedelta(days=6)).isoformat()
 
     with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) AS count FROM appointments WHERE doctor_id = %s", (doctor_id,))
-            total = cur.fetchone().get("count", 0)
-
-            cur.execute(
+        with pipeline(conn):
+            total_cur = conn.execute("SELECT COUNT(*) AS count FROM appointments WHERE doctor_id = %s", (doctor_id,))
+            today_cur = conn.execute(
                 "SELECT COUNT(*) AS count FROM appointments WHERE doctor_id = %s AND date = %s",
                 (doctor_id, today),
             )
-            today_count = cur.fetchone().get("count", 0)
-
-            cur.execute(
+            week_cur = conn.execute(
                 """
                 SELECT COUNT(*) AS count
                 FROM appointments
@@ -204,9 +204,7 @@ def doctor_summary():
                 """,
                 (doctor_id, today, week_end),
             )
-            week_count = cur.fetchone().get("count", 0)
-
-            cur.execute(
+            status_cur = conn.execute(
                 """
                 SELECT status, COUNT(*) AS count
                 FROM appointments
@@ -215,7 +213,10 @@ def doctor_summary():
                 """,
                 (doctor_id,),
             )
-            status_rows = cur.fetchall()
+        total = total_cur.fetchone().get("count", 0)
+        today_count = today_cur.fetchone().get("count", 0)
+        week_count = week_cur.fetchone().get("count", 0)
+        status_rows = status_cur.fetchall()
 
     by_status = {str(r.get("status") or "").strip().lower(): r.get("count", 0) for r in status_rows or []}
 
@@ -241,10 +242,7 @@ def doctor_profile():
     if doctor_id is None:
         return _error(403, "forbidden", "Forbidden")
 
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM doctors WHERE id = %s LIMIT 1", (doctor_id,))
-            row = cur.fetchone()
+    row = fetch_one_named("doctor_by_id", (doctor_id,))
 
     if not row:
         return _error(404, "not_found", "Doctor not found")
@@ -311,6 +309,7 @@ def doctor_update_profile():
             cur.execute(sql, tuple(values))
             updated = cur.fetchone()
         conn.commit()
+    directory.invalidate()
 
     if not updated:
         return _error(404, "not_found", "Doctor not found")
@@ -345,13 +344,7 @@ def doctor_update_status(appt_id: int):
     if not new_status or new_status not in ALLOWED_STATUS:
         return _error(400, "validation_error", "Invalid status")
 
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT * FROM appointments WHERE id = %s AND doctor_id = %s LIMIT 1",
-                (appt_id, doctor_id),
-            )
-            appt = cur.fetchone()
+    appt = fetch_one_named("appointment_by_id_for_doctor", (appt_id, doctor_id))
 
     if not appt:
         return _error(404, "not_found", "Appointment not found")
@@ -360,10 +353,7 @@ def doctor_update_status(appt_id: int):
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE appointments SET status = %s WHERE id = %s RETURNING *;",
-                (new_status, appt_id),
-            )
+            cur.execute(UPDATE_APPOINTMENT_STATUS_SQL, (new_status, [appt_id]))
             updated = cur.fetchone()
         conn.commit()
 
@@ -405,13 +395,7 @@ def doctor_notify_patient(appt_id: int):
     template_key = str(payload.get("template_key") or "").strip().lower()
     custom_message = str(payload.get("custom_message") or "").strip()
 
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT * FROM appointments WHERE id = %s AND doctor_id = %s LIMIT 1",
-                (appt_id, doctor_id),
-            )
-            appt = cur.fetchone()
+    appt = fetch_one_named("appointment_by_id_for_doctor", (appt_id, doctor_id))
 
     if not appt:
         return _error(404, "not_found", "Appointment not found")
@@ -480,13 +464,12 @@ def doctor_upload_avatar():
     if len(data) > MAX_AVATAR_SIZE:
         return _error(400, "validation_error", "avatar file must be 2MB or smaller")
 
-    _ensure_avatars_dir()
+    storage = get_storage()
     filename = _avatar_filename(doctor_id, ext)
-    file_path = AVATARS_DIR / filename
+    avatar_key = f"{AVATARS_PREFIX}/{filename}"
 
     try:
-        with open(file_path, "wb") as f:
-            f.write(data)
+        storage.put(avatar_key, io.BytesIO(data))
     except Exception:
         return _error(500, "server_error", "Unable to save avatar")
 
@@ -494,18 +477,9 @@ def doctor_upload_avatar():
     previous_url = None
 
     with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT avatar_url FROM doctors WHERE id = %s LIMIT 1", (doctor_id,))
-            row = cur.fetchone()
-            if not row:
-                try:
-                    file_path.unlink()
-                except Exception:
-                    pass
-                return _error(404, "not_found", "Doctor not found")
-
-            previous_url = row.get("avatar_url")
-            cur.execute(
+        with pipeline(conn):
+            previous_cur = conn.execute("SELECT avatar_url FROM doctors WHERE id = %s LIMIT 1", (doctor_id,))
+            updated_cur = conn.execute(
                 """
                 UPDATE doctors
                 SET avatar_url = %s, updated_at = NOW()
@@ -514,8 +488,14 @@ def doctor_upload_avatar():
                 """,
                 (avatar_url, doctor_id),
             )
-            updated = cur.fetchone()
+        row = previous_cur.fetchone()
+        updated = updated_cur.fetchone()
+        if not row:
+            storage.delete(avatar_key)
+            return _error(404, "not_found", "Doctor not found")
+        previous_url = row.get("avatar_url")
         conn.commit()
+    directory.invalidate()
 
     if previous_url and previous_url != avatar_url:
         _delete_avatar_file(previous_url)
@@ -536,24 +516,22 @@ def doctor_delete_avatar():
     previous_url = None
 
     with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT avatar_url FROM doctors WHERE id = %s LIMIT 1", (doctor_id,))
-            row = cur.fetchone()
-            if not row:
-                return _error(404, "not_found", "Doctor not found")
-
-            previous_url = row.get("avatar_url")
-            cur.execute(
+        with pipeline(conn):
+            previous_cur = conn.execute("SELECT avatar_url FROM doctors WHERE id = %s LIMIT 1", (doctor_id,))
+            conn.execute(
                 """
                 UPDATE doctors
                 SET avatar_url = NULL, updated_at = NOW()
                 WHERE id = %s
-                RETURNING avatar_url
                 """,
                 (doctor_id,),
             )
-            cur.fetchone()
+        row = previous_cur.fetchone()
+        if not row:
+            return _error(404, "not_found", "Doctor not found")
+        previous_url = row.get("avatar_url")
         conn.commit()
+    directory.invalidate()
 
     if previous_url:
         _delete_avatar_file(previous_url)
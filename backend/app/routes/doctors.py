@@ -1,9 +1,9 @@
 import json
 import secrets
 from flask import Blueprint, jsonify, request, session
-from werkzeug.security import generate_password_hash
 
-from app.db import get_connection
+from app import directory, passwords
+from app.db import get_connection, fetch_one_named, pipeline
 from app.routes.utils import success_response
 from app.email_utils import send_email
 
@@ -209,66 +209,116 @@ def _serialize_doctor(row: dict, public: bool = False):
 
 
 def _fetch_doctor_row(doctor_id: int):
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM doctors WHERE id = %s LIMIT 1", (doctor_id,))
-            return cur.fetchone()
+    return fetch_one_named("doctor_by_id", (doctor_id,))
 
 
-@doctors_bp.route("/api/doctors", methods=["GET"])
-def list_doctors():
-    specialty = request.args.get("specialty")
-    available = request.args.get("available")
-    active = (request.args.get("active") or "").strip().lower()
+def _doctor_list_query(args):
+    """
+    Builds GET /api/doctors, shared with app.routes.async_api. Returns
+    (kind, sql, params, error): kind "empty" needs no query, "active" is the
+    bare id/name list used by pickers, "payload" the full public profiles.
+    """
+    specialty = args.get("specialty")
+    available = args.get("available")
+    active = (args.get("active") or "").strip().lower()
+    day = (args.get("day") or "").strip().lower()
 
-    sql = "SELECT * FROM doctors WHERE is_active = TRUE"
+    sql = "SELECT payload FROM doctor_public_profiles WHERE is_active = TRUE"
     params = []
 
     if specialty:
         sql += " AND LOWER(specialty) = %s"
         params.append(str(specialty).strip().lower())
 
+    if day:
+        if day not in VALID_DAYS:
+            return None, None, None, (400, "validation_error", f"Invalid day: '{day}'")
+        sql += " AND availability_days @> %s::jsonb"
+        params.append(json.dumps([day]))
+
     if available is not None and str(available).strip().lower() == "false":
-        return success_response({"count": 0, "items": []})
+        return "empty", None, None, None
 
     if active in ("1", "true", "yes"):
         sql = """
-            SELECT id, full_name, specialty
-            FROM doctors
+            SELECT doctor_id AS id, full_name, specialty
+            FROM doctor_public_profiles
             WHERE is_active = TRUE
             ORDER BY full_name ASC
         """
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql)
-                rows = cur.fetchall()
+        return "active", sql, (), None
+
+    # Payloads are built by the doctors trigger (migration 012) in the shape
+    # of _serialize_doctor(row, public=True).
+    return "payload", sql + " ORDER BY doctor_id ASC", tuple(params), None
+
 
-        return jsonify([
-            {
-                "id": r.get("id"),
-                "full_name": r.get("full_name"),
-                "specialty": r.get("specialty"),
-            }
-            for r in rows or []
-        ]), 200
+def _active_doctor_items(rows) -> list:
+    return [
+        {
+            "id": r.get("id"),
+            "full_name": r.get("full_name"),
+            "specialty": r.get("specialty"),
+        }
+        for r in rows or []
+    ]
 
-    sql += " ORDER BY id ASC"
+
+@doctors_bp.route("/api/doctors", methods=["GET"])
+def list_doctors():
+    kind, sql, params, error = _doctor_list_query(request.args)
+    if error:
+        return _error(*error)
+    if kind == "empty":
+        return success_response({"count": 0, "items": []})
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, tuple(params))
+            cur.execute(sql, params)
             rows = cur.fetchall()
 
-    items = [_serialize_doctor(r, public=True) for r in (rows or [])]
+    if kind == "active":
+        return jsonify(_active_doctor_items(rows)), 200
+    items = [r["payload"] for r in (rows or [])]
     return success_response({"count": len(items), "items": items})
 
 
+@doctors_bp.get("/api/doctors/search")
+def search_doctors():
+    day = (request.args.get("day") or "").strip().lower()
+    if day and day not in VALID_DAYS:
+        return _error(400, "validation_error", f"Invalid day: '{day}'")
+
+    sort = (request.args.get("sort") or "").strip().lower()
+    if sort and sort not in directory.SORTS:
+        return _error(400, "validation_error", f"sort must be one of: {', '.join(directory.SORTS)}")
+
+    try:
+        page = int(request.args.get("page") or 1)
+        limit = int(request.args.get("limit") or directory.DEFAULT_PAGE_SIZE)
+    except ValueError:
+        return _error(400, "validation_error", "page and limit must be integers")
+    if page < 1 or limit < 1:
+        return _error(400, "validation_error", "page and limit must be positive")
+
+    result = directory.search(
+        query=(request.args.get("q") or "").strip(),
+        specialty=request.args.get("specialty") or "",
+        day=day,
+        sort=sort,
+        page=page,
+        limit=min(limit, directory.MAX_PAGE_SIZE),
+        include_next_available=(request.args.get("next_available") or "").strip().lower() in ("1", "true", "yes"),
+    )
+    return success_response(result)
+
+
 @doctors_bp.get("/api/doctors/<int:doctor_id>")
 def get_doctor_public(doctor_id: int):
-    row = _fetch_doctor_row(doctor_id)
-    if not row or not row.get("is_active"):
+    row = fetch_one_named("doctor_public_profile", (doctor_id,))
+    if not row:
         return _error(404, "not_found", "Doctor not found")
-    return success_response(_serialize_doctor(row, public=True))
+    return success_response(row["payload"])
 
 
 @doctors_bp.route("/api/admin/doctors", methods=["GET"])
@@ -340,26 +390,35 @@ def admin_create_doctor():
         return _error(400, "validation_error", "availability window must align to 1-hour slots")
 
     temp_password = _generate_temp_password()
-    pwd_hash = generate_password_hash(temp_password)
+    pwd_hash = passwords.hash_password(temp_password)
 
     with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT 1 FROM doctors WHERE LOWER(email) = %s LIMIT 1", (email,))
-            if cur.fetchone():
-                return _error(409, "conflict", "email must be unique")
-
-            cur.execute("SELECT 1 FROM users WHERE LOWER(email) = %s LIMIT 1", (email,))
-            if cur.fetchone():
-                return _error(409, "conflict", "user with email already exists")
+        with pipeline(conn):
+            doctor_check = conn.execute("SELECT 1 FROM doctors WHERE LOWER(email) = %s LIMIT 1", (email,))
+            user_check = conn.execute("SELECT 1 FROM users WHERE LOWER(email) = %s LIMIT 1", (email,))
+        if doctor_check.fetchone():
+            return _error(409, "conflict", "email must be unique")
+        if user_check.fetchone():
+            return _error(409, "conflict", "user with email already exists")
 
+        with conn.cursor() as cur:
+            # Doctor and login rows in one statement: one round trip, and the
+            # user row picks up the new doctor id without a second query.
             cur.execute(
                 """
-                INSERT INTO doctors
-                    (full_name, email, specialty, phone, is_active,
-                     availability_days, availability_start, availability_end)
-                VALUES
-                    (%s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING *;
+                WITH new_doctor AS (
+                    INSERT INTO doctors
+                        (full_name, email, specialty, phone, is_active,
+                         availability_days, availability_start, availability_end)
+                    VALUES
+                        (%s, %s, %s, %s, %s, %s, %s, %s)
+                    RETURNING *
+                ), new_user AS (
+                    INSERT INTO users (email, password_hash, name, phone, role, doctor_id)
+                    SELECT email, %s, full_name, phone, 'doctor', id
+                    FROM new_doctor
+                )
+                SELECT * FROM new_doctor;
                 """,
                 (
                     full_name,
@@ -370,25 +429,12 @@ def admin_create_doctor():
                     json.dumps(days),
                     start_norm,
                     end_norm,
-                ),
-            )
-            row = cur.fetchone()
-
-            cur.execute(
-                """
-                INSERT INTO users (email, password_hash, name, phone, role, doctor_id)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    email,
                     pwd_hash,
-                    full_name,
-                    phone,
-                    "doctor",
-                    row.get("id"),
                 ),
             )
+            row = cur.fetchone()
         conn.commit()
+    directory.invalidate()
 
     try:
         email_body = "\n".join([
@@ -552,6 +598,7 @@ def admin_update_doctor(doctor_id: int):
                     tuple(params),
                 )
         conn.commit()
+    directory.invalidate()
 
     return jsonify({"success": True, "data": _serialize_doctor(updated)}), 200
 
@@ -584,5 +631,6 @@ def admin_update_doctor_status(doctor_id: int):
             )
             updated = cur.fetchone()
         conn.commit()
+    directory.invalidate()
 
     return jsonify({"success": True, "data": _serialize_doctor(updated)}), 200
@@ -1,16 +1,26 @@
+import base64
 import csv
+import html
 import io
 import json
+import logging
 import os
 import re
+import shutil
+import threading
+import time
 import uuid
+import zipfile
 import datetime
+import itertools
 from pathlib import Path
-from flask import Blueprint, request, send_file, jsonify, session, Response
+from flask import Blueprint, request, jsonify, session, Response
 
+from app import metrics, rate_limit
 from app.db import get_connection
 from app.routes.utils import success_response, error_response
 from app.email_utils import send_email
+from app.storage import cleanup_stale_staging, get_storage, new_staging_dir
 
 
 quote_requests_bp = Blueprint("quote_requests", __name__)
@@ -24,9 +34,26 @@ ALLOWED_MIMES = {
     "image/png",
 }
 MAX_FILE_SIZE = 5 * 1024 * 1024
+MAX_ARCHIVE_REQUESTS = 50
+# Already-compressed formats are stored as-is; deflating them only burns CPU.
+STORED_MIMES = {"application/pdf", "image/jpeg", "image/png"}
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+ARCHIVE_MISSING_NAME = "MISSING_FILES.txt"
+# Control characters never appear in submitted text, so they can mark matches
+# in ts_headline output and be swapped for <mark> after HTML escaping.
+HIGHLIGHT_START = "\x01"
+HIGHLIGHT_STOP = "\x02"
+HEADLINE_OPTIONS = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=20, MinWords=8"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+STATUS_COUNTS_TTL_SECONDS = int(os.getenv("QUOTE_STATUS_COUNTS_TTL", "30"))
 
-UPLOADS_ROOT = Path(os.getenv("UPLOADS_DIR") or (Path(__file__).resolve().parents[2] / "uploads"))
-QUOTE_UPLOADS_ROOT = UPLOADS_ROOT / "quote_requests"
+_status_counts_cache = {"value": None, "expires_at": 0.0}
+_status_counts_lock = threading.Lock()
+
+STAGING_MAX_AGE_SECONDS = 60 * 60
+
+logger = logging.getLogger("medconnect.quote_requests")
 
 
 def _require_admin():
@@ -107,9 +134,163 @@ def _save_file(file_storage, folder: Path) -> dict:
     }
 
 
+def _file_key(quote_request_id, stored_filename: str) -> str:
+    return f"quote_requests/{quote_request_id}/{stored_filename}"
+
+
+def _unpublish(keys):
+    storage = get_storage()
+    for key in keys:
+        try:
+            storage.delete(key)
+        except Exception:
+            logger.exception("Could not remove %s", key)
+
+
+def _publish_staging(staging: Path, quote_request_id: int) -> list:
+    """Store every staged file; if one fails, remove those already stored and re-raise."""
+    storage = get_storage()
+    keys = []
+    try:
+        for entry in sorted(staging.iterdir()):
+            key = _file_key(quote_request_id, entry.name)
+            storage.put_file(key, entry)
+            keys.append(key)
+    except Exception:
+        _unpublish(keys)
+        raise
+    return keys
+
+
+class _ZipStream:
+    # Write-only, unseekable sink for zipfile: zipfile falls back to data
+    # descriptors, so entries can be emitted as soon as they are written.
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _archive_name(row, used: set, per_request_folder: bool) -> str:
+    original = os.path.basename(row.get("original_filename") or "") or row.get("stored_filename")
+    name = f"{row.get('kind')}-{original}"
+    if per_request_folder:
+        name = f"{row.get('quote_request_id')}/{name}"
+    base, ext = os.path.splitext(name)
+    counter = 1
+    while name in used:
+        counter += 1
+        name = f"{base} ({counter}){ext}"
+    used.add(name)
+    return name
+
+
+def _open_files(file_rows):
+    # (row, open stream), with None for files missing from storage.
+    storage = get_storage()
+    for row in file_rows:
+        try:
+            yield row, storage.open(_file_key(row.get("quote_request_id"), row.get("stored_filename")))
+        except FileNotFoundError:
+            yield row, None
+
+
+def _missing_manifest(missing_rows) -> str:
+    lines = [f"{len(missing_rows)} file(s) could not be found in storage and are not in this archive:", ""]
+    for row in missing_rows:
+        original = os.path.basename(row.get("original_filename") or "") or row.get("stored_filename")
+        lines.append(f"quote request {row.get('quote_request_id')}, file {row.get('id')}: {row.get('kind')}-{original}")
+    return "\n".join(lines) + "\n"
+
+
+def _stream_archive(opened_files, missing_rows: list, per_request_folder: bool):
+    sink = _ZipStream()
+    used = set()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+        for row, src in opened_files:
+            if src is None:
+                missing_rows.append(row)
+                continue
+
+            info = zipfile.ZipInfo(_archive_name(row, used, per_request_folder))
+            created_at = row.get("created_at")
+            if isinstance(created_at, datetime.datetime):
+                info.date_time = created_at.timetuple()[:6]
+            mime = (row.get("mime") or "").lower()
+            info.compress_type = zipfile.ZIP_STORED if mime in STORED_MIMES else zipfile.ZIP_DEFLATED
+
+            with src, zf.open(info, mode="w") as dst:
+                while True:
+                    chunk = src.read(ARCHIVE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+        if missing_rows:
+            logger.warning("Archive is missing %d file(s)", len(missing_rows))
+            zf.writestr(ARCHIVE_MISSING_NAME, _missing_manifest(missing_rows))
+    yield sink.drain()
+
+
+def _archive_response(quote_request_ids, filename: str):
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, quote_request_id, kind, stored_filename, original_filename, mime, created_at
+                FROM quote_request_files
+                WHERE quote_request_id = ANY(%s)
+                ORDER BY quote_request_id ASC, created_at ASC, id ASC
+                """,
+                (list(quote_request_ids),),
+            )
+            rows = cur.fetchall() or []
+
+    if not rows:
+        return error_response(404, "not_found", "No files found")
+
+    # Open files up to the first one that exists, so an archive that would
+    # hold nothing is a 404 rather than a ZIP with only the missing list.
+    opened = _open_files(rows)
+    missing = []
+    for row, src in opened:
+        if src is not None:
+            first = (row, src)
+            break
+        missing.append(row)
+    else:
+        return error_response(404, "not_found", f"None of the {len(rows)} file(s) could be found in storage")
+
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    response = Response(
+        _stream_archive(itertools.chain([first], opened), missing, per_request_folder=len(quote_request_ids) > 1),
+        mimetype="application/zip",
+        headers=headers,
+    )
+    response.call_on_close(first[1].close)
+    return response
+
+
 def _categories_from_row(raw):
     if raw is None:
         return []
+    if isinstance(raw, list):
+        return [str(v) for v in raw]
     try:
         parsed = json.loads(raw)
         if isinstance(parsed, list):
@@ -121,7 +302,10 @@ def _categories_from_row(raw):
 
 @quote_requests_bp.post("/api/quote-requests")
 def create_quote_request():
-    # Rate limiting placeholder: consider throttling by IP/email in production.
+    limited = rate_limit.check("quote_request")
+    if limited:
+        return limited
+
     form = request.form
     files = request.files
 
@@ -207,98 +391,101 @@ def create_quote_request():
             },
         }), 400
 
-    if doctor_id is not None:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id, full_name FROM doctors WHERE id = %s AND is_active = TRUE",
-                    (doctor_id,),
-                )
-                doc_row = cur.fetchone()
-                if not doc_row:
-                    return jsonify({
-                        "success": False,
-                        "error": {
-                            "message": "Validation error",
-                            "field_errors": {"doctor_id": "Selected doctor is not available"},
-                        },
-                    }), 400
-                preferred_doctor = doc_row.get("full_name")
-
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO quote_requests
-                    (first_name, last_name, gender, dob, phone, email, service_categories,
-                     doctor_id, message, status)
-                VALUES
-                    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id, created_at;
-                """,
-                (
-                    first_name,
-                    last_name,
-                    gender,
-                    dob,
-                    phone,
-                    email,
-                    json.dumps(service_categories),
-                    doctor_id,
-                    message,
-                    "new",
-                ),
-            )
-            row = cur.fetchone()
-            quote_request_id = row.get("id")
-            created_at = row.get("created_at")
-        conn.commit()
+    cleanup_stale_staging(STAGING_MAX_AGE_SECONDS)
+    staging = new_staging_dir()
 
-    folder = QUOTE_UPLOADS_ROOT / str(quote_request_id)
+    # Files are stored under the request id before its rows are written, so
+    # a committed request never points at files no node can serve.
+    try:
+        saved_files = []
+        if id_document:
+            saved_files.append(("id", _save_file(id_document, staging)))
+        for doc in valid_documents:
+            saved_files.append(("documents", _save_file(doc, staging)))
 
-    if id_document:
-        saved = _save_file(id_document, folder)
         with get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO quote_request_files
-                        (quote_request_id, kind, stored_filename, original_filename, mime, size)
-                    VALUES
-                        (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (
-                        quote_request_id,
-                        "id",
-                        saved["stored_filename"],
-                        saved["original_filename"],
-                        saved["mime"],
-                        saved["size"],
-                    ),
-                )
-            conn.commit()
+                if doctor_id is not None:
+                    cur.execute(
+                        "SELECT id, full_name FROM doctors WHERE id = %s AND is_active = TRUE",
+                        (doctor_id,),
+                    )
+                    doc_row = cur.fetchone()
+                    if not doc_row:
+                        return jsonify({
+                            "success": False,
+                            "error": {
+                                "message": "Validation error",
+                                "field_errors": {"doctor_id": "Selected doctor is not available"},
+                            },
+                        }), 400
+                    preferred_doctor = doc_row.get("full_name")
+
+                cur.execute("SELECT nextval(pg_get_serial_sequence('quote_requests', 'id')) AS id")
+                quote_request_id = cur.fetchone().get("id")
+
+        try:
+            published = _publish_staging(staging, quote_request_id)
+        except Exception:
+            logger.exception("Could not store the files of quote request %s", quote_request_id)
+            return error_response(503, "storage_unavailable", "Could not store the uploaded files, please try again")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
 
-    for doc in valid_documents:
-        saved = _save_file(doc, folder)
+    try:
         with get_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     """
-                    INSERT INTO quote_request_files
-                        (quote_request_id, kind, stored_filename, original_filename, mime, size)
+                    INSERT INTO quote_requests
+                        (id, first_name, last_name, gender, dob, phone, email, service_categories,
+                         doctor_id, message, status)
                     VALUES
-                        (%s, %s, %s, %s, %s, %s)
+                        (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    RETURNING created_at;
                     """,
                     (
                         quote_request_id,
-                        "documents",
-                        saved["stored_filename"],
-                        saved["original_filename"],
-                        saved["mime"],
-                        saved["size"],
+                        first_name,
+                        last_name,
+                        gender,
+                        dob,
+                        phone,
+                        email,
+                        json.dumps(service_categories),
+                        doctor_id,
+                        message,
+                        "new",
                     ),
                 )
+                created_at = cur.fetchone().get("created_at")
+
+                if saved_files:
+                    cur.executemany(
+                        """
+                        INSERT INTO quote_request_files
+                            (quote_request_id, kind, stored_filename, original_filename, mime, size)
+                        VALUES
+                            (%s, %s, %s, %s, %s, %s)
+                        """,
+                        [
+                            (
+                                quote_request_id,
+                                kind,
+                                saved["stored_filename"],
+                                saved["original_filename"],
+                                saved["mime"],
+                                saved["size"],
+                            )
+                            for kind, saved in saved_files
+                        ],
+                    )
             conn.commit()
+    except Exception:
+        _unpublish(published)
+        raise
+
+    _invalidate_status_counts()
 
     uploaded_files_count = len(valid_documents) + (1 if id_document else 0)
     submitted_at = created_at.isoformat() if isinstance(created_at, datetime.datetime) else ""
@@ -326,70 +513,217 @@ def create_quote_request():
     return success_response({"id": quote_request_id}, 201)
 
 
-@quote_requests_bp.get("/api/admin/quote-requests")
-def admin_list_quote_requests():
-    guard = _require_admin()
-    if guard:
-        return guard
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _prefix_tsquery(q: str):
+    # Every word becomes a prefix match ("card" finds "cardiology"); words are
+    # restricted to letters and digits so the text is always a valid tsquery.
+    words = re.findall(r"[^\W_]+", q.lower())
+    if not words:
+        return None
+    return " & ".join(f"{w}:*" for w in words)
+
 
-    status = (request.args.get("status") or "").strip().lower()
-    q = (request.args.get("q") or "").strip()
-    from_date = (request.args.get("from") or "").strip()
-    to_date = (request.args.get("to") or "").strip()
+def _build_quote_filters(args) -> dict:
+    status = (args.get("status") or "").strip().lower()
+    q = (args.get("q") or "").strip()
+    category = (args.get("category") or "").strip()
+    from_date = (args.get("from") or "").strip()
+    to_date = (args.get("to") or "").strip()
 
     filters = []
     params = []
+    tsquery = None
 
     if status:
         filters.append("qr.status = %s")
         params.append(status)
 
-    if q:
-        filters.append(
-            "(LOWER(qr.first_name) LIKE %s OR LOWER(qr.last_name) LIKE %s OR LOWER(qr.email) LIKE %s "
-            "OR LOWER(qr.phone) LIKE %s OR LOWER(qr.message) LIKE %s)"
-        )
-        like = f"%{q.lower()}%"
-        params.extend([like, like, like, like, like])
+    if category:
+        filters.append("qr.service_categories @> %s::jsonb")
+        params.append(json.dumps([category]))
 
+    if q:
+        # Full-text match (GIN on search_vector) ranks whole and prefix
+        # words; trigram-indexed ILIKE keeps substring matches anywhere in
+        # the name, email, phone or message.
+        like = f"%{_escape_like(q)}%"
+        tsquery = _prefix_tsquery(q)
+        predicates = [
+            "qr.first_name ILIKE %s",
+            "qr.last_name ILIKE %s",
+            "qr.email ILIKE %s",
+            "qr.phone ILIKE %s",
+            "qr.message ILIKE %s",
+        ]
+        params_q = [like] * len(predicates)
+        if tsquery:
+            predicates.insert(0, "qr.search_vector @@ to_tsquery('simple', %s)")
+            params_q.insert(0, tsquery)
+        filters.append("(" + " OR ".join(predicates) + ")")
+        params.extend(params_q)
+
+    # Half-open [from, to + 1 day) ranges on the raw column keep the
+    # created_at indexes usable; casting the column to ::date would not.
     if from_date:
         try:
-            datetime.date.fromisoformat(from_date)
-            filters.append("qr.created_at::date >= %s")
-            params.append(from_date)
+            start = datetime.date.fromisoformat(from_date)
+            filters.append("qr.created_at >= %s")
+            params.append(start)
         except ValueError:
             pass
 
     if to_date:
         try:
-            datetime.date.fromisoformat(to_date)
-            filters.append("qr.created_at::date <= %s")
-            params.append(to_date)
+            end = datetime.date.fromisoformat(to_date) + datetime.timedelta(days=1)
+            filters.append("qr.created_at < %s")
+            params.append(end)
         except ValueError:
             pass
 
-    sql = """
+    return {
+        "filters": filters,
+        "params": params,
+        "tsquery": tsquery,
+    }
+
+
+def _where_sql(filters) -> str:
+    return (" WHERE " + " AND ".join(filters)) if filters else ""
+
+
+def _encode_cursor(created_at, row_id) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(value: str):
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        created_at_raw, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.datetime.fromisoformat(created_at_raw), int(row_id)
+    except Exception:
+        return None
+
+
+def _parse_page_size(raw):
+    if raw is None or str(raw).strip() == "":
+        return DEFAULT_PAGE_SIZE
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return None
+    if value < 1:
+        return None
+    return min(value, MAX_PAGE_SIZE)
+
+
+def _invalidate_status_counts():
+    with _status_counts_lock:
+        _status_counts_cache["expires_at"] = 0.0
+
+
+def _status_counts() -> dict:
+    now = time.monotonic()
+    with _status_counts_lock:
+        if _status_counts_cache["value"] is not None and now < _status_counts_cache["expires_at"]:
+            metrics.record_cache("quote_status_counts", True)
+            return _status_counts_cache["value"]
+    metrics.record_cache("quote_status_counts", False)
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT status, COUNT(*) AS count FROM quote_requests GROUP BY status")
+            rows = cur.fetchall() or []
+
+    counts = {s: 0 for s in sorted(ALLOWED_STATUS)}
+    for r in rows:
+        counts[str(r.get("status") or "")] = int(r.get("count") or 0)
+    counts["all"] = sum(counts.values())
+
+    with _status_counts_lock:
+        _status_counts_cache["value"] = counts
+        _status_counts_cache["expires_at"] = time.monotonic() + STATUS_COUNTS_TTL_SECONDS
+    return counts
+
+
+def _highlight(snippet):
+    if not snippet:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+
+@quote_requests_bp.get("/api/admin/quote-requests")
+def admin_list_quote_requests():
+    guard = _require_admin()
+    if guard:
+        return guard
+
+    built = _build_quote_filters(request.args)
+    tsquery = built["tsquery"]
+    sort = (request.args.get("sort") or "").strip().lower()
+    by_relevance = bool(tsquery) and sort == "relevance"
+
+    limit = _parse_page_size(request.args.get("limit"))
+    if limit is None:
+        return error_response(400, "validation_error", "limit must be a positive integer")
+
+    filters = list(built["filters"])
+    params = list(built["params"])
+
+    cursor_raw = (request.args.get("cursor") or "").strip()
+    if cursor_raw and not by_relevance:
+        decoded = _decode_cursor(cursor_raw)
+        if not decoded:
+            return error_response(400, "validation_error", "Invalid cursor")
+        filters.append("(qr.created_at, qr.id) < (%s, %s)")
+        params.extend(decoded)
+
+    select_params = []
+    if tsquery:
+        search_columns = """,
+               ts_rank(qr.search_vector, to_tsquery('simple', %s)) AS rank,
+               ts_headline('simple', qr.message, to_tsquery('simple', %s), %s) AS snippet"""
+        select_params = [tsquery, tsquery, HEADLINE_OPTIONS]
+    else:
+        search_columns = ""
+
+    sql = f"""
         SELECT qr.id, qr.first_name, qr.last_name, qr.email, qr.phone,
                qr.status, qr.service_categories, qr.created_at,
-               d.full_name AS doctor_name
+               d.full_name AS doctor_name{search_columns}
         FROM quote_requests qr
         LEFT JOIN doctors d ON d.id = qr.doctor_id
     """
 
-    if filters:
-        sql += " WHERE " + " AND ".join(filters)
+    sql += _where_sql(filters)
 
-    sql += " ORDER BY qr.created_at DESC"
+    if by_relevance:
+        # Relevance ordering has no stable keyset; it returns the top page only.
+        sql += " ORDER BY rank DESC, qr.created_at DESC, qr.id DESC"
+    else:
+        sql += " ORDER BY qr.created_at DESC, qr.id DESC"
+    sql += " LIMIT %s"
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, tuple(params))
+            cur.execute(sql, tuple(select_params + params + [limit + 1]))
             rows = cur.fetchall() or []
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if not by_relevance and isinstance(last.get("created_at"), datetime.datetime):
+            next_cursor = _encode_cursor(last.get("created_at"), last.get("id"))
+
     items = []
     for r in rows:
         categories = _categories_from_row(r.get("service_categories"))
-        items.append({
+        item = {
             "id": r.get("id"),
             "created_at": r.get("created_at"),
             "full_name": f"{r.get('first_name')} {r.get('last_name')}".strip(),
@@ -398,52 +732,31 @@ def admin_list_quote_requests():
             "status": r.get("status"),
             "preferred_doctor": r.get("doctor_name"),
             "categories": categories,
-        })
+        }
+        if tsquery:
+            item["rank"] = float(r.get("rank") or 0)
+            item["snippet"] = _highlight(r.get("snippet"))
+        items.append(item)
 
-    return success_response({"count": len(items), "items": items})
+    return success_response({"count": len(items), "items": items, "next_cursor": next_cursor})
 
 
-@quote_requests_bp.get("/api/admin/quote-requests/export")
-def admin_export_quote_requests():
+@quote_requests_bp.get("/api/admin/quote-requests/counts")
+def admin_quote_request_counts():
     guard = _require_admin()
     if guard:
         return guard
 
-    status = (request.args.get("status") or "").strip().lower()
-    q = (request.args.get("q") or "").strip()
-    from_date = (request.args.get("from") or "").strip()
-    to_date = (request.args.get("to") or "").strip()
-
-    filters = []
-    params = []
+    return success_response(_status_counts())
 
-    if status:
-        filters.append("qr.status = %s")
-        params.append(status)
 
-    if q:
-        filters.append(
-            "(LOWER(qr.first_name) LIKE %s OR LOWER(qr.last_name) LIKE %s OR LOWER(qr.email) LIKE %s "
-            "OR LOWER(qr.phone) LIKE %s OR LOWER(qr.message) LIKE %s)"
-        )
-        like = f"%{q.lower()}%"
-        params.extend([like, like, like, like, like])
+@quote_requests_bp.get("/api/admin/quote-requests/export")
+def admin_export_quote_requests():
+    guard = _require_admin()
+    if guard:
+        return guard
 
-    if from_date:
-        try:
-            datetime.date.fromisoformat(from_date)
-            filters.append("qr.created_at::date >= %s")
-            params.append(from_date)
-        except ValueError:
-            pass
-
-    if to_date:
-        try:
-            datetime.date.fromisoformat(to_date)
-            filters.append("qr.created_at::date <= %s")
-            params.append(to_date)
-        except ValueError:
-            pass
+    built = _build_quote_filters(request.args)
 
     sql = """
         SELECT qr.id, qr.first_name, qr.last_name, qr.email, qr.phone,
@@ -454,14 +767,12 @@ def admin_export_quote_requests():
         LEFT JOIN doctors d ON d.id = qr.doctor_id
     """
 
-    if filters:
-        sql += " WHERE " + " AND ".join(filters)
-
-    sql += " ORDER BY qr.created_at DESC"
+    sql += _where_sql(built["filters"])
+    sql += " ORDER BY qr.created_at DESC, qr.id DESC"
 
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, tuple(params))
+            cur.execute(sql, tuple(built["params"]))
             rows = cur.fetchall() or []
 
     output = io.StringIO()
@@ -571,7 +882,11 @@ def admin_get_quote_request(quote_request_id: int):
             "download_url": f"/api/admin/quote-requests/{quote_request_id}/files/{f.get('id')}/download",
         })
 
-    return success_response({"request": request_data, "files": file_items})
+    return success_response({
+        "request": request_data,
+        "files": file_items,
+        "archive_url": f"/api/admin/quote-requests/{quote_request_id}/files/archive" if file_items else None,
+    })
 
 
 @quote_requests_bp.patch("/api/admin/quote-requests/<int:quote_request_id>")
@@ -614,6 +929,9 @@ def admin_update_quote_request(quote_request_id: int):
     if not row:
         return error_response(404, "not_found", "Quote request not found")
 
+    if status:
+        _invalidate_status_counts()
+
     return success_response({
         "id": row.get("id"),
         "status": row.get("status"),
@@ -646,13 +964,47 @@ def admin_download_quote_request_file(quote_request_id: int, file_id: int):
 
     stored = row.get("stored_filename")
     original = row.get("original_filename")
-    file_path = QUOTE_UPLOADS_ROOT / str(quote_request_id) / stored
-
-    if not file_path.exists():
-        return error_response(404, "not_found", "File not found")
 
-    return send_file(
-        str(file_path),
-        as_attachment=True,
+    response = get_storage().send(
+        _file_key(quote_request_id, stored),
         download_name=original,
+        as_attachment=True,
     )
+    if response is None:
+        return error_response(404, "not_found", "File not found")
+    return response
+
+
+@quote_requests_bp.get("/api/admin/quote-requests/<int:quote_request_id>/files/archive")
+def admin_download_quote_request_archive(quote_request_id: int):
+    guard = _require_admin()
+    if guard:
+        return guard
+
+    return _archive_response([quote_request_id], f"quote-request-{quote_request_id}-files.zip")
+
+
+@quote_requests_bp.get("/api/admin/quote-requests/files/archive")
+def admin_download_quote_requests_archive():
+    guard = _require_admin()
+    if guard:
+        return guard
+
+    raw_ids = (request.args.get("ids") or "").strip()
+    ids = []
+    for part in raw_ids.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            ids.append(int(part))
+        except ValueError:
+            return error_response(400, "validation_error", "ids must be a comma-separated list of integers")
+
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return error_response(400, "validation_error", "ids is required")
+    if len(ids) > MAX_ARCHIVE_REQUESTS:
+        return error_response(400, "validation_error", f"At most {MAX_ARCHIVE_REQUESTS} quote requests per archive")
+
+    return _archive_response(ids, "quote-requests-files.zip")
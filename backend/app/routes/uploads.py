@@ -1,16 +1,29 @@
-from pathlib import Path
-from flask import Blueprint, send_from_directory, abort
+from flask import Blueprint, abort, session
+
+from app.routes.utils import success_response, error_response
+from app.storage import get_storage, storage_metrics
 
 
 uploads_bp = Blueprint("uploads", __name__)
 
-AVATARS_DIR = Path(__file__).resolve().parents[2] / "uploads" / "avatars"
+AVATARS_PREFIX = "avatars"
 
 
 @uploads_bp.get("/uploads/avatars/<path:filename>")
 def serve_avatar(filename: str):
-    if not filename or "/" in filename or "\\" in filename:
+    if not filename or "/" in filename or "\\" in filename or filename.startswith("."):
         return abort(404)
-    if not AVATARS_DIR.exists():
+    response = get_storage().send(f"{AVATARS_PREFIX}/{filename}")
+    if response is None:
         return abort(404)
-    return send_from_directory(AVATARS_DIR, filename)
+    return response
+
+
+@uploads_bp.get("/api/admin/storage/metrics")
+def admin_storage_metrics():
+    role = (session.get("role") or "").strip().lower()
+    if not role:
+        return error_response(401, "unauthorized", "Unauthorized")
+    if role != "admin":
+        return error_response(403, "forbidden", "Forbidden")
+    return success_response(storage_metrics())
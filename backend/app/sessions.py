@@ -0,0 +1,347 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+from app import metrics
+from app.db import fetch_one_named, get_connection
+
+# SESSION_BACKEND=cookie (default) keeps Flask's signed-cookie sessions.
+# With postgres or memory the cookie carries only a signed random id and the
+# session lives server-side, so it can be revoked and picks up role changes.
+#
+# postgres: each worker caches sessions in an LRU for SESSION_CACHE_SECONDS,
+# so a revocation made by another worker takes up to that long to apply.
+# Last-seen times are written in one batch every SESSION_TOUCH_SECONDS.
+# memory: one process only; for local runs and single-worker deployments.
+LIFETIME_SECONDS = int(os.getenv("SESSION_LIFETIME_SECONDS", str(14 * 24 * 3600)))
+CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+CACHE_SECONDS = float(os.getenv("SESSION_CACHE_SECONDS", "10"))
+TOUCH_SECONDS = float(os.getenv("SESSION_TOUCH_SECONDS", "60"))
+PURGE_SECONDS = 3600
+
+# Copied from users on every load, so a role change applies without a new login.
+USER_FIELDS = ("role", "email", "patient_id", "doctor_id")
+
+logger = logging.getLogger("medconnect.sessions")
+
+
+def backend() -> str:
+    return (os.getenv("SESSION_BACKEND") or "cookie").strip().lower()
+
+
+def enabled() -> bool:
+    return backend() != "cookie"
+
+
+def _key(sid: str) -> str:
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class MemoryStore:
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def load(self, key: str):
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None or entry["expires_at"] <= _utcnow():
+                return None
+            return dict(entry["data"])
+
+    def save(self, key: str, user_id, data: dict):
+        now = _utcnow()
+        with self._lock:
+            entry = self._sessions.setdefault(key, {"id": key, "created_at": now})
+            entry.update(
+                user_id=user_id,
+                data=dict(data),
+                last_seen_at=now,
+                expires_at=now + datetime.timedelta(seconds=LIFETIME_SECONDS),
+            )
+
+    def touch(self, key: str):
+        now = _utcnow()
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None:
+                entry["last_seen_at"] = now
+                entry["expires_at"] = now + datetime.timedelta(seconds=LIFETIME_SECONDS)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def list_user(self, user_id: int) -> list:
+        now = _utcnow()
+        with self._lock:
+            entries = [e for e in self._sessions.values() if e["user_id"] == user_id and e["expires_at"] > now]
+        fields = ("id", "created_at", "last_seen_at", "expires_at")
+        return sorted(({f: e[f] for f in fields} for e in entries), key=lambda e: e["last_seen_at"], reverse=True)
+
+    def revoke(self, user_id: int, key: str = None) -> int:
+        with self._lock:
+            keys = [k for k, e in self._sessions.items() if e["user_id"] == user_id and (key is None or k == key)]
+            for k in keys:
+                del self._sessions[k]
+        return len(keys)
+
+
+class PostgresStore:
+    def __init__(self):
+        # key -> (session data, monotonic time it was read)
+        self._cache = OrderedDict()
+        self._touched = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._last_purge = 0.0
+
+    def _cache_put(self, key: str, data: dict):
+        with self._lock:
+            self._cache[key] = (data, time.monotonic())
+            self._cache.move_to_end(key)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def load(self, key: str):
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and time.monotonic() - hit[1] < CACHE_SECONDS:
+                self._cache.move_to_end(key)
+                metrics.record_cache("session", True)
+                return dict(hit[0])
+        metrics.record_cache("session", False)
+
+        row = fetch_one_named("session_by_key", (key,))
+        if not row:
+            with self._lock:
+                self._cache.pop(key, None)
+            return None
+        data = dict(row["data"] or {})
+        if row.get("user_id") is not None and row.get("role") is not None:
+            data.update({field: row.get(field) for field in USER_FIELDS})
+        self._cache_put(key, data)
+        return dict(data)
+
+    def save(self, key: str, user_id, data: dict):
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO user_sessions (id, user_id, data, expires_at)
+                    VALUES (%s, %s, %s::jsonb, NOW() + make_interval(secs => %s))
+                    ON CONFLICT (id) DO UPDATE SET
+                        user_id = EXCLUDED.user_id,
+                        data = EXCLUDED.data,
+                        last_seen_at = NOW(),
+                        expires_at = EXCLUDED.expires_at
+                    """,
+                    (key, user_id, json.dumps(data, default=str), LIFETIME_SECONDS),
+                )
+            conn.commit()
+        self._cache_put(key, dict(data))
+
+    def touch(self, key: str):
+        self._ensure_thread()
+        with self._lock:
+            self._touched.add(key)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._cache.pop(key, None)
+            self._touched.discard(key)
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM user_sessions WHERE id = %s", (key,))
+            conn.commit()
+
+    def list_user(self, user_id: int) -> list:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT id, created_at, last_seen_at, expires_at
+                    FROM user_sessions
+                    WHERE user_id = %s AND expires_at > NOW()
+                    ORDER BY last_seen_at DESC
+                    """,
+                    (user_id,),
+                )
+                return cur.fetchall() or []
+
+    def revoke(self, user_id: int, key: str = None) -> int:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                if key is None:
+                    cur.execute("DELETE FROM user_sessions WHERE user_id = %s RETURNING id", (user_id,))
+                else:
+                    cur.execute("DELETE FROM user_sessions WHERE user_id = %s AND id = %s RETURNING id", (user_id, key))
+                keys = [r["id"] for r in cur.fetchall() or []]
+            conn.commit()
+        with self._lock:
+            for k in keys:
+                self._cache.pop(k, None)
+                self._touched.discard(k)
+        return len(keys)
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name="session-touch", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(TOUCH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("session last-seen flush failed")
+
+    def flush(self):
+        with self._lock:
+            keys, self._touched = list(self._touched), set()
+        purge = time.monotonic() - self._last_purge > PURGE_SECONDS
+        if not keys and not purge:
+            return
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                if keys:
+                    cur.execute(
+                        """
+                        UPDATE user_sessions
+                        SET last_seen_at = NOW(), expires_at = NOW() + make_interval(secs => %s)
+                        WHERE id = ANY(%s) AND expires_at > NOW()
+                        """,
+                        (LIFETIME_SECONDS, keys),
+                    )
+                if purge:
+                    self._last_purge = time.monotonic()
+                    cur.execute("DELETE FROM user_sessions WHERE expires_at < NOW()")
+            conn.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PostgresStore() if backend() == "postgres" else MemoryStore()
+    return _store
+
+
+class ServerSession(SecureCookieSession):
+    def __init__(self, initial=None, sid: str = None, stale: bool = False):
+        super().__init__(initial)
+        self.sid = sid
+        # The request sent a cookie for a session that no longer exists.
+        self.stale = stale
+        self.loaded_user_id = self.get("user_id")
+        self.accessed = False
+
+
+class ServerSessionInterface(SessionInterface):
+    salt = "server-session"
+
+    def _signer(self, app):
+        if not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt=self.salt, key_derivation="hmac")
+
+    def open_session(self, app, request):
+        signer = self._signer(app)
+        if signer is None:
+            return None
+        token = request.cookies.get(self.get_cookie_name(app))
+        if not token:
+            return ServerSession()
+        try:
+            sid = signer.unsign(token).decode()
+        except BadSignature:
+            return ServerSession(stale=True)
+        store = get_store()
+        data = store.load(_key(sid))
+        if data is None:
+            return ServerSession(stale=True)
+        store.touch(_key(sid))
+        return ServerSession(data, sid=sid)
+
+    def save_session(self, app, session, response):
+        cookie = {
+            "domain": self.get_cookie_domain(app),
+            "path": self.get_cookie_path(app),
+            "secure": self.get_cookie_secure(app),
+            "samesite": self.get_cookie_samesite(app),
+            "httponly": self.get_cookie_httponly(app),
+        }
+        name = self.get_cookie_name(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+        store = get_store()
+
+        if not session:
+            if session.sid:
+                store.delete(_key(session.sid))
+            if session.sid or session.stale:
+                response.delete_cookie(name, **cookie)
+                response.vary.add("Cookie")
+            return
+        if not session.modified:
+            return
+
+        sid = session.sid
+        if sid is None or session.get("user_id") != session.loaded_user_id:
+            # A login gets a fresh id, so an id seen before it is never reused.
+            if sid:
+                store.delete(_key(sid))
+            sid = secrets.token_urlsafe(24)
+        store.save(_key(sid), session.get("user_id"), dict(session))
+        if sid != session.sid or session.permanent:
+            token = self._signer(app).sign(sid).decode()
+            response.set_cookie(name, token, expires=self.get_expiration_time(app, session), **cookie)
+            response.vary.add("Cookie")
+
+
+def quart_interface():
+    """The same sessions for app.asgi's Quart app; store calls run on a thread."""
+    from quart.sessions import SessionInterface as QuartSessionInterface
+
+    shared = ServerSessionInterface()
+
+    class AsyncServerSessionInterface(QuartSessionInterface):
+        async def open_session(self, app, request):
+            return await asyncio.to_thread(shared.open_session, app, request)
+
+        async def save_session(self, app, session, response):
+            if response is not None:
+                await asyncio.to_thread(shared.save_session, app, session, response)
+
+    return AsyncServerSessionInterface()
+
+
+def init_app(app):
+    if enabled():
+        app.session_interface = ServerSessionInterface()
@@ -0,0 +1,146 @@
+import datetime
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+
+# Opt-in: nothing is recorded unless SLOW_QUERY_MS is set. Only the shape
+# of parameters is kept, never their values, since most tables hold
+# patient data.
+EXPLAIN_TIMEOUT_MS = 10_000
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WRITE_KEYWORDS = re.compile(r"\b(insert|update|delete|merge|truncate|drop|alter|create|grant|call)\b", re.I)
+
+_lock = threading.Lock()
+_entries = deque(maxlen=int(os.getenv("SLOW_QUERY_BUFFER", "200")))
+_last_explained = {}
+_explain_running = threading.Semaphore(1)
+
+
+def threshold_seconds():
+    value = (os.getenv("SLOW_QUERY_MS") or "").strip()
+    if not value:
+        return None
+    return float(value) / 1000.0
+
+
+def normalize_sql(query) -> str:
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        # psycopg.sql.Composed and friends
+        query = str(query)
+    text = _STRING_LITERAL.sub("?", query)
+    text = _NUMBER_LITERAL.sub("?", text)
+    return _WHITESPACE.sub(" ", text).strip().rstrip(";")
+
+
+def params_shape(params):
+    def shape(value):
+        if value is None:
+            return "null"
+        if isinstance(value, (list, tuple)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: shape(v) for k, v in params.items()}
+    return [shape(v) for v in params]
+
+
+def _is_read_only(sql: str) -> bool:
+    # EXPLAIN ANALYZE really executes the statement, so only plain reads
+    # are ever explained.
+    head = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ""
+    return head in ("select", "with") and not _WRITE_KEYWORDS.search(sql)
+
+
+def _should_explain(fingerprint: str) -> bool:
+    interval = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+    now = time.monotonic()
+    with _lock:
+        last = _last_explained.get(fingerprint)
+        if last is not None and now - last < interval:
+            return False
+        _last_explained[fingerprint] = now
+    return True
+
+
+def _explain(dsn: str, query, params, entry: dict):
+    try:
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            conn.execute(f"SET statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+            with conn.transaction(force_rollback=True):
+                conn.execute("SET TRANSACTION READ ONLY")
+                rows = conn.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params).fetchall()
+        entry["explain"] = "\n".join(row[0] for row in rows)
+    except Exception as e:
+        entry["explain_error"] = str(e)
+    finally:
+        _explain_running.release()
+
+
+def record(conn, query, params, seconds: float, rows: int):
+    threshold = threshold_seconds()
+    if threshold is None or seconds < threshold:
+        return
+    sql = normalize_sql(query)
+    fingerprint = hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12]
+    entry = {
+        "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "fingerprint": fingerprint,
+        "sql": sql,
+        "params": params_shape(params),
+        "duration_ms": round(seconds * 1000, 2),
+        "rows": rows if rows and rows > 0 else 0,
+        "endpoint": _current_endpoint(),
+        "explain": None,
+    }
+    with _lock:
+        _entries.append(entry)
+
+    if not isinstance(query, str) or not _is_read_only(query):
+        return
+    if os.getenv("SLOW_QUERY_EXPLAIN", "true").strip().lower() in ("0", "false", "no", "off"):
+        return
+    if not _should_explain(fingerprint):
+        return
+    if not _explain_running.acquire(blocking=False):
+        return
+    # Re-run on a separate read-only connection in the background so the
+    # slow request is not made slower by its own EXPLAIN.
+    dsn = make_conninfo(conn.info.dsn, password=conn.info.password)
+    threading.Thread(target=_explain, args=(dsn, query, params, entry), daemon=True).start()
+
+
+def _current_endpoint():
+    try:
+        from flask import has_request_context, request
+    except ImportError:  # pragma: no cover
+        return None
+    if has_request_context():
+        return request.endpoint
+    return None
+
+
+def snapshot(limit: int = 50) -> list:
+    with _lock:
+        items = list(_entries)
+    items.reverse()
+    return [dict(e) for e in items[:limit]]
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _last_explained.clear()
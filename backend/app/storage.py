@@ -0,0 +1,359 @@
+import hashlib
+import mimetypes
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+from flask import Response, redirect, send_file
+
+from app import metrics
+
+
+UPLOADS_ROOT = Path(os.getenv("UPLOADS_DIR") or (Path(__file__).resolve().parents[1] / "uploads"))
+STAGING_ROOT = UPLOADS_ROOT / ".staging"
+
+COPY_CHUNK_SIZE = 64 * 1024
+OFFLOAD_MODES = {"", "x-accel", "x-sendfile"}
+
+
+class StorageError(Exception):
+    pass
+
+
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def record(self, op: str, nbytes: int = 0, seconds: float = 0.0, ok: bool = True):
+        with self._lock:
+            stats = self._ops.setdefault(op, {"count": 0, "errors": 0, "bytes": 0, "seconds": 0.0})
+            stats["count"] += 1
+            stats["bytes"] += nbytes
+            stats["seconds"] += seconds
+            if not ok:
+                stats["errors"] += 1
+        metrics.observe_storage(op, nbytes, ok)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {op: dict(stats) for op, stats in self._ops.items()}
+
+
+def _copy_stream(src, dst) -> int:
+    total = 0
+    while True:
+        chunk = src.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            break
+        dst.write(chunk)
+        total += len(chunk)
+    return total
+
+
+def _clean_key(key: str) -> str:
+    parts = [p for p in str(key or "").replace("\\", "/").split("/") if p]
+    if not parts or any(p in (".", "..") for p in parts):
+        raise StorageError(f"Invalid storage key: {key!r}")
+    return "/".join(parts)
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: Path, shard_depth: int = 0, offload: str = "", offload_prefix: str = "/_uploads/"):
+        self.root = Path(root)
+        self.shard_depth = max(0, int(shard_depth))
+        if offload not in OFFLOAD_MODES:
+            raise RuntimeError(f"Unknown UPLOADS_OFFLOAD mode: {offload}")
+        self.offload = offload
+        self.offload_prefix = "/" + offload_prefix.strip("/") + "/"
+        self.metrics = _Metrics()
+
+    def _legacy_path(self, key: str) -> Path:
+        return self.root / key
+
+    def path_for(self, key: str) -> Path:
+        key = _clean_key(key)
+        if not self.shard_depth:
+            return self._legacy_path(key)
+        # Shard on a hash of the key so a single hot directory (e.g. avatars/)
+        # does not grow to millions of entries: avatars/ab/cd/<name>.
+        head, _, name = key.rpartition("/")
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        shards = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        return self.root.joinpath(*([head] if head else []), *shards, name)
+
+    def _existing_path(self, key: str):
+        path = self.path_for(key)
+        if path.is_file():
+            return path
+        if self.shard_depth:
+            legacy = self._legacy_path(_clean_key(key))
+            if legacy.is_file():
+                return legacy
+        return None
+
+    def put(self, key: str, stream) -> int:
+        target = self.path_for(key)
+        started = time.perf_counter()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                size = _copy_stream(stream, f)
+            os.replace(tmp, target)
+        except Exception:
+            self.metrics.record("put", seconds=time.perf_counter() - started, ok=False)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            raise
+        self.metrics.record("put", size, time.perf_counter() - started)
+        return size
+
+    def put_file(self, key: str, source: Path) -> int:
+        target = self.path_for(key)
+        started = time.perf_counter()
+        source = Path(source)
+        size = source.stat().st_size
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, target)
+        except OSError:
+            with open(source, "rb") as f:
+                self.put(key, f)
+            source.unlink()
+            return size
+        self.metrics.record("put", size, time.perf_counter() - started)
+        return size
+
+    def open(self, key: str):
+        path = self._existing_path(key)
+        if path is None:
+            self.metrics.record("get", ok=False)
+            raise FileNotFoundError(key)
+        self.metrics.record("get", path.stat().st_size)
+        return open(path, "rb")
+
+    def exists(self, key: str) -> bool:
+        return self._existing_path(key) is not None
+
+    def size(self, key: str) -> int:
+        path = self._existing_path(key)
+        if path is None:
+            raise FileNotFoundError(key)
+        return path.stat().st_size
+
+    def delete(self, key: str) -> bool:
+        path = self._existing_path(key)
+        if path is None:
+            return False
+        try:
+            path.unlink()
+        except OSError:
+            self.metrics.record("delete", ok=False)
+            return False
+        self.metrics.record("delete")
+        return True
+
+    def send(self, key: str, download_name: str = None, as_attachment: bool = False, mimetype: str = None):
+        path = self._existing_path(key)
+        if path is None:
+            return None
+        self.metrics.record("send", path.stat().st_size)
+        if self.offload:
+            return self._offload_response(path, download_name, as_attachment, mimetype)
+        # send_file wraps the file with the server's wsgi.file_wrapper, which
+        # gunicorn implements with os.sendfile, so bytes are not copied through
+        # Python buffers even without a proxy in front.
+        return send_file(
+            str(path),
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name or path.name,
+        )
+
+    def _offload_response(self, path: Path, download_name: str, as_attachment: bool, mimetype: str):
+        name = download_name or path.name
+        if not mimetype:
+            mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        response = Response(status=200, mimetype=mimetype)
+        disposition = "attachment" if as_attachment else "inline"
+        response.headers["Content-Disposition"] = f"{disposition}; filename*=UTF-8''{quote(name)}"
+        if self.offload == "x-accel":
+            # nginx: location /_uploads/ { internal; alias <UPLOADS_DIR>/; }
+            relative = path.relative_to(self.root).as_posix()
+            response.headers["X-Accel-Redirect"] = self.offload_prefix + quote(relative)
+        else:
+            # lighttpd / Apache mod_xsendfile
+            response.headers["X-Sendfile"] = str(path.resolve())
+        return response
+
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None, region: str = None,
+                 presign_expires: int = 300):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.presign_expires = presign_expires
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=os.getenv("S3_ACCESS_KEY_ID") or None,
+            aws_secret_access_key=os.getenv("S3_SECRET_ACCESS_KEY") or None,
+        )
+        self.metrics = _Metrics()
+
+    def _object_key(self, key: str) -> str:
+        key = _clean_key(key)
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, stream) -> int:
+        started = time.perf_counter()
+        counter = _CountingReader(stream)
+        try:
+            # upload_fileobj streams in multipart chunks; nothing is buffered whole.
+            self.client.upload_fileobj(counter, self.bucket, self._object_key(key))
+        except Exception:
+            self.metrics.record("put", seconds=time.perf_counter() - started, ok=False)
+            raise
+        self.metrics.record("put", counter.count, time.perf_counter() - started)
+        return counter.count
+
+    def put_file(self, key: str, source: Path) -> int:
+        source = Path(source)
+        with open(source, "rb") as f:
+            size = self.put(key, f)
+        source.unlink()
+        return size
+
+    def open(self, key: str):
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except self.client.exceptions.NoSuchKey:
+            self.metrics.record("get", ok=False)
+            raise FileNotFoundError(key)
+        self.metrics.record("get", obj.get("ContentLength") or 0)
+        return obj["Body"]
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception:
+            return False
+
+    def size(self, key: str) -> int:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception:
+            raise FileNotFoundError(key)
+        return int(head.get("ContentLength") or 0)
+
+    def delete(self, key: str) -> bool:
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception:
+            self.metrics.record("delete", ok=False)
+            return False
+        self.metrics.record("delete")
+        return True
+
+    def send(self, key: str, download_name: str = None, as_attachment: bool = False, mimetype: str = None):
+        if not self.exists(key):
+            return None
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if as_attachment:
+            name = (download_name or Path(key).name).replace('"', "")
+            params["ResponseContentDisposition"] = f'attachment; filename="{name}"'
+        if mimetype:
+            params["ResponseContentType"] = mimetype
+        url = self.client.generate_presigned_url(
+            "get_object",
+            Params=params,
+            ExpiresIn=self.presign_expires,
+        )
+        self.metrics.record("send")
+        return redirect(url, code=302)
+
+
+class _CountingReader:
+    def __init__(self, stream):
+        self._stream = stream
+        self.count = 0
+
+    def read(self, size=-1):
+        chunk = self._stream.read(size)
+        self.count += len(chunk)
+        return chunk
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def _build_storage():
+    backend = (os.getenv("STORAGE_BACKEND") or "local").strip().lower()
+    if backend == "local":
+        return LocalStorage(
+            UPLOADS_ROOT,
+            shard_depth=int(os.getenv("STORAGE_SHARD_DEPTH", "0")),
+            offload=(os.getenv("UPLOADS_OFFLOAD") or "").strip().lower(),
+            offload_prefix=os.getenv("UPLOADS_OFFLOAD_PREFIX", "/_uploads/"),
+        )
+    if backend == "s3":
+        bucket = (os.getenv("S3_BUCKET") or "").strip()
+        if not bucket:
+            raise RuntimeError("S3_BUCKET is not set")
+        return S3Storage(
+            bucket,
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            region=os.getenv("S3_REGION"),
+            presign_expires=int(os.getenv("S3_PRESIGN_EXPIRES", "300")),
+        )
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _build_storage()
+    return _storage
+
+
+def new_staging_dir() -> Path:
+    folder = STAGING_ROOT / uuid.uuid4().hex
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def cleanup_stale_staging(max_age_seconds: int):
+    # Staging dirs left behind by crashed workers; anything older than
+    # max_age_seconds can no longer belong to an in-flight request.
+    if not STAGING_ROOT.exists():
+        return
+    cutoff = time.time() - max_age_seconds
+    for entry in STAGING_ROOT.iterdir():
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def storage_metrics() -> dict:
+    storage = get_storage()
+    return {"backend": storage.name, "ops": storage.metrics.snapshot()}
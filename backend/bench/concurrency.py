@@ -0,0 +1,102 @@
+"""
+Concurrent-request throughput against a running backend.
+
+Start the server in one mode, run this, then repeat in the other mode:
+
+    gunicorn -w 4 -b :5000 wsgi:app
+    uvicorn --workers 4 --port 5000 app.asgi:app
+
+    python -m bench.concurrency --base http://localhost:5000 --path /api/me \
+        --login patient@test.com:1234 --concurrency 64 --duration 20
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def _login(base: str, credentials: str) -> str:
+    email, _, password = credentials.partition(":")
+    body = json.dumps({"email": email, "password": password}).encode("utf-8")
+    req = urllib.request.Request(
+        base + "/api/auth/login",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req) as resp:
+        cookie = resp.headers.get("Set-Cookie") or ""
+    return cookie.split(";", 1)[0]
+
+
+def _worker(url: str, cookie: str, deadline: float, latencies: list, errors: list, lock):
+    headers = {"Cookie": cookie} if cookie else {}
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as resp:
+                resp.read()
+        except (urllib.error.URLError, OSError):
+            local_errors += 1
+            continue
+        local_latencies.append(time.perf_counter() - started)
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(base: str, path: str, concurrency: int, duration: float, login: str = None) -> dict:
+    base = base.rstrip("/")
+    cookie = _login(base, login) if login else ""
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_worker, args=(base + path, cookie, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "url": base + path,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="http://localhost:5000")
+    parser.add_argument("--path", default="/api/doctors")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--login", help="email:password to authenticate before the run")
+    args = parser.parse_args()
+    print(json.dumps(run(args.base, args.path, args.concurrency, args.duration, args.login), indent=2))
+
+
+if __name__ == "__main__":
+    main()
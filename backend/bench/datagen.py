@@ -0,0 +1,364 @@
+"""
+Synthetic data generator for scale testing.
+
+Bulk-loads users, doctors, appointments, quote requests (with file
+metadata), contact messages and lab packages with COPY FROM STDIN, split
+into batches that run in parallel worker processes.
+
+    DATABASE_URL=postgresql://.../medconnect_scale \\
+    python -m bench.datagen --doctors 5000 --users 1000000 \\
+        --appointments 20000000 --quotes 2000000 --contacts 500000 \\
+        --workers 8 --skew 1.1
+
+Every generated email ends in .<tag>@datagen.test, so repeated runs add
+rows instead of colliding. --skew is the Zipf exponent of doctor popularity
+(0 = uniform); a handful of doctors then carry most of the bookings, as in
+production. Use a scratch database.
+"""
+import argparse
+import bisect
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import psycopg
+
+DOMAIN = "@datagen.test"
+SPECIALTIES = [
+    ("General Practice", 30), ("Paediatrics", 10), ("Cardiology", 8), ("Dermatology", 8),
+    ("Gynaecology", 8), ("Orthopaedics", 6), ("Psychiatry", 5), ("Ophthalmology", 5),
+    ("ENT", 4), ("Neurology", 3), ("Endocrinology", 3), ("Urology", 3),
+]
+DAY_SETS = [
+    ('["mon","tue","wed","thu","fri"]', 50),
+    ('["mon","wed","fri"]', 20),
+    ('["tue","thu"]', 15),
+    ('["mon","tue","wed","thu","fri","sat"]', 10),
+    ('["sat","sun"]', 5),
+]
+HOURS = [("08:00", "16:00", 20), ("09:00", "17:00", 50), ("10:00", "18:00", 20), ("13:00", "20:00", 10)]
+FIRST_NAMES = [
+    "Amelia", "Ravi", "Chen", "Sofia", "Yusuf", "Nadia", "Luc", "Priya", "Kevin", "Aisha",
+    "Jean", "Mei", "Omar", "Leila", "Arjun", "Chloe", "Daniel", "Fatima", "Hugo", "Ines",
+]
+LAST_NAMES = [
+    "Ramgoolam", "Li", "Dupont", "Patel", "Khan", "Martin", "Wong", "Bhujun", "Laurent",
+    "Appadoo", "Chung", "Naidoo", "Bernard", "Seetohul", "Moreau", "Ahmed",
+]
+QUOTE_CATEGORIES = ["Consultation", "Lab Tests", "Specialist Appointment", "Imaging", "Vaccination"]
+QUOTE_STATUSES = [("new", 40), ("in_review", 20), ("contacted", 25), ("closed", 15)]
+CONTACT_TYPES = ["General enquiry", "Billing", "Appointment support", "Technical issue", "Feedback", "Other"]
+MESSAGES = [
+    "Heart palpitations at night", "Annual check-up and blood work", "Persistent skin rash on arms",
+    "Knee pain after running", "Recurring migraines", "Follow-up on thyroid results",
+    "Child vaccination schedule", "Second opinion on MRI",
+]
+SLOTS = [f"{h:02d}:{m:02d}" for h in range(8, 20) for m in (0, 30)]
+# Mornings book up first.
+SLOT_WEIGHTS = [max(1, 30 - i) for i in range(len(SLOTS))]
+FILE_KINDS = [("id", "image/jpeg", ".jpg"), ("documents", "application/pdf", ".pdf"), ("documents", "image/png", ".png")]
+
+
+def _weighted(pairs):
+    values = [p[0] for p in pairs]
+    cum = list(itertools.accumulate(p[-1] for p in pairs))
+    return values, cum
+
+
+def _pick(rnd, values, cum):
+    return values[bisect.bisect_right(cum, rnd.random() * cum[-1])]
+
+
+def _tsv(fields) -> str:
+    # Generated values never contain tabs, newlines or backslashes, so no
+    # escaping beyond NULL is needed.
+    return "\t".join("\\N" if f is None else str(f) for f in fields) + "\n"
+
+
+def _copy(conn, table: str, columns: list, lines):
+    buf = []
+    size = 0
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for line in lines:
+                buf.append(line)
+                size += len(line)
+                if size >= 1 << 20:
+                    copy.write("".join(buf))
+                    buf, size = [], 0
+            if buf:
+                copy.write("".join(buf))
+
+
+# --- row generators ------------------------------------------------------
+# Each generator builds rows [start, start + count) from a seed derived from
+# start, so a batch produces the same rows whichever worker runs it.
+
+def gen_users(rnd, start, count, ctx):
+    for i in range(start, start + count):
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        yield _tsv([
+            f"patient{i}.{ctx['tag']}{DOMAIN}", ctx["password_hash"], f"{first} {last}",
+            f"+2305{i:07d}", "patient", 100000 + i, None,
+        ])
+
+
+def gen_appointments(rnd, start, count, ctx):
+    doctors = ctx["doctors"]
+    cum = ctx["doctor_cum"]
+    today = datetime.date.today()
+    past_days, future_days = ctx["past_days"], ctx["future_days"]
+    users = max(1, ctx["users"])
+    for _ in range(count):
+        d = doctors[bisect.bisect_right(cum, rnd.random() * cum[-1])]
+        offset = rnd.randint(-past_days, future_days)
+        day = today + datetime.timedelta(days=offset)
+        slot = SLOTS[bisect.bisect_right(ctx["slot_cum"], rnd.random() * ctx["slot_cum"][-1])]
+        r = rnd.random()
+        if offset < 0:
+            status = "completed" if r < 0.85 else "cancelled"
+        else:
+            status = "booked" if r < 0.6 else ("confirmed" if r < 0.9 else "cancelled")
+        p = rnd.randrange(users)
+        yield _tsv([
+            d[0], d[1], d[2], day.isoformat(), slot,
+            f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}",
+            f"patient{p}.{ctx['tag']}{DOMAIN}", f"+2305{p:07d}", status,
+        ])
+
+
+def gen_quotes(rnd, start, count, ctx):
+    base_id = ctx["quote_base_id"]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    statuses, status_cum = _weighted(QUOTE_STATUSES)
+    quotes, files = [], []
+    for i in range(start, start + count):
+        qid = base_id + i + 1
+        created = now - datetime.timedelta(minutes=rnd.randint(0, ctx["past_days"] * 1440))
+        cats = rnd.sample(QUOTE_CATEGORIES, rnd.choice((1, 1, 1, 2, 3)))
+        dob = datetime.date(1940, 1, 1) + datetime.timedelta(days=rnd.randint(0, 30000))
+        quotes.append(_tsv([
+            qid, rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES), rnd.choice(("female", "male")),
+            dob.isoformat(), f"+2309{i:07d}", f"quote{i}.{ctx['tag']}{DOMAIN}", json.dumps(cats), None,
+            rnd.choice(MESSAGES), _pick(rnd, statuses, status_cum), created.isoformat(), created.isoformat(),
+        ]))
+        for n in range(rnd.choice((0, 1, 1, 2, 3))):
+            kind, mime, ext = FILE_KINDS[0] if n == 0 else rnd.choice(FILE_KINDS[1:])
+            files.append(_tsv([
+                qid, kind, f"{qid}-{n}{ext}", f"scan-{n}{ext}", mime, rnd.randint(20_000, 4_000_000),
+                created.isoformat(),
+            ]))
+    return quotes, files
+
+
+def gen_contacts(rnd, start, count, ctx):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for i in range(start, start + count):
+        created = now - datetime.timedelta(minutes=rnd.randint(0, ctx["past_days"] * 1440))
+        yield _tsv([
+            rnd.choice(CONTACT_TYPES), rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES),
+            f"contact{i}.{ctx['tag']}{DOMAIN}", f"+2306{i:07d}", rnd.choice(MESSAGES), created.isoformat(),
+        ])
+
+
+TABLES = {
+    "users": ("users", ["email", "password_hash", "name", "phone", "role", "patient_id", "doctor_id"], gen_users),
+    "appointments": (
+        "appointments",
+        ["doctor_id", "doctor", "specialty", "date", "time", "name", "email", "phone", "status"],
+        gen_appointments,
+    ),
+    "contacts": (
+        "contact_messages",
+        ["type", "first_name", "last_name", "email", "phone", "message", "created_at"],
+        gen_contacts,
+    ),
+}
+QUOTE_COLUMNS = [
+    "id", "first_name", "last_name", "gender", "dob", "phone", "email", "service_categories",
+    "doctor_id", "message", "status", "created_at", "updated_at",
+]
+FILE_COLUMNS = ["quote_request_id", "kind", "stored_filename", "original_filename", "mime", "size", "created_at"]
+
+
+BATCH_SALT = {"users": 1, "appointments": 2, "quotes": 3, "contacts": 4}
+
+_ctx = None
+
+
+def _init_worker(ctx):
+    global _ctx
+    _ctx = ctx
+
+
+def _run_batch(task):
+    name, start, count = task
+    rnd = random.Random(_ctx["seed"] * 1_000_003 + BATCH_SALT[name] * 1_000_000_007 + start)
+    with psycopg.connect(_ctx["dsn"]) as conn:
+        if name == "quotes":
+            quotes, files = gen_quotes(rnd, start, count, _ctx)
+            _copy(conn, "quote_requests", QUOTE_COLUMNS, quotes)
+            _copy(conn, "quote_request_files", FILE_COLUMNS, files)
+        else:
+            table, columns, gen = TABLES[name]
+            _copy(conn, table, columns, gen(rnd, start, count, _ctx))
+        conn.commit()
+    return name, count
+
+
+def load_doctors(conn, count: int, rnd, tag: str) -> list:
+    specialties, spec_cum = _weighted(SPECIALTIES)
+    days, days_cum = _weighted(DAY_SETS)
+    hours = [(h[0], h[1]) for h in HOURS]
+    hours_cum = list(itertools.accumulate(h[2] for h in HOURS))
+    lines = []
+    for i in range(count):
+        start, end = hours[bisect.bisect_right(hours_cum, rnd.random() * hours_cum[-1])]
+        lines.append(_tsv([
+            f"Dr {rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {i}", f"doctor{i}.{tag}{DOMAIN}",
+            _pick(rnd, specialties, spec_cum), f"+2304{i:07d}", "t" if rnd.random() > 0.05 else "f",
+            _pick(rnd, days, days_cum), start, end,
+        ]))
+    _copy(conn, "doctors", [
+        "full_name", "email", "specialty", "phone", "is_active", "availability_days",
+        "availability_start", "availability_end",
+    ], lines)
+    conn.commit()
+    return [
+        (r[0], r[1], r[2])
+        for r in conn.execute(
+            "SELECT id, full_name, specialty FROM doctors WHERE email LIKE %s AND is_active ORDER BY id",
+            (f"%.{tag}{DOMAIN}",),
+        ).fetchall()
+    ]
+
+
+def load_lab_packages(conn, count: int, rnd, tag: str):
+    lines = []
+    for i in range(count):
+        contents = rnd.sample(
+            ["FBC", "HbA1c", "Lipid Profile", "TSH", "ALT", "AST", "GGT", "Urea", "Creatinine", "Vitamin D"],
+            rnd.randint(2, 8),
+        )
+        lines.append(_tsv([
+            f"datagen-{tag}-{i}", f"Package {i}", f"{rnd.randint(300, 6000)}.00", "MUR",
+            "Preparation: fasting may be required", rnd.choice(["Preventive Care", "Diagnostic Tests"]),
+            json.dumps(contents), 1000 + i, "t",
+        ]))
+    _copy(conn, "lab_packages", [
+        "slug", "name", "price_mur", "currency", "preparation_note", "category", "contents", "sort_order",
+        "is_active",
+    ], lines)
+    conn.commit()
+
+
+def _reserve_ids(conn, table: str, count: int) -> int:
+    # Quote ids are assigned client-side so file rows can reference them from
+    # any worker; move the sequence past the block first.
+    with conn.transaction():
+        conn.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+        base = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        conn.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", (table, base + count + 1))
+    return base
+
+
+def _batches(name: str, total: int, size: int):
+    return [(name, start, min(size, total - start)) for start in range(0, total, size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--appointments", type=int, default=2_000_000)
+    parser.add_argument("--quotes", type=int, default=200_000)
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--lab-packages", type=int, default=200)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of doctor popularity")
+    parser.add_argument("--past-days", type=int, default=730)
+    parser.add_argument("--future-days", type=int, default=90)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tag", help="suffix that keeps emails unique across runs (default: derived from time)")
+    args = parser.parse_args()
+    tag = args.tag or format(int(time.time()), "x")
+
+    from werkzeug.security import generate_password_hash
+
+    dsn = os.getenv("DATABASE_URL") or ""
+    if not dsn:
+        raise SystemExit("DATABASE_URL is not set")
+
+    rnd = random.Random(args.seed)
+    report = {}
+    started = time.perf_counter()
+    with psycopg.connect(dsn) as conn:
+        t = time.perf_counter()
+        doctors = load_doctors(conn, args.doctors, rnd, tag)
+        report["doctors"] = {"rows": args.doctors, "seconds": round(time.perf_counter() - t, 2)}
+        t = time.perf_counter()
+        load_lab_packages(conn, args.lab_packages, rnd, tag)
+        report["lab_packages"] = {"rows": args.lab_packages, "seconds": round(time.perf_counter() - t, 2)}
+        quote_base_id = _reserve_ids(conn, "quote_requests", args.quotes)
+
+    ranks = list(range(1, len(doctors) + 1))
+    rnd.shuffle(ranks)
+    ctx = {
+        "dsn": dsn,
+        "seed": args.seed,
+        "doctors": doctors,
+        "doctor_cum": list(itertools.accumulate(1.0 / (r ** args.skew) for r in ranks)),
+        "slot_cum": list(itertools.accumulate(SLOT_WEIGHTS)),
+        "users": args.users,
+        "past_days": args.past_days,
+        "future_days": args.future_days,
+        "quote_base_id": quote_base_id,
+        "tag": tag,
+        # One hash for every generated user: hashing millions would dominate the run.
+        "password_hash": generate_password_hash("datagen"),
+    }
+
+    tasks = (
+        _batches("users", args.users, args.batch_size)
+        + _batches("appointments", args.appointments, args.batch_size)
+        + _batches("quotes", args.quotes, args.batch_size // 2)
+        + _batches("contacts", args.contacts, args.batch_size)
+    )
+    totals = {"users": args.users, "appointments": args.appointments, "quotes": args.quotes, "contacts": args.contacts}
+    done = {name: 0 for name in totals}
+    phase_started = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(ctx,)) as pool:
+        for name, count in pool.imap_unordered(_run_batch, tasks):
+            done[name] += count
+            print(f"  {name} {done[name]}/{totals[name]}", file=sys.stderr)
+    phase = time.perf_counter() - phase_started
+    for name, rows in totals.items():
+        report[name] = {"rows": rows}
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for table in ("users", "doctors", "appointments", "quote_requests", "quote_request_files",
+                      "contact_messages", "lab_packages"):
+            conn.execute(f"ANALYZE {table}")
+
+    total_rows = sum(v["rows"] for v in report.values())
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "tables": report,
+        "parallel_phase_seconds": round(phase, 2),
+        "total_rows": total_rows,
+        "total_seconds": round(elapsed, 2),
+        "rows_per_second": round(total_rows / elapsed) if elapsed else None,
+        "workers": args.workers,
+        "skew": args.skew,
+        "tag": tag,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
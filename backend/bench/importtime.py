@@ -0,0 +1,90 @@
+"""
+Import-time regression check for worker cold start.
+
+Runs `python -X importtime -c "import wsgi"` in a fresh interpreter and
+fails (exit 1) when a module that must stay lazy is imported at boot, or
+when the total import time exceeds the budget. The fastest of --runs
+imports counts, so one slow run on a busy machine does not fail it.
+tests/test_import_time.py runs the same check under pytest.
+
+    python -m bench.importtime --budget-ms 800 --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Only needed on first use; importing them at boot is a regression.
+LAZY_MODULES = ["twilio", "boto3", "quart", "uvicorn"]
+
+
+def measure(target: str = "wsgi") -> list:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, raw_name = line.split(":", 1)[1].split("|")
+        # Indentation in the module column encodes nesting; depth 0 is top level.
+        depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        rows.append({
+            "module": raw_name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": depth,
+        })
+    return rows
+
+
+def total_us(rows: list) -> int:
+    return sum(r["cumulative_us"] for r in rows if r["depth"] == 0)
+
+
+def measure_best(target: str = "wsgi", runs: int = 3) -> list:
+    return min((measure(target) for _ in range(max(1, runs))), key=total_us)
+
+
+def check(rows: list, budget_ms: float, top: int) -> dict:
+    total = total_us(rows)
+    imported = {r["module"] for r in rows}
+    lazy_violations = sorted(
+        m for m in imported
+        if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    slowest = sorted(rows, key=lambda r: r["self_us"], reverse=True)[:top]
+    return {
+        "total_ms": round(total / 1000, 1),
+        "budget_ms": budget_ms,
+        "modules": len(rows),
+        "lazy_violations": lazy_violations[:20],
+        "slowest_self_ms": [{"module": r["module"], "ms": round(r["self_us"] / 1000, 1)} for r in slowest],
+        "ok": not lazy_violations and total / 1000 <= budget_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="wsgi")
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    report = check(measure_best(args.target, args.runs), args.budget_ms, args.top)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""
+In-process load test of the booking flow against a scratch Postgres.
+
+Seeds bench rows (emails ending in @bench.test) with generate_series, then
+replays user journeys through the Flask test client from several threads
+and prints a JSON report: per-step p50/p95/p99 latency, throughput and
+queries per request (read from the Server-Timing header).
+
+    DATABASE_URL=postgresql://.../medconnect_bench \\
+    python -m bench.loadtest --migrate --seed --doctors 2000 \\
+        --appointments 1000000 --quotes 100000 \\
+        --users 16 --duration 60 --output bench-$(git rev-parse --short HEAD).json
+
+    python -m bench.loadtest --users 16 --duration 60 --compare bench-abc123.json
+
+Never point it at a database with real data: --reseed deletes bench rows.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("REQUEST_LOG_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ["SERVER_TIMING_ENABLED"] = "true"
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app import create_app  # noqa: E402
+from app.db import apply_migrations, get_connection  # noqa: E402
+
+BENCH_DOMAIN = "@bench.test"
+SPECIALTIES = [
+    "General Practice", "Cardiology", "Dermatology", "Paediatrics",
+    "Gynaecology", "Orthopaedics", "Psychiatry", "Ophthalmology",
+]
+PATIENT = ("patient@test.com", "1234")
+ADMIN = ("admin@test.com", "1234")
+
+_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def _bench_counts(cur) -> dict:
+    cur.execute("SELECT COUNT(*) AS n FROM doctors WHERE email LIKE %s", ("%" + BENCH_DOMAIN,))
+    doctors = cur.fetchone()["n"]
+    cur.execute("SELECT COUNT(*) AS n FROM appointments WHERE email LIKE %s", ("%" + BENCH_DOMAIN,))
+    appointments = cur.fetchone()["n"]
+    cur.execute("SELECT COUNT(*) AS n FROM quote_requests WHERE email LIKE %s", ("%" + BENCH_DOMAIN,))
+    quotes = cur.fetchone()["n"]
+    return {"doctors": doctors, "appointments": appointments, "quote_requests": quotes}
+
+
+def delete_bench_rows():
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            pattern = "%" + BENCH_DOMAIN
+            cur.execute(
+                "DELETE FROM quote_request_files WHERE quote_request_id IN "
+                "(SELECT id FROM quote_requests WHERE email LIKE %s)",
+                (pattern,),
+            )
+            cur.execute("DELETE FROM quote_requests WHERE email LIKE %s", (pattern,))
+            cur.execute("DELETE FROM appointments WHERE email LIKE %s", (pattern,))
+            cur.execute("DELETE FROM doctors WHERE email LIKE %s", (pattern,))
+        conn.commit()
+
+
+def seed(doctors: int, appointments: int, quotes: int, chunk: int = 250_000):
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO doctors
+                    (full_name, email, specialty, phone, is_active,
+                     availability_days, availability_start, availability_end)
+                SELECT
+                    'Dr Bench ' || g,
+                    'bench.doctor.' || g || %s,
+                    (%s::text[])[1 + g %% %s],
+                    '+2305' || LPAD(g::text, 7, '0'),
+                    g %% 20 <> 0,
+                    (ARRAY['["mon","tue","wed","thu","fri"]', '["mon","wed","fri"]',
+                           '["tue","thu"]', '["mon","tue","wed","thu","fri","sat"]'])[1 + g %% 4]::jsonb,
+                    '09:00',
+                    '17:00'
+                FROM generate_series(1, %s) AS g
+                """,
+                (BENCH_DOMAIN, SPECIALTIES, len(SPECIALTIES), doctors),
+            )
+            conn.commit()
+
+            # Appointments over two years centred on today, 16 half-hour slots
+            # a day, with a realistic status mix.
+            done = 0
+            while done < appointments:
+                batch = min(chunk, appointments - done)
+                cur.execute(
+                    """
+                    WITH d AS (
+                        SELECT array_agg(id ORDER BY id) AS ids,
+                               array_agg(full_name ORDER BY id) AS names,
+                               array_agg(specialty ORDER BY id) AS specialties,
+                               COUNT(*) AS n
+                        FROM doctors WHERE email LIKE %s
+                    )
+                    INSERT INTO appointments (doctor_id, doctor, specialty, date, time, name, email, phone, status)
+                    SELECT
+                        d.ids[1 + g %% d.n],
+                        d.names[1 + g %% d.n],
+                        d.specialties[1 + g %% d.n],
+                        TO_CHAR(CURRENT_DATE + ((g / d.n) %% 730 - 365)::int, 'YYYY-MM-DD'),
+                        -- 7 is coprime with 16: each doctor's consecutive days step through
+                        -- all 16 slots, and later passes over the date range land on slots
+                        -- that doctor has not used that day.
+                        TO_CHAR(TIME '09:00' + (((g / d.n) * 7 + g / (d.n * 730)) %% 16) * INTERVAL '30 minutes',
+                                'HH24:MI'),
+                        'Bench Patient ' || g %% 50000,
+                        'patient' || g %% 50000 || %s,
+                        '+2307' || LPAD((g %% 50000)::text, 7, '0'),
+                        (ARRAY['booked','booked','booked','booked','confirmed','confirmed',
+                               'completed','completed','completed','cancelled'])[1 + g %% 10]
+                    FROM d, generate_series(%s, %s) AS g
+                    """,
+                    ("%" + BENCH_DOMAIN, BENCH_DOMAIN, done, done + batch - 1),
+                )
+                conn.commit()
+                done += batch
+                print(f"  appointments {done}/{appointments}", file=sys.stderr)
+
+            cur.execute(
+                """
+                INSERT INTO quote_requests
+                    (first_name, last_name, gender, dob, phone, email, service_categories,
+                     doctor_id, message, status, created_at)
+                SELECT
+                    (ARRAY['Amelia','Ravi','Chen','Sofia','Yusuf','Nadia','Luc','Priya'])[1 + g %% 8],
+                    'Bench' || g,
+                    (ARRAY['female','male'])[1 + g %% 2],
+                    DATE '1950-01-01' + (g %% 20000),
+                    '+2309' || LPAD(g::text, 7, '0'),
+                    'quote' || g || %s,
+                    (ARRAY['["Consultation"]', '["Lab Tests"]', '["Consultation","Lab Tests"]',
+                           '["Specialist Appointment"]'])[1 + g %% 4]::jsonb,
+                    NULL,
+                    (ARRAY['Heart palpitations at night', 'Annual check-up and blood work',
+                           'Persistent skin rash on arms', 'Knee pain after running'])[1 + g %% 4],
+                    (ARRAY['new','new','in_review','contacted','closed'])[1 + g %% 5],
+                    NOW() - (g %% 525600) * INTERVAL '1 minute'
+                FROM generate_series(1, %s) AS g
+                """,
+                (BENCH_DOMAIN, quotes),
+            )
+            conn.commit()
+            cur.execute("ANALYZE doctors")
+            cur.execute("ANALYZE appointments")
+            cur.execute("ANALYZE quote_requests")
+        conn.commit()
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps = {}
+
+    def add(self, step: str, seconds: float, ok: bool, queries):
+        with self._lock:
+            s = self.steps.setdefault(step, {"latencies": [], "errors": 0, "queries": []})
+            s["latencies"].append(seconds)
+            if not ok:
+                s["errors"] += 1
+            if queries is not None:
+                s["queries"].append(queries)
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _call(rec: Recorder, step: str, fn, expected=(200,)):
+    started = time.perf_counter()
+    response = fn()
+    elapsed = time.perf_counter() - started
+    if response.is_streamed:
+        # Export bodies are generated lazily; include them in the timing.
+        response.get_data()
+        elapsed = time.perf_counter() - started
+    match = _QUERIES.search(response.headers.get("Server-Timing") or "")
+    rec.add(step, elapsed, response.status_code in expected, int(match.group(1)) if match else None)
+    return response
+
+
+def patient_journey(client, rec: Recorder, rnd: random.Random, doctor_ids: list):
+    _call(rec, "login", lambda: client.post("/api/auth/login", json={"email": PATIENT[0], "password": PATIENT[1]}))
+    _call(rec, "me", lambda: client.get("/api/me"))
+    _call(rec, "doctors", lambda: client.get("/api/doctors"))
+
+    doctor_id = rnd.choice(doctor_ids)
+    _call(rec, "availability", lambda: client.get(f"/api/doctors/{doctor_id}/availability"))
+    day = (datetime.date.today() + datetime.timedelta(days=rnd.randint(400, 4000))).isoformat()
+    _call(rec, "slots", lambda: client.get(f"/api/appointments/slots?doctor_id={doctor_id}&date={day}"))
+
+    doctor = client.get(f"/api/doctors/{doctor_id}").get_json() or {}
+    doctor = (doctor.get("data") or {}).get("doctor") or doctor.get("data") or {}
+    slot = f"{rnd.randint(9, 16):02d}:{rnd.choice(['00', '30'])}"
+    booked = _call(rec, "book", lambda: client.post("/api/appointments", json={
+        "specialty": doctor.get("specialty") or "General Practice",
+        "doctor": doctor.get("full_name") or "",
+        "doctor_id": doctor_id,
+        "date": day,
+        "time": slot,
+        "name": "Bench Patient",
+        "phone": "+23000000000",
+        "email": PATIENT[0],
+    }), expected=(201, 409))
+
+    appt = ((booked.get_json() or {}).get("data") or {}).get("appointment")
+    if appt:
+        _call(rec, "cancel", lambda: client.patch(f"/api/appointments/{appt['id']}", json={"status": "cancelled"}))
+
+
+def admin_journey(client, rec: Recorder, rnd: random.Random):
+    _call(rec, "admin_login", lambda: client.post("/api/auth/login", json={"email": ADMIN[0], "password": ADMIN[1]}))
+    start = datetime.date.today() + datetime.timedelta(days=rnd.randint(-300, 300))
+    end = start + datetime.timedelta(days=7)
+    _call(rec, "admin_export", lambda: client.get(
+        f"/api/admin/appointments/export?from={start.isoformat()}&to={end.isoformat()}"
+    ))
+
+
+def run(users: int, duration: float, admin_ratio: float, seed_value: int) -> dict:
+    app = create_app()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM doctors WHERE is_active = TRUE ORDER BY id")
+            doctor_ids = [r["id"] for r in cur.fetchall()]
+    if not doctor_ids:
+        raise RuntimeError("No active doctors; run with --seed first")
+
+    # One login up front so the concurrent first logins do not all race to
+    # create the seed users.
+    warmup = app.test_client()
+    warmup.post("/api/auth/login", json={"email": PATIENT[0], "password": PATIENT[1]})
+    warmup.post("/api/auth/login", json={"email": ADMIN[0], "password": ADMIN[1]})
+
+    rec = Recorder()
+    journeys = [0]
+    journeys_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        rnd = random.Random(seed_value + index)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            if rnd.random() < admin_ratio:
+                admin_journey(client, rec, rnd)
+            else:
+                patient_journey(client, rec, rnd, doctor_ids)
+            with journeys_lock:
+                journeys[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    steps = {}
+    total = 0
+    for step, s in sorted(rec.steps.items()):
+        lat = s["latencies"]
+        total += len(lat)
+        steps[step] = {
+            "count": len(lat),
+            "errors": s["errors"],
+            "p50_ms": round(_percentile(lat, 50) * 1000, 2),
+            "p95_ms": round(_percentile(lat, 95) * 1000, 2),
+            "p99_ms": round(_percentile(lat, 99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(lat) * 1000, 2),
+            "queries_per_request": round(statistics.fmean(s["queries"]), 2) if s["queries"] else None,
+        }
+    return {
+        "duration_s": round(elapsed, 2),
+        "users": users,
+        "journeys": journeys[0],
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "steps": steps,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    diff = {}
+    for step, current in report["steps"].items():
+        before = baseline.get("steps", {}).get(step)
+        if not before or not before.get("p95_ms"):
+            continue
+        diff[step] = {
+            "p95_ms": current["p95_ms"],
+            "baseline_p95_ms": before["p95_ms"],
+            "p95_change_pct": round((current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100, 1),
+        }
+    return {
+        "baseline_commit": baseline.get("commit"),
+        "throughput_change_pct": round(
+            (report["throughput_rps"] - baseline["throughput_rps"]) / baseline["throughput_rps"] * 100, 1
+        ) if baseline.get("throughput_rps") else None,
+        "steps": diff,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--migrate", action="store_true", help="apply migrations first")
+    parser.add_argument("--seed", action="store_true", help="seed bench rows if none exist")
+    parser.add_argument("--reseed", action="store_true", help="delete bench rows and seed again")
+    parser.add_argument("--doctors", type=int, default=2000)
+    parser.add_argument("--appointments", type=int, default=1_000_000)
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users (threads)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--admin-ratio", type=float, default=0.05)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline report to compare p95 and throughput against")
+    args = parser.parse_args()
+
+    if args.migrate:
+        apply_migrations()
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            counts = _bench_counts(cur)
+    if args.reseed:
+        delete_bench_rows()
+        counts = {"doctors": 0}
+    if (args.seed or args.reseed) and not counts["doctors"]:
+        started = time.perf_counter()
+        seed(args.doctors, args.appointments, args.quotes)
+        print(f"  seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            counts = _bench_counts(cur)
+
+    report = {
+        "commit": _git_commit(),
+        "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "bench_rows": counts,
+        **run(args.users, args.duration, args.admin_ratio, args.random_seed),
+    }
+    if args.compare:
+        report["compare"] = compare(report, json.loads(Path(args.compare).read_text()))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Micro-benchmarks for the per-row serializers and parsers.
+
+Every case runs on fixed fixtures, so numbers are comparable across commits
+on the same machine. With --save the results become the stored baseline;
+otherwise they are compared against it and the run fails (exit 1) when any
+case is slower than the baseline by more than --threshold.
+
+    python -m bench.micro --save                 # record bench/micro_baseline.json
+    python -m bench.micro --threshold 0.15       # compare against it
+    python -m bench.micro --only doctor --repeat 9
+
+Baselines are per machine and are not committed: record one before an
+optimisation, on the same host you measure it on. The baseline stores a
+fingerprint of that host; compared against a baseline from another host (or
+with none) the run only reports numbers and exits 0.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import timeit
+from decimal import Decimal
+from pathlib import Path
+
+from flask import Flask
+
+from app.routes.doctor import _serialize_appt
+from app.routes.doctors import _format_time, _parse_days_from_row, _parse_list_field, _serialize_doctor
+from app.routes.lab_packages import _row_to_payload
+from app.routes.quote_requests import _categories_from_row
+
+BASELINE_PATH = Path(__file__).resolve().parent / "micro_baseline.json"
+
+LIST_SIZE = 100
+_NOW = datetime.datetime(2026, 3, 2, 9, 30, tzinfo=datetime.timezone.utc)
+
+
+def _doctor_row(i: int, legacy: bool = False) -> dict:
+    # Since migration 011 the list columns are JSONB and arrive as lists;
+    # `legacy` rows carry the old TEXT encodings the parsers still accept.
+    days = ["mon", "tue", "wed", "thu", "fri"][: 3 + i % 3]
+    experience = [f"Consultant, Hospital {i % 7}", "Registrar, Victoria Hospital", "House officer"]
+    certifications = ["MBBS", "FRCS"] if i % 2 else ["MD"]
+    specialisations = ["Hypertension", "Heart failure", "Echocardiography"][: 1 + i % 3]
+    if legacy:
+        days = json.dumps([d.upper() for d in days])
+        experience = json.dumps(experience)
+        certifications = "MBBS"
+        specialisations = ""
+    return {
+        "id": i,
+        "full_name": f"Dr Example {i}",
+        "email": f"doctor{i}@example.test",
+        "specialty": ["Cardiology", "Dermatology", "Pediatrics", "General Practice"][i % 4],
+        "phone": f"+230 5{i:07d}",
+        "is_active": True,
+        "avatar_url": f"/uploads/avatars/{i}.webp" if i % 3 else None,
+        "availability_days": days,
+        "availability_start": datetime.time(8, 30),
+        "availability_end": "17:00:00",
+        "bio": "Experienced clinician focused on preventive care and long-term follow-up. " * 2,
+        "experience": experience,
+        "certifications": certifications,
+        "specialisations": specialisations,
+        "created_at": _NOW,
+        "updated_at": _NOW,
+    }
+
+
+def _appointment_row(i: int) -> dict:
+    return {
+        "id": i,
+        "doctor_id": 1 + i % 20,
+        "doctor": f"Dr Example {1 + i % 20}",
+        "specialty": "Cardiology",
+        "date": f"2026-03-{1 + i % 28:02d}",
+        "time": f"{8 + i % 9:02d}:{(i % 2) * 30:02d}",
+        "name": f"Patient {i}",
+        "email": f"patient{i}@example.test",
+        "phone": f"+230 5{i:07d}",
+        "status": ["pending", "confirmed", "completed", "cancelled"][i % 4],
+    }
+
+
+def _lab_package_row(i: int, legacy: bool = False) -> dict:
+    contents = ["Full blood count", "Lipid profile", "HbA1c", "TSH", "Creatinine"][: 2 + i % 4]
+    return {
+        "id": i,
+        "slug": f"package-{i}",
+        "name": f"Package {i}",
+        "price_mur": Decimal("1250.00") + i,
+        "currency": "MUR",
+        "preparation_note": "Fasting for 8 hours is recommended.",
+        "category": "wellness",
+        "contents": json.dumps(contents) if legacy else contents,
+        "sort_order": i,
+        "is_active": True,
+        "created_at": _NOW,
+        "updated_at": _NOW,
+    }
+
+
+DOCTORS = [_doctor_row(i, legacy=i % 10 == 0) for i in range(LIST_SIZE)]
+APPOINTMENTS = [_appointment_row(i) for i in range(LIST_SIZE)]
+LAB_PACKAGES = [_lab_package_row(i, legacy=i % 10 == 0) for i in range(LIST_SIZE)]
+CATEGORIES = [["blood_test", "imaging"], '["blood_test", "consultation"]', None, ["vaccination"]] * (LIST_SIZE // 4)
+LIST_FIELDS = [["MBBS", " FRCS "], '["a", "b", "c"]', "plain text", "", None] * (LIST_SIZE // 5)
+DAYS = [["mon", "wed"], '["MON", "TUE", "FRI"]', None, "not json"] * (LIST_SIZE // 4)
+TIMES = [datetime.time(8, 30), "17:00:00", "9:00", None] * (LIST_SIZE // 4)
+
+# Flask's default provider is what jsonify()/success_response() use.
+_json = Flask(__name__).json
+
+
+def _encode(payload):
+    return _json.dumps({"success": True, "data": payload})
+
+
+# Each case processes one list of LIST_SIZE inputs, as a list endpoint would.
+CASES = {
+    "doctors.serialize_doctor": lambda: [_serialize_doctor(r) for r in DOCTORS],
+    "doctors.serialize_doctor_public": lambda: [_serialize_doctor(r, public=True) for r in DOCTORS],
+    "doctors.parse_list_field": lambda: [_parse_list_field(v) for v in LIST_FIELDS],
+    "doctors.parse_days_from_row": lambda: [_parse_days_from_row(v) for v in DAYS],
+    "doctors.format_time": lambda: [_format_time(v) for v in TIMES],
+    "doctor.serialize_appt": lambda: [_serialize_appt(r) for r in APPOINTMENTS],
+    "quote_requests.categories_from_row": lambda: [_categories_from_row(v) for v in CATEGORIES],
+    "lab_packages.row_to_payload": lambda: [_row_to_payload(r) for r in LAB_PACKAGES],
+}
+
+_SERIALIZED_DOCTORS = [_serialize_doctor(r) for r in DOCTORS]
+_SERIALIZED_APPTS = [_serialize_appt(r) for r in APPOINTMENTS]
+_SERIALIZED_PACKAGES = [_row_to_payload(r) for r in LAB_PACKAGES]
+
+CASES.update({
+    "json.doctors_list": lambda: _encode({"count": LIST_SIZE, "items": _SERIALIZED_DOCTORS}),
+    "json.appointments_list": lambda: _encode({"count": LIST_SIZE, "items": _SERIALIZED_APPTS}),
+    "json.lab_packages_list": lambda: _encode({"count": LIST_SIZE, "items": _SERIALIZED_PACKAGES}),
+})
+
+
+def host_fingerprint() -> dict:
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpu": cpu,
+        "cpus": os.cpu_count(),
+    }
+
+
+def measure(func, repeat: int) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # The minimum is the run least disturbed by the rest of the machine.
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e6
+
+
+def run(names: list, repeat: int) -> dict:
+    return {name: round(measure(CASES[name], repeat), 2) for name in names}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    rows = []
+    for name, us in results.items():
+        base = baseline.get(name)
+        change = None if not base else (us - base) / base
+        rows.append({
+            "case": name,
+            "us": us,
+            "baseline_us": base,
+            "change": None if change is None else round(change, 3),
+            "regressed": change is not None and change > threshold,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--only", default="", help="run cases whose name contains this text")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    args = parser.parse_args()
+
+    names = [n for n in CASES if args.only in n]
+    if not names:
+        print(f"No cases match {args.only!r}", file=sys.stderr)
+        return 2
+    results = run(names, args.repeat)
+
+    if args.save:
+        stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        if stored.get("host") != host_fingerprint():
+            # Cases measured on another host are not comparable with these.
+            stored = {}
+        stored.setdefault("cases", {}).update(results)
+        stored["host"] = host_fingerprint()
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(json.dumps({"saved": str(args.baseline), "cases": results}, indent=2))
+        return 0
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    host = host_fingerprint()
+    comparable = bool(baseline) and baseline.get("host") == host
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --save first. Not comparing.", file=sys.stderr)
+    elif not comparable:
+        print(f"Baseline {args.baseline} was recorded on another host; not comparing.", file=sys.stderr)
+    rows = compare(results, baseline.get("cases", {}) if comparable else {}, args.threshold)
+    report = {
+        "list_size": LIST_SIZE,
+        "threshold": args.threshold,
+        "host": host,
+        "baseline_host": baseline.get("host"),
+        "compared": comparable,
+        "results": rows,
+        "ok": not any(r["regressed"] for r in rows),
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
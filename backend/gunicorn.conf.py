@@ -0,0 +1,21 @@
+import os
+import shutil
+
+# Shared directory for prometheus_client's per-worker metric files. It must be
+# set before the app (and prometheus_client) is imported, i.e. here.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/medconnect-metrics")
+
+
+def on_starting(server):
+    # Files from a previous master would be summed into the new one's counters.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,24 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE quote_requests
+  ADD COLUMN IF NOT EXISTS search_vector tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(email, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(message, '')), 'C')
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS quote_requests_search_idx
+ON quote_requests USING GIN (search_vector);
+
+CREATE INDEX IF NOT EXISTS quote_requests_first_name_trgm_idx
+ON quote_requests USING GIN (first_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS quote_requests_last_name_trgm_idx
+ON quote_requests USING GIN (last_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS quote_requests_email_trgm_idx
+ON quote_requests USING GIN (email gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS quote_requests_phone_trgm_idx
+ON quote_requests USING GIN (phone gin_trgm_ops);
@@ -0,0 +1,9 @@
+CREATE INDEX IF NOT EXISTS quote_requests_created_at_id_idx
+ON quote_requests (created_at, id);
+
+CREATE INDEX IF NOT EXISTS quote_requests_status_created_at_idx
+ON quote_requests (status, created_at, id);
+
+DROP INDEX IF EXISTS quote_requests_created_at_idx;
+
+DROP INDEX IF EXISTS quote_requests_status_idx;
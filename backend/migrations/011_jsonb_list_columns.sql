@@ -0,0 +1,51 @@
+ALTER TABLE quote_requests
+  ALTER COLUMN service_categories TYPE JSONB
+  USING CASE
+    WHEN left(btrim(service_categories), 1) = '[' THEN service_categories::jsonb
+    ELSE jsonb_build_array(btrim(service_categories))
+  END;
+
+ALTER TABLE doctors ALTER COLUMN availability_days DROP DEFAULT;
+
+ALTER TABLE doctors
+  ALTER COLUMN availability_days TYPE JSONB
+  USING CASE
+    WHEN left(btrim(availability_days), 1) = '[' THEN availability_days::jsonb
+    -- Older rows hold a comma-separated list such as 'mon, wed,fri'.
+    ELSE to_jsonb(array_remove(
+      string_to_array(regexp_replace(btrim(availability_days), '\s*,\s*', ',', 'g'), ','),
+      ''
+    ))
+  END;
+
+ALTER TABLE doctors ALTER COLUMN availability_days SET DEFAULT '[]'::jsonb;
+
+ALTER TABLE doctors
+  ALTER COLUMN experience TYPE JSONB
+  USING CASE
+    WHEN experience IS NULL OR btrim(experience) = '' THEN NULL
+    WHEN left(btrim(experience), 1) = '[' THEN experience::jsonb
+    ELSE jsonb_build_array(btrim(experience))
+  END;
+
+ALTER TABLE doctors
+  ALTER COLUMN certifications TYPE JSONB
+  USING CASE
+    WHEN certifications IS NULL OR btrim(certifications) = '' THEN NULL
+    WHEN left(btrim(certifications), 1) = '[' THEN certifications::jsonb
+    ELSE jsonb_build_array(btrim(certifications))
+  END;
+
+ALTER TABLE doctors
+  ALTER COLUMN specialisations TYPE JSONB
+  USING CASE
+    WHEN specialisations IS NULL OR btrim(specialisations) = '' THEN NULL
+    WHEN left(btrim(specialisations), 1) = '[' THEN specialisations::jsonb
+    ELSE jsonb_build_array(btrim(specialisations))
+  END;
+
+CREATE INDEX IF NOT EXISTS quote_requests_service_categories_idx
+ON quote_requests USING GIN (service_categories jsonb_path_ops);
+
+CREATE INDEX IF NOT EXISTS doctors_availability_days_idx
+ON doctors USING GIN (availability_days jsonb_path_ops);
@@ -0,0 +1,103 @@
+CREATE TABLE IF NOT EXISTS doctor_public_profiles (
+    doctor_id INTEGER PRIMARY KEY REFERENCES doctors(id) ON DELETE CASCADE,
+    full_name TEXT NOT NULL,
+    specialty TEXT NOT NULL,
+    is_active BOOLEAN NOT NULL,
+    availability_days JSONB NOT NULL DEFAULT '[]'::jsonb,
+    payload JSONB NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION doctor_public_list(value JSONB, lower_case BOOLEAN DEFAULT FALSE)
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT COALESCE(jsonb_agg(item ORDER BY position), '[]'::jsonb)
+    FROM (
+        SELECT CASE WHEN lower_case THEN lower(btrim(elem #>> '{}')) ELSE btrim(elem #>> '{}') END AS item,
+               position
+        FROM jsonb_array_elements(
+            CASE jsonb_typeof(value)
+                WHEN 'array' THEN value
+                WHEN 'string' THEN jsonb_build_array(value)
+                ELSE '[]'::jsonb
+            END
+        ) WITH ORDINALITY AS e(elem, position)
+    ) items
+    WHERE item <> ''
+$$;
+
+-- Same shape as _serialize_doctor(row, public=True).
+CREATE OR REPLACE FUNCTION doctor_public_payload(d doctors)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'id', d.id,
+        'full_name', d.full_name,
+        'specialty', d.specialty,
+        'avatar_url', d.avatar_url,
+        'availability_days', doctor_public_list(d.availability_days, TRUE),
+        'availability_start', to_char(d.availability_start, 'HH24:MI'),
+        'availability_end', to_char(d.availability_end, 'HH24:MI'),
+        'bio', d.bio,
+        'experience', doctor_public_list(d.experience),
+        'certifications', doctor_public_list(d.certifications),
+        'specialisations', doctor_public_list(d.specialisations)
+    )
+$$;
+
+CREATE OR REPLACE FUNCTION refresh_doctor_public_profile()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_payload JSONB := doctor_public_payload(NEW);
+BEGIN
+    -- Contact details and timestamps are not public; skip the write when
+    -- nothing the profile carries has changed.
+    IF TG_OP = 'UPDATE'
+       AND OLD.is_active = NEW.is_active
+       AND doctor_public_payload(OLD) = new_payload THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO doctor_public_profiles
+        (doctor_id, full_name, specialty, is_active, availability_days, payload, refreshed_at)
+    VALUES
+        (NEW.id, NEW.full_name, NEW.specialty, NEW.is_active,
+         new_payload -> 'availability_days', new_payload, NOW())
+    ON CONFLICT (doctor_id) DO UPDATE SET
+        full_name = EXCLUDED.full_name,
+        specialty = EXCLUDED.specialty,
+        is_active = EXCLUDED.is_active,
+        availability_days = EXCLUDED.availability_days,
+        payload = EXCLUDED.payload,
+        refreshed_at = EXCLUDED.refreshed_at;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS doctors_refresh_public_profile ON doctors;
+
+CREATE TRIGGER doctors_refresh_public_profile
+AFTER INSERT OR UPDATE ON doctors
+FOR EACH ROW EXECUTE FUNCTION refresh_doctor_public_profile();
+
+INSERT INTO doctor_public_profiles (doctor_id, full_name, specialty, is_active, availability_days, payload)
+SELECT d.id, d.full_name, d.specialty, d.is_active,
+       doctor_public_payload(d) -> 'availability_days', doctor_public_payload(d)
+FROM doctors d
+ON CONFLICT (doctor_id) DO UPDATE SET
+    full_name = EXCLUDED.full_name,
+    specialty = EXCLUDED.specialty,
+    is_active = EXCLUDED.is_active,
+    availability_days = EXCLUDED.availability_days,
+    payload = EXCLUDED.payload,
+    refreshed_at = NOW();
+
+CREATE INDEX IF NOT EXISTS doctor_public_profiles_days_idx
+ON doctor_public_profiles USING GIN (availability_days jsonb_path_ops)
+WHERE is_active;
@@ -0,0 +1,3 @@
+-- migrate: no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS appointments_doctor_id_date_idx
+ON appointments (doctor_id, date);
@@ -0,0 +1,9 @@
+-- migrate: no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS appointments_date_time_idx
+ON appointments (date, time);
+
+-- One automated reminder per appointment and window; the scheduler claims
+-- a reminder by inserting its row here before sending it.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS doctor_notify_logs_auto_reminder_idx
+ON doctor_notify_logs (appointment_id, template_key)
+WHERE template_key LIKE 'reminder\_%';
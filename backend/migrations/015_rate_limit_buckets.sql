@@ -0,0 +1,12 @@
+-- Shared token buckets for RATE_LIMIT_BACKEND=postgres. Unlogged: losing
+-- them in a crash only resets the limits.
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    capacity DOUBLE PRECISION NOT NULL,
+    refill_per_second DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS rate_limit_buckets_updated_at_idx
+ON rate_limit_buckets (updated_at);
@@ -0,0 +1,13 @@
+-- Server-side sessions (SESSION_BACKEND=postgres). id is the SHA-256 of the
+-- random session id in the cookie, so this table alone cannot be replayed.
+CREATE TABLE IF NOT EXISTS user_sessions (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    data JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS user_sessions_user_id_idx ON user_sessions (user_id);
+CREATE INDEX IF NOT EXISTS user_sessions_expires_at_idx ON user_sessions (expires_at);
@@ -0,0 +1,28 @@
+-- Version of doctor_public_profiles for per-worker directory indexes. Every
+-- statement that writes the table bumps this single row; the row lock makes
+-- concurrent writers take turns, so each commit leaves a new, higher value
+-- that a reader cannot miss (unlike MAX(refreshed_at), which is NOW() at
+-- transaction start).
+CREATE TABLE IF NOT EXISTS doctor_directory_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL
+);
+
+INSERT INTO doctor_directory_version (id, version) VALUES (TRUE, 1)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_doctor_directory_version()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE doctor_directory_version SET version = version + 1 WHERE id;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS doctor_public_profiles_bump_version ON doctor_public_profiles;
+
+CREATE TRIGGER doctor_public_profiles_bump_version
+AFTER INSERT OR UPDATE OR DELETE ON doctor_public_profiles
+FOR EACH STATEMENT EXECUTE FUNCTION bump_doctor_directory_version();
@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+-- Outgoing SMS are queued as doctor_notify_logs rows (error = 'queued') in
+-- the transaction that causes them, and sent by python -m app.reminders.
+-- claimed_at is the sender's lease on a queued row.
+ALTER TABLE doctor_notify_logs ADD COLUMN IF NOT EXISTS phone TEXT;
+ALTER TABLE doctor_notify_logs ADD COLUMN IF NOT EXISTS body TEXT;
+ALTER TABLE doctor_notify_logs ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doctor_notify_logs_queued_idx
+ON doctor_notify_logs (id)
+WHERE error = 'queued';
@@ -0,0 +1,9 @@
+-- Reminders are now queued like other SMS (see 018): the claim row carries
+-- the text and a send_before deadline, and a claim whose sender died is
+-- sent again instead of blocking the reminder for good.
+ALTER TABLE doctor_notify_logs ADD COLUMN IF NOT EXISTS send_before TIMESTAMPTZ;
+
+-- Reminder claims made before this change have no text to send. Dropping
+-- them lets the scheduler claim them again while they are still due.
+DELETE FROM doctor_notify_logs
+WHERE error = 'queued' AND body IS NULL AND template_key LIKE 'reminder\_%';
@@ -0,0 +1,5 @@
+-- migrate: no-transaction
+-- Admin search matches substrings of the message again (ILIKE), as it did
+-- before full-text search; pg_trgm comes from migration 009.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS quote_requests_message_trgm_idx
+ON quote_requests USING GIN (message gin_trgm_ops);
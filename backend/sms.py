@@ -1,38 +1,84 @@
 # sms.py
 import os
-from twilio.rest import Client
+
+from app.instrumentation import timed
 
 
 def _env_bool(name: str, default: str = "false") -> bool:
     return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "y", "on")
 
 
-def send_sms(to_phone: str, message: str) -> dict:
-    """
-    Send an SMS via Twilio.
-    Returns: { ok: bool, sid?: str, error?: str }
-    Never raises.
-    """
+def _sms_config(to_phone: str):
     if not _env_bool("SMS_ENABLED", "false"):
-        return {"ok": False, "error": "SMS disabled (SMS_ENABLED=false)"}
+        return None, {"ok": False, "error": "SMS disabled (SMS_ENABLED=false)"}
 
     account_sid = os.getenv("TWILIO_ACCOUNT_SID", "").strip()
     auth_token = os.getenv("TWILIO_AUTH_TOKEN", "").strip()
     from_phone = os.getenv("TWILIO_FROM", "").strip()
 
     if not account_sid or not auth_token or not from_phone:
-        return {"ok": False, "error": "Missing Twilio env vars"}
+        return None, {"ok": False, "error": "Missing Twilio env vars"}
 
     if not to_phone or not str(to_phone).strip().startswith("+"):
-        return {"ok": False, "error": "Phone must be E.164 format (start with +)"}
+        return None, {"ok": False, "error": "Phone must be E.164 format (start with +)"}
+
+    return (account_sid, auth_token, from_phone), None
+
+
+def send_sms(to_phone: str, message: str) -> dict:
+    """
+    Send an SMS via Twilio.
+    Returns: { ok: bool, sid?: str, error?: str }
+    Never raises.
+    """
+    config, error = _sms_config(to_phone)
+    if error:
+        return error
+    account_sid, auth_token, from_phone = config
 
     try:
+        # Imported on first send: twilio.rest is slow to import and most
+        # workers never send an SMS before they are recycled.
+        from twilio.rest import Client
+
         client = Client(account_sid, auth_token)
-        msg = client.messages.create(
-            body=message,
-            from_=from_phone,
-            to=str(to_phone).strip(),
-        )
+        with timed("sms"):
+            msg = client.messages.create(
+                body=message,
+                from_=from_phone,
+                to=str(to_phone).strip(),
+            )
+        return {"ok": True, "sid": msg.sid}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+async def send_sms_async(to_phone: str, message: str) -> dict:
+    """
+    Same contract as send_sms, using Twilio's aiohttp-based client so the
+    event loop is not blocked while the provider responds.
+    Never raises.
+    """
+    config, error = _sms_config(to_phone)
+    if error:
+        return error
+    account_sid, auth_token, from_phone = config
+
+    try:
+        from twilio.http.async_http_client import AsyncTwilioHttpClient
+        from twilio.rest import Client
+
+        http_client = AsyncTwilioHttpClient()
+        try:
+            client = Client(account_sid, auth_token, http_client=http_client)
+            with timed("sms"):
+                msg = await client.messages.create_async(
+                    body=message,
+                    from_=from_phone,
+                    to=str(to_phone).strip(),
+                )
+        finally:
+            await http_client.close()
         return {"ok": True, "sid": msg.sid}
     except Exception as e:
         return {"ok": False, "error": str(e)}
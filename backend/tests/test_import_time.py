@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+from bench import importtime
+
+# Worker cold start: `app` is what scripts and migrations import, `wsgi`
+# builds the app with every blueprint. Raise IMPORT_BUDGET_MS on slow CI.
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "800"))
+
+
+@pytest.mark.parametrize("target", ["app", "wsgi"])
+def test_import_time(target):
+    report = importtime.check(importtime.measure_best(target), BUDGET_MS, top=10)
+    assert not report["lazy_violations"], f"imported at boot: {report['lazy_violations']}"
+    assert report["total_ms"] <= BUDGET_MS, f"import {target} took {report['total_ms']} ms: {report['slowest_self_ms']}"
@@ -1,10 +1,5 @@
-import os
-from app import app
+from app import create_app
 
-try:
-    from app.db import init_db
-    init_db()
-except Exception as e:
-    print(str(e))
-
-print("PORT =", os.environ.get("PORT", "5000"))
+# Migrations are applied once per deploy with `python -m app.migrate`,
+# not by every worker at import.
+app = create_app()
@@ -154,6 +154,9 @@
           <tbody data-role="tbody"></tbody>
         </table>
       </div>
+      <div class="dash-inline hidden" id="quoteMoreWrap">
+        <button class="btn ghost" id="quoteMore">Load more</button>
+      </div>
     `;
 
     const section = sectionEls(sectionRoot);
@@ -163,10 +166,13 @@
     const toInput = sectionRoot.querySelector("#quoteTo");
     const applyBtn = sectionRoot.querySelector("#quoteApply");
     const exportBtn = sectionRoot.querySelector("#quoteExport");
+    const moreWrap = sectionRoot.querySelector("#quoteMoreWrap");
+    const moreBtn = sectionRoot.querySelector("#quoteMore");
 
     const state = {
       items: [],
       map: new Map(),
+      nextCursor: null,
     };
 
     function render(items) {
@@ -200,8 +206,12 @@
       if (section.tbody) section.tbody.innerHTML = rows.join("");
     }
 
-    async function loadList() {
-      setSectionLoading(section);
+    function setMoreVisible(visible) {
+      if (moreWrap) moreWrap.classList.toggle("hidden", !visible);
+    }
+
+    async function loadList(append = false) {
+      if (!append) setSectionLoading(section);
 
       const params = new URLSearchParams();
       const status = statusFilter?.value || "";
@@ -213,17 +223,21 @@
       if (q) params.set("q", q);
       if (from) params.set("from", from);
       if (to) params.set("to", to);
+      if (append && state.nextCursor) params.set("cursor", state.nextCursor);
 
       const res = await apiFetch(`/api/admin/quote-requests?${params.toString()}`, { method: "GET" });
       if (!res.ok) {
         setSectionError(section, "Unable to load quote requests.");
+        setMoreVisible(false);
         return;
       }
 
       const payload = await res.json().catch(() => null);
       const items = payload?.data?.items || [];
-      state.items = items;
-      render(items);
+      state.items = append ? state.items.concat(items) : items;
+      state.nextCursor = payload?.data?.next_cursor || null;
+      render(state.items);
+      setMoreVisible(Boolean(state.nextCursor));
     }
 
     function downloadQuoteCsv() {
@@ -259,6 +273,7 @@
       const payload = await res.json().catch(() => null);
       const details = payload?.data?.request;
       const files = payload?.data?.files || [];
+      const archiveUrl = payload?.data?.archive_url || "";
       if (!details) {
         alert("Unable to load quote request details.");
         return;
@@ -280,6 +295,16 @@
       const ids = files.filter((f) => f.kind === "id");
 
       const filesSection = `
+        ${files.length > 1 && archiveUrl
+          ? `
+            <div class="dash-form__row">
+              <div class="dash-inline">
+                <span>${files.length} files</span>
+                <a class="btn ghost" style="padding:6px 10px; border-width:1px;" href="${escapeHtml(archiveUrl)}">Download all (ZIP)</a>
+              </div>
+            </div>
+          `
+          : ""}
         <div class="dash-form__row">
           <label>Supporting Documents</label>
           <div class="dash-form">
@@ -403,7 +428,8 @@
       }
     });
 
-    if (applyBtn) applyBtn.addEventListener("click", loadList);
+    if (applyBtn) applyBtn.addEventListener("click", () => loadList());
+    if (moreBtn) moreBtn.addEventListener("click", () => loadList(true));
     if (exportBtn) {
       exportBtn.addEventListener("click", (e) => {
         e.preventDefault();
@@ -6,6 +6,10 @@ document.addEventListener("DOMContentLoaded", () => {
   if (!listEl || !searchInput || !specialtyFilter) return;
 
   let doctors = [];
+  let page = 1;
+  let requestSeq = 0;
+  let searchTimer = null;
+  const PAGE_SIZE = 24;
   const DEFAULT_AVATAR = "assets/img/default_avatar.jpg";
   const api = window.MC_API;
   const t = window.MC_I18N?.t || ((_, fallback) => fallback);
@@ -31,9 +35,8 @@ document.addEventListener("DOMContentLoaded", () => {
     return url.startsWith("/") ? `${API_BASE}${url}` : `${API_BASE}/${url}`;
   }
 
-  function buildSpecialtyFilter(items) {
-    const unique = [...new Set(items.map(d => normalize(d.specialty)))].filter(Boolean);
-
+  function buildSpecialtyFilter(facets) {
+    const current = specialtyFilter.value;
     const currentPlaceholder =
       specialtyFilter.querySelector('option[value=""]')?.textContent || "All Specialties";
 
@@ -44,31 +47,25 @@ document.addEventListener("DOMContentLoaded", () => {
     placeholder.setAttribute("data-i18n", "filter_all");
     specialtyFilter.appendChild(placeholder);
 
-    unique.forEach(spec => {
+    (facets || []).forEach(facet => {
       const opt = document.createElement("option");
-      opt.value = spec;
-      const label = items.find(d => normalize(d.specialty) === spec)?.specialty || spec;
-      opt.textContent = label;
+      opt.value = facet.value;
+      opt.textContent = `${facet.label} (${facet.count})`;
       specialtyFilter.appendChild(opt);
     });
+    specialtyFilter.value = current;
   }
 
-  function getFilteredDoctors() {
-    const q = normalize(searchInput.value);
+  function buildQuery(pageNumber) {
+    const params = new URLSearchParams({ page: String(pageNumber), limit: String(PAGE_SIZE) });
+    const q = searchInput.value.trim();
     const spec = normalize(specialtyFilter.value);
-
-    return doctors.filter(d => {
-      const name = normalize(d.full_name);
-      const specialty = normalize(d.specialty);
-
-      const matchesSearch = !q || name.includes(q);
-      const matchesSpecialty = !spec || specialty === spec;
-
-      return matchesSearch && matchesSpecialty;
-    });
+    if (q) params.set("q", q);
+    if (spec) params.set("specialty", spec);
+    return `/api/doctors/search?${params.toString()}`;
   }
 
-  function render(items) {
+  function render(items, hasMore) {
     if (!items.length) {
       listEl.innerHTML = `<p>${t("doctors_empty", "No doctors found.")}</p>`;
       return;
@@ -96,11 +93,31 @@ document.addEventListener("DOMContentLoaded", () => {
           </div>
         </article>
       `;
-    }).join("");
+    }).join("") + (hasMore
+      ? `<button type="button" class="btn ghost" id="doctorLoadMore">${t("doctors_load_more", "Load more")}</button>`
+      : "");
+  }
+
+  async function load(nextPage) {
+    const seq = ++requestSeq;
+    const { ok, data } = await api.getJson(buildQuery(nextPage));
+    if (!ok) throw new Error("Doctors API failed");
+    // A newer search started while this one was in flight.
+    if (seq !== requestSeq) return;
+
+    const result = data?.data || {};
+    const items = Array.isArray(result.items) ? result.items : [];
+    doctors = nextPage === 1 ? items : doctors.concat(items);
+    page = nextPage;
+    buildSpecialtyFilter(result.facets?.specialty);
+    render(doctors, Boolean(result.has_more));
   }
 
   function refresh() {
-    render(getFilteredDoctors());
+    load(1).catch(err => {
+      console.error(err);
+      listEl.innerHTML = `<p>${t("doctors_load_error", "Unable to load doctors.")}</p>`;
+    });
   }
 
   async function init() {
@@ -109,28 +126,22 @@ document.addEventListener("DOMContentLoaded", () => {
       return;
     }
 
-    try {
-      const { ok, data } = await api.getJson("/api/doctors");
-      if (!ok) throw new Error("Doctors API failed");
-
-      const payload = data;
-      doctors = Array.isArray(payload?.data?.items)
-        ? payload.data.items
-        : Array.isArray(payload)
-        ? payload
-        : Array.isArray(payload?.items)
-        ? payload.items
-        : [];
-      buildSpecialtyFilter(doctors);
-      refresh();
-    } catch (err) {
-      console.error(err);
-      listEl.innerHTML = `<p>${t("doctors_load_error", "Unable to load doctors.")}</p>`;
-    }
+    refresh();
   }
 
-  searchInput.addEventListener("input", refresh);
+  searchInput.addEventListener("input", () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(refresh, 250);
+  });
   specialtyFilter.addEventListener("change", refresh);
+  listEl.addEventListener("click", event => {
+    if (event.target.id !== "doctorLoadMore") return;
+    event.target.disabled = true;
+    load(page + 1).catch(err => {
+      console.error(err);
+      event.target.disabled = false;
+    });
+  });
 
   init();
 });